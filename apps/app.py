@@ -134,87 +134,39 @@
 
 from flask import Flask, render_template, request
 import mlflow
-import pickle
 import os
-import pandas as pd
-import numpy as np
-import re
-import nltk
-import string
-from nltk.corpus import stopwords
-from nltk.stem import WordNetLemmatizer
+import sys
 import time
 from prometheus_client import Counter, Histogram, start_http_server
 
-def lemmatization(text):
-    lemmatizer = WordNetLemmatizer()
-    text = text.split()
-    text = [lemmatizer.lemmatize(word) for word in text]
-    return " ".join(text)
-
-def remove_stop_words(text):
-    stop_words = set(stopwords.words("english"))
-    text = [word for word in str(text).split() if word not in stop_words]
-    return " ".join(text)
-
-def removing_numbers(text):
-    text = ''.join([char for char in text if not char.isdigit()])
-    return text
-
-def lower_case(text):
-    text = text.split()
-    text = [word.lower() for word in text]
-    return " ".join(text)
-
-def removing_punctuations(text):
-    text = re.sub('[%s]' % re.escape(string.punctuation), ' ', text)
-    text = text.replace('؛', "")
-    text = re.sub('\s+', ' ', text).strip()
-    return text
-
-def removing_urls(text):
-    url_pattern = re.compile(r'https?://\S+|www\.\S+')
-    return url_pattern.sub(r'', text)
-
-def normalize_text(text):
-    text = lower_case(text)
-    text = remove_stop_words(text)
-    text = removing_numbers(text)
-    text = removing_punctuations(text)
-    text = removing_urls(text)
-    text = lemmatization(text)
-    return text
-
-# Set up DagsHub credentials for MLflow tracking
-dagshub_token = os.getenv("DAGSHUB_PAT")
-if not dagshub_token:
-    raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
-
-os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
-os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
-
-dagshub_url = "https://dagshub.com"
-repo_owner = 'shahriar0999'
-repo_name = 'mlops-small-project'
-
-mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
+# Add project root to sys.path, the image copies src/tracking next to app.py instead
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-app = Flask(__name__)
+from src.tracking.backend import configure_tracking
+from src.tracking.registry import get_registry
 
-# Load model from MLflow model registry
-def get_latest_model_version(model_name):
-    client = mlflow.MlflowClient()
-    latest_version = client.get_latest_versions(model_name, stages=["Production"])
-    if not latest_version:
-        latest_version = client.get_latest_versions(model_name, stages=["None"])
-    return latest_version[0].version if latest_version else None
+app = Flask(__name__)
 
 model_name = "own_model"
-model_version = get_latest_model_version(model_name)
+# loaded by get_model on the first prediction, so importing the app needs no tracking credentials
+model = None
+
+
+def get_model():
+    """The served pyfunc: normalizer config, vectorizer and classifier, logged together by model_evaluation"""
+    global model
+    if model is None:
+        # a local pyfunc directory in MODEL_URI is served without the registry (offline runs, tests, benchmarks)
+        model_uri = os.getenv("MODEL_URI")
+        if not model_uri:
+            # DagsHub, or a local file/SQLite store when TRACKING_BACKEND says so
+            configure_tracking()
+            # Production, else the latest Staging or unstaged version, in one cached registry lookup
+            model_version, model_stage = get_registry().resolve_version(model_name)
+            model_uri = f'models:/{model_name}/{model_version}'
+        model = mlflow.pyfunc.load_model(model_uri)
+    return model
 
-model_uri = f'models:/{model_name}/{model_version}'
-model = mlflow.pyfunc.load_model(model_uri)
-vectorizer = pickle.load(open('models/vectorizer.pkl', 'rb'))
 
 # Prometheus metrics
 REQUEST_COUNT = Counter(
@@ -235,10 +187,8 @@ def home():
 def predict():
     start_time = time.time()
     text = request.form['text']
-    text = normalize_text(text)
-    features = vectorizer.transform([text])
-    features_df = pd.DataFrame(features.toarray(), columns=[str(i) for i in range(features.shape[1])])
-    result = model.predict(features_df)
+    # the model normalizes and vectorizes the raw text itself
+    result = get_model().predict([text])
 
     REQUEST_COUNT.inc()
     REQUEST_LATENCY.observe(time.time() - start_time)
@@ -246,6 +196,8 @@ def predict():
     return render_template('index.html', result=result[0])
 
 if __name__ == "__main__":
+    # fail at startup rather than on the first request when the model cannot be loaded
+    get_model()
     # Start Prometheus metrics server on port 8000
     start_http_server(8000)
     app.run(debug=True, host="0.0.0.0", port=8501)
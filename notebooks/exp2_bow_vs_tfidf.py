@@ -1,8 +1,10 @@
 # Import necessary libraries
 import mlflow
-import dagshub
 import tempfile
+import time
 import mlflow.sklearn
+from joblib import Parallel, delayed, parallel_config
+from sklearn.base import clone
 from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
@@ -10,7 +12,6 @@ from sklearn.naive_bayes import MultinomialNB
 from xgboost import XGBClassifier
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from mlflow.models import infer_signature
 import pandas as pd
 import re
 import string
@@ -18,16 +19,21 @@ from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import numpy as np
 import os
+import sys
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src.tracking.backend import configure_tracking
+from src.tracking.batch_logger import BatchLogger
 
-df = pd.read_csv('https://raw.githubusercontent.com/campusx-official/jupyter-masterclass/main/tweet_emotions.csv').drop(columns=['tweet_id'])
 
-# set tracking uri
-mlflow.set_tracking_uri("https://dagshub.com/shahriar0999/mlops-small-project.mlflow")
-dagshub.init(repo_owner='shahriar0999', repo_name='mlops-small-project', mlflow=True)
-
-mlflow.set_experiment("Experiment_2_bow_vs_tfidf")
+DATA_URL = 'https://raw.githubusercontent.com/campusx-official/jupyter-masterclass/main/tweet_emotions.csv'
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+# one worker per core; every worker reads the same memory-mapped feature matrices
+N_JOBS = -1
+MMAP_MIN_BYTES = '1M'
+MMAP_DIR = os.path.join('.cache', 'exp2_bow_vs_tfidf')
 
 # Define text preprocessing functions
 def lemmatization(text):
@@ -80,15 +86,6 @@ def normalize_text(df):
         print(f'Error during text normalization: {e}')
         raise
 
-# Normalize the text data
-df = normalize_text(df)
-
-x = df['sentiment'].isin(['happiness','sadness'])
-df = df[x]
-
-df['sentiment'] = df['sentiment'].replace({'sadness':0, 'happiness':1})
-
-
 # Define feature extraction methods
 vectorizers = {
     'BoW': CountVectorizer(),
@@ -99,71 +96,119 @@ vectorizers = {
 algorithms = {
     'LogisticRegression': LogisticRegression(),
     'MultinomialNB': MultinomialNB(),
-    'XGBoost': XGBClassifier(),
-    'RandomForest': RandomForestClassifier(),
+    # one thread per model, train_all already runs a model on every core
+    'XGBoost': XGBClassifier(n_jobs=1),
+    'RandomForest': RandomForestClassifier(n_jobs=1),
     'GradientBoosting': GradientBoostingClassifier()
 }
 
-# Start the parent run
-with mlflow.start_run(run_name="All Experiments") as parent_run:
-    # Loop through algorithms and feature extraction methods (Child Runs)
-    for algo_name, algorithm in algorithms.items():
-        for vec_name, vectorizer in vectorizers.items():
-            with mlflow.start_run(run_name=f"{algo_name} with {vec_name}", nested=True) as child_run:
-                X = vectorizer.fit_transform(df['content'])
-                y = df['sentiment']
-                X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-                
-
-                # Log preprocessing parameters
-                mlflow.log_param("vectorizer", vec_name)
-                mlflow.log_param("algorithm", algo_name)
-                mlflow.log_param("test_size", 0.2)
-                
-                # Model training
-                model = algorithm
-                model.fit(X_train, y_train)
-                
-                # Log model parameters
-                if algo_name == 'LogisticRegression':
-                    mlflow.log_param("C", model.C)
-                elif algo_name == 'MultinomialNB':
-                    mlflow.log_param("alpha", model.alpha)
-                elif algo_name == 'XGBoost':
-                    mlflow.log_param("n_estimators", model.n_estimators)
-                    mlflow.log_param("learning_rate", model.learning_rate)
-                elif algo_name == 'RandomForest':
-                    mlflow.log_param("n_estimators", model.n_estimators)
-                    mlflow.log_param("max_depth", model.max_depth)
-                elif algo_name == 'GradientBoosting':
-                    mlflow.log_param("n_estimators", model.n_estimators)
-                    mlflow.log_param("learning_rate", model.learning_rate)
-                    mlflow.log_param("max_depth", model.max_depth)
-                
-                # Model evaluation
-                y_pred = model.predict(X_test)
-                accuracy = accuracy_score(y_test, y_pred)
-                precision = precision_score(y_test, y_pred)
-                recall = recall_score(y_test, y_pred)
-                f1 = f1_score(y_test, y_pred)
-                
-                # Log evaluation metrics
-                mlflow.log_metric("accuracy", accuracy)
-                mlflow.log_metric("precision", precision)
-                mlflow.log_metric("recall", recall)
-                mlflow.log_metric("f1_score", f1)
-           
-                # Save and log the notebook
-                mlflow.log_artifact(__file__)
-
-                with tempfile.TemporaryDirectory() as tmp_dir:
-                    model_path = os.path.join(tmp_dir, "model")
-                    mlflow.sklearn.save_model(model, model_path)
-                    mlflow.log_artifacts(model_path, "model")
-                
-                # Print the results for verification
-                print(f"Algorithm: {algo_name}, Feature Engineering: {vec_name}")
-                print(f"Accuracy: {accuracy}")
-                print(f"Precision: {precision}")
-                print(f"Recall: {recall}")
-                print(f"F1 Score: {f1}")
\ No newline at end of file
+# model parameters logged for each algorithm
+logged_params = {
+    'LogisticRegression': ['C'],
+    'MultinomialNB': ['alpha'],
+    'XGBoost': ['n_estimators', 'learning_rate'],
+    'RandomForest': ['n_estimators', 'max_depth'],
+    'GradientBoosting': ['n_estimators', 'learning_rate', 'max_depth'],
+}
+
+def load_data(url):
+    """Tweets normalized and reduced to happiness (1) and sadness (0)."""
+    df = pd.read_csv(url).drop(columns=['tweet_id'])
+    df = normalize_text(df)
+    df = df[df['sentiment'].isin(['happiness', 'sadness'])].copy()
+    df['sentiment'] = df['sentiment'].replace({'sadness': 0, 'happiness': 1})
+    return df
+
+def vectorize(df):
+    """Fit every vectorizer once and split its matrix, all algorithms train on the same splits."""
+    y = df['sentiment'].values
+    splits = {}
+    for vec_name, vectorizer in vectorizers.items():
+        X = clone(vectorizer).fit_transform(df['content'])
+        splits[vec_name] = train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+    return splits
+
+def fit_evaluate(algo_name, model, vec_name, X_train, X_test, y_train, y_test):
+    """Train and score one algorithm on one feature set, in a worker."""
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    return {
+        'run_name': f"{algo_name} with {vec_name}",
+        'model': model,
+        'params': {
+            'vectorizer': vec_name,
+            'algorithm': algo_name,
+            'test_size': TEST_SIZE,
+            **{name: getattr(model, name) for name in logged_params[algo_name]},
+        },
+        'metrics': {
+            'accuracy': accuracy_score(y_test, y_pred),
+            'precision': precision_score(y_test, y_pred),
+            'recall': recall_score(y_test, y_pred),
+            'f1_score': f1_score(y_test, y_pred),
+            'fit_seconds': fit_seconds,
+        },
+    }
+
+def train_all(splits):
+    """Every algorithm x vectorizer pair in a process pool.
+
+    Matrices over MMAP_MIN_BYTES are dumped once and memory-mapped read-only.
+
+    Workers are capped at one OpenMP/BLAS thread each so the pool does not oversubscribe the cores.
+    """
+    os.makedirs(MMAP_DIR, exist_ok=True)
+    with parallel_config(backend='loky', max_nbytes=MMAP_MIN_BYTES, mmap_mode='r', temp_folder=MMAP_DIR,
+                         inner_max_num_threads=1):
+        return Parallel(n_jobs=N_JOBS)(
+            delayed(fit_evaluate)(algo_name, clone(algorithm), vec_name, *split)
+            for algo_name, algorithm in algorithms.items()
+            for vec_name, split in splits.items()
+        )
+
+def log_results(results):
+    """One child run per result under a parent run; params and metrics of all children are sent in one flush."""
+    client = mlflow.MlflowClient()
+    tracker = BatchLogger(background=False, max_pending=10000)
+    with mlflow.start_run(run_name="All Experiments") as parent_run:
+        for result in results:
+            child_run = client.create_run(
+                parent_run.info.experiment_id,
+                tags={'mlflow.parentRunId': parent_run.info.run_id, 'mlflow.runName': result['run_name']},
+            )
+            run_id = child_run.info.run_id
+            tracker.log_params(result['params'], run_id=run_id)
+            tracker.log_metrics(result['metrics'], run_id=run_id)
+
+            # Save and log the notebook and the model
+            client.log_artifact(run_id, __file__)
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                model_path = os.path.join(tmp_dir, "model")
+                mlflow.sklearn.save_model(result['model'], model_path)
+                client.log_artifacts(run_id, model_path, "model")
+            result['run_id'] = run_id
+        tracker.close()
+        for result in results:
+            client.set_terminated(result['run_id'])
+
+def main():
+    configure_tracking()
+    mlflow.set_experiment("Experiment_2_bow_vs_tfidf")
+
+    df = load_data(DATA_URL)
+    splits = vectorize(df)
+    start = time.perf_counter()
+    results = train_all(splits)
+    print(f"Trained {len(results)} models in {time.perf_counter() - start:.1f}s")
+    log_results(results)
+
+    # Print the results for verification
+    for result in results:
+        print(f"Algorithm: {result['params']['algorithm']}, Feature Engineering: {result['params']['vectorizer']}")
+        for name, value in result['metrics'].items():
+            print(f"{name}: {value}")
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,14 @@
 import mlflow
-import dagshub
 import tempfile
+import time
 import mlflow.sklearn
+from joblib import parallel_config
 from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.model_selection import GridSearchCV
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import GridSearchCV, HalvingGridSearchCV, ParameterGrid
 from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from mlflow.models import infer_signature
 import pandas as pd
 import re
 import string
@@ -15,16 +16,23 @@ from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 import numpy as np
 import os
+import sys
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from src.tracking.backend import configure_tracking
+from src.tracking.batch_logger import BatchLogger
 
-df = pd.read_csv('https://raw.githubusercontent.com/campusx-official/jupyter-masterclass/main/tweet_emotions.csv').drop(columns=['tweet_id'])
 
-# set tracking uri
-mlflow.set_tracking_uri("https://dagshub.com/shahriar0999/mlops-small-project.mlflow")
-dagshub.init(repo_owner='shahriar0999', repo_name='mlops-small-project', mlflow=True)
-
-mlflow.set_experiment("Experiment_2_bow_vs_tfidf")
+DATA_URL = 'https://raw.githubusercontent.com/campusx-official/jupyter-masterclass/main/tweet_emotions.csv'
+CV = 5
+N_JOBS = -1
+# grids with at least this many candidates use successive halving: every round keeps the best
+# 1/HALVING_FACTOR of the candidates and gives them HALVING_FACTOR times more training rows
+HALVING_MIN_CANDIDATES = 20
+HALVING_FACTOR = 3
+MMAP_MIN_BYTES = '1M'
+MMAP_DIR = os.path.join('.cache', 'exp3_lor_bow_hp')
 
 # Define text preprocessing functions
 def lemmatization(text):
@@ -77,22 +85,6 @@ def normalize_text(df):
         print(f'Error during text normalization: {e}')
         raise
 
-# Normalize the text data
-df = normalize_text(df)
-
-x = df['sentiment'].isin(['happiness','sadness'])
-df = df[x]
-
-df['sentiment'] = df['sentiment'].replace({'sadness':0, 'happiness':1})
-
-vectorizer = CountVectorizer()
-X = vectorizer.fit_transform(df['content'])
-y = df['sentiment']
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Set the experiment name
-mlflow.set_experiment("LoR Hyperparameter Tuning")
-
 # Define hyperparameter grid for Logistic Regression
 param_grid = {
     'C': [0.1, 1, 10],
@@ -100,59 +92,146 @@ param_grid = {
     'solver': ['liblinear']
 }
 
-# Start the parent run for hyperparameter tuning
-with mlflow.start_run():
-
-    # Perform grid search
-    grid_search = GridSearchCV(LogisticRegression(), param_grid, cv=5, scoring='f1', n_jobs=-1)
-    grid_search.fit(X_train, y_train)
-
-    # Log each parameter combination as a child run
-    for params, mean_score, std_score in zip(grid_search.cv_results_['params'], grid_search.cv_results_['mean_test_score'], grid_search.cv_results_['std_test_score']):
-        with mlflow.start_run(run_name=f"LR with params: {params}", nested=True):
-            model = LogisticRegression(**params)
-            model.fit(X_train, y_train)
-            
-            # Model evaluation
-            y_pred = model.predict(X_test)
-            accuracy = accuracy_score(y_test, y_pred)
-            precision = precision_score(y_test, y_pred)
-            recall = recall_score(y_test, y_pred)
-            f1 = f1_score(y_test, y_pred)
-            
-            # Log parameters and metrics
-            mlflow.log_params(params)
-            mlflow.log_metric("mean_cv_score", mean_score)
-            mlflow.log_metric("std_cv_score", std_score)
-            mlflow.log_metric("accuracy", accuracy)
-            mlflow.log_metric("precision", precision)
-            mlflow.log_metric("recall", recall)
-            mlflow.log_metric("f1_score", f1)
-            
-            
-            # Print the results for verification
-            print(f"Mean CV Score: {mean_score}, Std CV Score: {std_score}")
-            print(f"Accuracy: {accuracy}")
-            print(f"Precision: {precision}")
-            print(f"Recall: {recall}")
-            print(f"F1 Score: {f1}")
-
-    # Log the best run details in the parent run
-    best_params = grid_search.best_params_
-    best_score = grid_search.best_score_
-    mlflow.log_params(best_params)
-    mlflow.log_metric("best_f1_score", best_score)
-    
-    print(f"Best Params: {best_params}")
-    print(f"Best F1 Score: {best_score}")
-
-    # Save and log the notebook
-    mlflow.log_artifact(__file__)
+METRICS = {
+    'accuracy': accuracy_score,
+    'precision': precision_score,
+    'recall': recall_score,
+    'f1': f1_score,
+}
 
-    # Log model
-    # mlflow.sklearn.log_model(grid_search.best_estimator_, "model")
+def holdout_metrics(model, X_test, y_test):
+    y_pred = model.predict(X_test)
+    return {f"holdout_{name}": metric(y_test, y_pred) for name, metric in METRICS.items()}
+
+class FoldAndHoldoutScorer:
+    """Multi-metric scorer: the metrics on the CV fold, and the same fold model's metrics on the held-out test set.
+
+    The held-out metrics come out of the search as mean_test_holdout_* in cv_results_,
+    averaged over the fold models, so no candidate is refit to score it. They are logged as
+    mean_fold_holdout_*: the mean over the CV fold models, not the score of a model fit on
+    the whole training set.
+    """
+
+    def __init__(self, X_test, y_test):
+        self.X_test = X_test
+        self.y_test = y_test
+
+    def __call__(self, model, X, y):
+        y_pred = model.predict(X)
+        scores = {name: metric(y, y_pred) for name, metric in METRICS.items()}
+        scores.update(holdout_metrics(model, self.X_test, self.y_test))
+        return scores
+
+def load_data(url):
+    """Tweets normalized and reduced to happiness (1) and sadness (0)."""
+    df = pd.read_csv(url).drop(columns=['tweet_id'])
+    df = normalize_text(df)
+    df = df[df['sentiment'].isin(['happiness', 'sadness'])].copy()
+    df['sentiment'] = df['sentiment'].replace({'sadness': 0, 'happiness': 1})
+    return df
+
+def build_search(X_test, y_test):
+    """Grid search scoring every candidate on the folds and the test set.
+
+    Large grids use successive halving on f1 instead.
+    """
+    if len(ParameterGrid(param_grid)) >= HALVING_MIN_CANDIDATES:
+        # halving ranks on a single metric, so it cannot score the test set per candidate
+        return HalvingGridSearchCV(
+            LogisticRegression(), param_grid, cv=CV, scoring='f1', factor=HALVING_FACTOR,
+            min_resources='exhaust', n_jobs=N_JOBS, random_state=42,
+        )
+    return GridSearchCV(
+        LogisticRegression(), param_grid, cv=CV, scoring=FoldAndHoldoutScorer(X_test, y_test), refit='f1',
+        n_jobs=N_JOBS,
+    )
+
+def trial_records(search, X_test, y_test):
+    """One record of params and metrics per candidate, from cv_results_ at the last round each candidate reached.
+
+    Grid search records carry the fold models' mean held-out metrics. Halving has none per candidate,
+    only its best candidate gets holdout_* metrics, from the model the search already refit.
+    """
+    results = search.cv_results_
+    halving = isinstance(search, HalvingGridSearchCV)
+    # halving has one row per candidate and round, keep each candidate's last
+    last_row = {tuple(sorted(params.items())): index for index, params in enumerate(results['params'])}
+    records = []
+    for index in last_row.values():
+        if halving:
+            metrics = {'mean_cv_f1': results['mean_test_score'][index], 'std_cv_f1': results['std_test_score'][index],
+                       'iter': results['iter'][index], 'n_resources': results['n_resources'][index]}
+            if results['params'][index] == search.best_params_:
+                metrics.update(holdout_metrics(search.best_estimator_, X_test, y_test))
+        else:
+            metrics = {f"mean_cv_{name}": results[f"mean_test_{name}"][index] for name in METRICS}
+            metrics.update({
+                f"mean_fold_holdout_{name}": results[f"mean_test_holdout_{name}"][index] for name in METRICS
+            })
+            metrics['std_cv_f1'] = results['std_test_f1'][index]
+        records.append({'params': results['params'][index], 'metrics': metrics})
+    return records
+
+def log_trials(search, records, best_score):
+    """The search as a parent run with one child run per candidate; all params and metrics are sent in one flush."""
+    client = mlflow.MlflowClient()
+    tracker = BatchLogger(background=False, max_pending=100000)
+    with mlflow.start_run() as parent_run:
+        run_ids = []
+        for record in records:
+            child_run = client.create_run(
+                parent_run.info.experiment_id,
+                tags={'mlflow.parentRunId': parent_run.info.run_id,
+                      'mlflow.runName': f"LR with params: {record['params']}"},
+            )
+            tracker.log_params(record['params'], run_id=child_run.info.run_id)
+            tracker.log_metrics(record['metrics'], run_id=child_run.info.run_id)
+            run_ids.append(child_run.info.run_id)
+
+        # Log the best run details in the parent run
+        tracker.log_params(search.best_params_)
+        tracker.log_metric("best_f1_score", best_score)
+        tracker.log_param("search", type(search).__name__)
+        tracker.close()
+        for run_id in run_ids:
+            client.set_terminated(run_id)
+
+        # Save and log the notebook
+        mlflow.log_artifact(__file__)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = os.path.join(tmp_dir, "model")
+            mlflow.sklearn.save_model(search.best_estimator_, model_path)
+            mlflow.log_artifacts(model_path, "model")
+
+def main():
+    configure_tracking()
+    # Set the experiment name
+    mlflow.set_experiment("LoR Hyperparameter Tuning")
+
+    df = load_data(DATA_URL)
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(df['content'])
+    y = df['sentiment'].values
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+    search = build_search(X_test, y_test)
+    os.makedirs(MMAP_DIR, exist_ok=True)
+    start = time.perf_counter()
+    # the train and test matrices are memory-mapped once and read by every worker
+    with parallel_config(backend='loky', max_nbytes=MMAP_MIN_BYTES, mmap_mode='r', temp_folder=MMAP_DIR):
+        search.fit(X_train, y_train)
+        records = trial_records(search, X_test, y_test)
+    print(f"Searched {len(records)} candidates in {time.perf_counter() - start:.1f}s")
+
+    best_score = search.best_score_
+    log_trials(search, records, best_score)
+
+    # Print the results for verification
+    for record in records:
+        print(record['params'], {name: round(float(value), 4) for name, value in record['metrics'].items()})
+    print(f"Best Params: {search.best_params_}")
+    print(f"Best F1 Score: {best_score}")
 
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        model_path = os.path.join(tmp_dir, "model")
-        mlflow.sklearn.save_model(grid_search.best_estimator_, model_path)
-        mlflow.log_artifacts(model_path, "model")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+# scaling of the sharded CountVectorizer fit and transform from 1 to N worker processes
+
+import os
+import sys
+import time
+import logging
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sklearn.feature_extraction.text import CountVectorizer
+from src.features.feature_engineering import load_data, load_params, sharded_fit_transform
+
+
+def benchmark_bow_scaling(scale=20, max_jobs=None, params_path='params.yaml'):
+    logging.getLogger('feature_engineering').setLevel('WARNING')
+    params = load_params(params_path)
+    train_data, test_data = load_data()
+    X_train = np.concatenate([train_data['content'].values] * scale)
+    X_test = test_data['content'].values
+    max_jobs = max_jobs or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    serial = CountVectorizer(max_features=params['max_features'])
+    serial.fit_transform(X_train)
+    serial.transform(X_test)
+    serial_time = time.perf_counter() - start
+
+    print(f"{len(X_train)} training rows, max_features={params['max_features']}, chunksize={params['chunksize']}")
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+    print(f"{'serial':>8} {serial_time:>8.2f} {1.0:>7.2f}x")
+    for n_jobs in range(1, max_jobs + 1):
+        vectorizer = CountVectorizer(max_features=params['max_features'])
+        start = time.perf_counter()
+        sharded_fit_transform(vectorizer, X_train, X_test, n_jobs, params['chunksize'])
+        elapsed = time.perf_counter() - start
+        if vectorizer.vocabulary_ != serial.vocabulary_:
+            raise AssertionError(f"Sharded vocabulary differs from the serial fit with {n_jobs} workers")
+        print(f"{n_jobs:>8} {elapsed:>8.2f} {serial_time / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    benchmark_bow_scaling(max_jobs=int(sys.argv[1]) if len(sys.argv) > 1 else None)
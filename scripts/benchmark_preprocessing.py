@@ -0,0 +1,44 @@
+# benchmark the apply and vectorized preprocessing engines
+
+import os
+import sys
+import time
+import logging
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.storage import load_storage_params, read_table
+from sentiment_serving.text_normalizer import normalize_text, normalize_text_vectorized
+
+
+def time_normalizer(normalizer, df):
+    start = time.perf_counter()
+    result = normalizer(df.copy())
+    return time.perf_counter() - start, result
+
+
+def benchmark_preprocessing(data_path='data/dedup', scales=(1, 10, 100), params_path='params.yaml'):
+    logging.getLogger('data_Preprocessing').setLevel('WARNING')
+    # the data_preprocessing stage's own input, in the configured storage format
+    data = read_table(data_path, 'train', load_storage_params(params_path))
+
+    # load NLTK resources and build the regex patterns outside of the timings
+    sample = data.head(100)
+    normalize_text(sample.copy())
+    normalize_text_vectorized(sample.copy())
+
+    print(f"{'scale':>6} {'rows':>10} {'apply (s)':>10} {'vectorized (s)':>15} {'speedup':>8}")
+    for scale in scales:
+        df = pd.concat([data] * scale, ignore_index=True)
+        apply_time, expected = time_normalizer(normalize_text, df)
+        vectorized_time, result = time_normalizer(normalize_text_vectorized, df)
+        # the vectorized engine keeps string[pyarrow] columns, the apply engine returns objects
+        if result.content.astype(object).fillna('').tolist() != expected.content.astype(object).fillna('').tolist():
+            raise AssertionError(f"Engines disagree at {scale}x the corpus")
+        print(f"{scale:>5}x {len(df):>10} {apply_time:>10.2f} {vectorized_time:>15.2f} "
+              f"{apply_time / vectorized_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark_preprocessing()
@@ -0,0 +1,50 @@
+# compare stage I/O time and disk footprint of the csv and parquet storage formats
+
+import os
+import sys
+import time
+import logging
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.storage import load_storage_params, read_table, table_path, write_table
+
+STAGE_TABLES = [
+    ('data/raw', 'train'),
+    ('data/raw', 'test'),
+    ('data/interim', 'train_processed'),
+    ('data/interim', 'test_processed'),
+]
+
+
+def benchmark_storage(params_path='params.yaml', repeat=5):
+    logging.getLogger('storage').setLevel('WARNING')
+    configured = load_storage_params(params_path)
+    formats = {
+        'csv': {'format': 'csv'},
+        'parquet': {'format': 'parquet', 'compression': configured.get('compression', 'zstd')},
+    }
+
+    print(f"{'table':<30} {'format':<8} {'size (KiB)':>11} {'write (ms)':>11} {'read (ms)':>10}")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for directory, name in STAGE_TABLES:
+            df = read_table(directory, name, configured)
+            for format_name, storage in formats.items():
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    write_table(df, tmp_dir, name, storage)
+                write_ms = (time.perf_counter() - start) / repeat * 1000
+
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    read_table(tmp_dir, name, storage)
+                read_ms = (time.perf_counter() - start) / repeat * 1000
+
+                size_kib = os.path.getsize(table_path(tmp_dir, name, storage)) / 1024
+                print(f"{directory + '/' + name:<30} {format_name:<8} {size_kib:>11.1f} {write_ms:>11.1f} "
+                      f"{read_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    benchmark_storage()
@@ -0,0 +1,45 @@
+# microbenchmarks of preprocessing, vectorizing, scoring and /predict against a stored baseline
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.benchmarks.suite import compare, load_params, load_report, run_suite, save_report
+
+
+def benchmark_suite(params_path='params.yaml', update_baseline=False):
+    """Run the suite and compare it with the baseline; returns False when a case regresses beyond the tolerance"""
+    params = load_params(params_path)
+    bench = params['benchmarks']
+    with tempfile.TemporaryDirectory() as workdir:
+        report = run_suite(params, workdir)
+
+    if update_baseline or not os.path.exists(bench['baseline']):
+        save_report(report, bench['baseline'])
+        print(f"Baseline written to {bench['baseline']}")
+        return True
+
+    baseline = load_report(bench['baseline'])
+    report['baseline'] = bench['baseline']
+    report['tolerance'] = bench['tolerance']
+    report['checks'] = compare(baseline, report, bench['tolerance'], bench['slack_ms'])
+    report['passed'] = all(check['passed'] for check in report['checks'])
+    save_report(report, bench['report'])
+
+    print(f"{'case':<45} {'baseline (ms)':>14} {'current (ms)':>13} {'scaled (ms)':>12} {'change':>8}")
+    for check in report['checks']:
+        if check['baseline_ms'] is None:
+            print(f"{check['case']:<45} {'-':>14} {check['current_ms']:>13.4f} {check['scaled_ms']:>12.4f} {'new':>8}")
+            continue
+        change = check['scaled_ms'] / check['baseline_ms'] - 1
+        print(f"{check['case']:<45} {check['baseline_ms']:>14.4f} {check['current_ms']:>13.4f} "
+              f"{check['scaled_ms']:>12.4f} {change:>+7.0%}"
+              f"{'' if check['passed'] else '  REGRESSION'}")
+    return report['passed']
+
+
+if __name__ == "__main__":
+    if not benchmark_suite(update_baseline='--update-baseline' in sys.argv[1:]):
+        sys.exit(1)
@@ -0,0 +1,90 @@
+# wall time and peak memory of the batch and minibatch trainers, each measured in a fresh process
+
+import os
+import sys
+import copy
+import json
+import time
+import queue
+import logging
+import resource
+import multiprocessing
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_trainer(trainer, scale, queue):
+    import scipy.sparse
+    import numpy as np
+    from src.data.storage import load_sparse_features
+    from src.model.model_building import load_params, train_model
+    from src.model.model_evaluation import evaluate_model
+
+    for name in ('model_training', 'model_evaluation', 'storage'):
+        logging.getLogger(name).setLevel('WARNING')
+    model_params = copy.deepcopy(load_params())
+    model_params['trainer'] = trainer
+    X_train, y_train = load_sparse_features('data/processed', 'train_bow')
+    X_test, y_test = load_sparse_features('data/processed', 'test_bow')
+    X_train = scipy.sparse.vstack([X_train] * scale, format='csr')
+    y_train = np.concatenate([y_train] * scale)
+    loaded_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    clf = train_model(X_train, y_train, model_params)
+    train_seconds = time.perf_counter() - start
+    queue.put({
+        **evaluate_model(clf, X_test, y_test),
+        'train_rows': X_train.shape[0],
+        'train_seconds': round(train_seconds, 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'training_rss_mb': round(peak_rss_mb() - loaded_mb, 1),
+    })
+
+
+def trainer_result(trainer, scale, timeout):
+    """run_trainer's result from a spawned process, failing if it exits without one or runs past timeout seconds"""
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_trainer, args=(trainer, scale, results))
+    process.start()
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            # checked before the get: a result put before the exit is already in the queue
+            exited = process.exitcode is not None
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                if exited:
+                    raise RuntimeError(f"{trainer} trainer exited with code {process.exitcode} without a result")
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"{trainer} trainer did not finish within {timeout}s")
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def benchmark_trainers(scale=1, report_path='reports/trainer_comparison.json', timeout=3600):
+    results = {trainer: trainer_result(trainer, scale, timeout) for trainer in ('batch', 'minibatch')}
+
+    print(f"{'trainer':<10} {'rows':>8} {'accuracy':>9} {'auc':>7} {'train (s)':>10} {'peak RSS (MB)':>14} "
+          f"{'training RSS (MB)':>18}")
+    for trainer, result in results.items():
+        print(f"{trainer:<10} {result['train_rows']:>8} {result['accuracy']:>9.4f} {result['auc']:>7.4f} "
+              f"{result['train_seconds']:>10.3f} {result['peak_rss_mb']:>14.1f} {result['training_rss_mb']:>18.1f}")
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, 'w') as file:
+        json.dump(results, file, indent=4)
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_trainers(scale=int(sys.argv[1]) if len(sys.argv) > 1 else 1)
@@ -0,0 +1,62 @@
+# compare the bow and hashing feature modes: quality from model_evaluation, vectorize time and artifact size
+
+import os
+import sys
+import copy
+import json
+import time
+import pickle
+import logging
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.features.feature_engineering import build_features, load_data, load_params
+from src.model.model_building import load_params as load_model_params, train_model
+from src.model.model_evaluation import evaluate_model
+
+
+def benchmark_vectorizers(params_path='params.yaml', report_path='reports/vectorizer_comparison.json'):
+    for name in ('feature_engineering', 'model_training', 'model_evaluation', 'storage'):
+        logging.getLogger(name).setLevel('WARNING')
+    train_data, test_data = load_data()
+    params = load_params(params_path)
+    model_params = load_model_params()
+
+    results = {}
+    for mode in ('bow', 'hashing'):
+        mode_params = copy.deepcopy(params)
+        mode_params['vectorizer'] = mode
+
+        start = time.perf_counter()
+        X_train, y_train, X_test, y_test, vectorizer = build_features(train_data, test_data, mode_params, None)
+        vectorize_seconds = time.perf_counter() - start
+
+        clf = train_model(X_train, y_train, model_params)
+        metrics = evaluate_model(clf, X_test, y_test)
+        results[mode] = {
+            **metrics,
+            'n_features': X_train.shape[1],
+            'vectorize_seconds': round(vectorize_seconds, 3),
+            'vectorizer_bytes': len(pickle.dumps(vectorizer)),
+            # one coefficient per column, hashing trades the vocabulary for a wider model
+            'model_bytes': len(pickle.dumps(clf)),
+        }
+
+    print(f"{'mode':<8} {'accuracy':>9} {'auc':>7} {'features':>9} {'vectorize (s)':>14} {'vectorizer (B)':>15} "
+          f"{'model (B)':>10}")
+    for mode, result in results.items():
+        print(f"{mode:<8} {result['accuracy']:>9.4f} {result['auc']:>7.4f} {result['n_features']:>9} "
+              f"{result['vectorize_seconds']:>14.3f} {result['vectorizer_bytes']:>15} {result['model_bytes']:>10}")
+    results['delta'] = {
+        metric: results['hashing'][metric] - results['bow'][metric]
+        for metric in ('accuracy', 'precision', 'recall', 'auc')
+    }
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, 'w') as file:
+        json.dump(results, file, indent=4)
+    return results
+
+
+if __name__ == "__main__":
+    benchmark_vectorizers()
@@ -1,46 +1,63 @@
 # promote model
 
 import os
-import mlflow
+import sys
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.storage import load_storage_params, read_table
+from src.model.promotion_gate import load_params, log_report, run_gate, save_report
+from src.tracking.backend import configure_tracking
+from src.tracking.registry import get_registry
+
+def check_candidate(registry, model_name, prod_version, staging_version, params):
+    """Run the performance gate of Staging against Production and write its report to the Staging run"""
+    # the held-out tweets, raw, as the app receives them
+    test_df = read_table('data/dedup', 'test', load_storage_params('params.yaml'))
+    report = run_gate(
+        model_name, prod_version, staging_version,
+        test_df['content'].tolist(), test_df['sentiment'].values, params,
+    )
+    save_report(report, 'reports/promotion_gate.json')
+    run_id = registry.client.get_model_version(model_name, staging_version).run_id
+    log_report(registry.client, run_id, report)
+    return report
 
 def promote_model():
-    # Set up DagsHub credentials for MLflow tracking
-    dagshub_token = os.getenv("DAGSHUB_PAT")
-    if not dagshub_token:
-        raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
-
-    os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
-    os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
-
-    dagshub_url = "https://dagshub.com"
-    repo_owner = 'shahriar0999'
-    repo_name = 'mlops-small-project'
+    configure_tracking()
 
-    # Set up MLflow tracking URI
-    mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
-
-    client = mlflow.MlflowClient()
+    registry = get_registry()
 
     model_name = "own_model"
     # Get the latest version in staging
-    latest_version_staging = client.get_latest_versions(model_name, stages=["Staging"])[0].version
-
-    # Archive the current production model
-    prod_versions = client.get_latest_versions(model_name, stages=["Production"])
-    for version in prod_versions:
-        client.transition_model_version_stage(
-            name=model_name,
-            version=version.version,
-            stage="Archived"
-        )
+    latest_version_staging = registry.latest_version(model_name, "Staging")
+    if latest_version_staging is None:
+        raise LookupError(f"No Staging version of {model_name} to promote")
+
+    params = load_params('params.yaml')
+    prod_version = registry.latest_version(model_name, "Production")
+    if prod_version is not None:
+        if params['enabled']:
+            report = check_candidate(registry, model_name, prod_version, latest_version_staging, params)
+            if 'error' in report:
+                print(f"Model version {latest_version_staging} not promoted, "
+                      f"the performance gate failed: {report['error']}")
+                return False
+            if not report['passed']:
+                failed = [check['metric'] for check in report['checks'] if not check['passed']]
+                print(f"Model version {latest_version_staging} not promoted, it regresses on {', '.join(failed)} "
+                      f"against Production version {prod_version}")
+                return False
+
+        # Archive the current production model
+        registry.transition(model_name, prod_version, "Archived")
 
     # Promote the new model to production
-    client.transition_model_version_stage(
-        name=model_name,
-        version=latest_version_staging,
-        stage="Production"
-    )
+    registry.transition(model_name, latest_version_staging, "Production")
     print(f"Model version {latest_version_staging} promoted to Production")
+    return True
 
 if __name__ == "__main__":
-    promote_model()
\ No newline at end of file
+    if not promote_model():
+        sys.exit(1)
@@ -0,0 +1,2 @@
+# the code the served model runs, shipped with every logged model under this package name so the
+# copy a model was logged with is the one that loads it, whatever src the loading process has
@@ -0,0 +1,61 @@
+import json
+import pickle
+import logging
+from functools import partial
+import numpy as np
+import pandas as pd
+import mlflow
+
+# shipped with the logged model and imported by the server: no handlers or other import-time
+# side effects here, the pipeline modules that import it configure the logging
+logger = logging.getLogger('pyfunc_model')
+
+# raw text the signature and input example are built from
+INPUT_EXAMPLE = ["I love this!", "this is the worst day ever"]
+
+
+def to_texts(model_input) -> list:
+    """Raw text batch as a list of strings, from a string, a list, a Series or a one-column DataFrame"""
+    if isinstance(model_input, str):
+        return [model_input]
+    if isinstance(model_input, pd.DataFrame):
+        column = 'text' if 'text' in model_input.columns else model_input.columns[0]
+        return model_input[column].tolist()
+    return list(model_input)
+
+
+class SentimentModel(mlflow.pyfunc.PythonModel):
+    """Normalizer, vectorizer and classifier as one pyfunc that takes raw text"""
+
+    def load_context(self, context):
+        from sentiment_serving import text_normalizer
+
+        with open(context.artifacts['normalizer'], 'r') as file:
+            self.normalizer_config = json.load(file)
+        if self.normalizer_config['version'] != text_normalizer.NORMALIZER_VERSION:
+            logger.warning(
+                f"Model was trained with normalizer version {self.normalizer_config['version']}, "
+                f"the bundled code is version {text_normalizer.NORMALIZER_VERSION}"
+            )
+        text_normalizer.ensure_nltk_data()
+        # short texts are dropped from the training data, but a short request still gets its own prediction
+        self.normalizer = partial(text_normalizer.get_normalizer(self.normalizer_config['engine']), drop_short=False)
+        with open(context.artifacts['vectorizer'], 'rb') as file:
+            self.vectorizer = pickle.load(file)
+        with open(context.artifacts['classifier'], 'rb') as file:
+            self.classifier = pickle.load(file)
+        # build the regex patterns and load the NLTK data now, not on the first request
+        self.transform(INPUT_EXAMPLE)
+
+    def transform(self, model_input):
+        """Sparse feature matrix for a raw text batch, normalized as in data_preprocessing but keeping short texts"""
+        df = pd.DataFrame({'content': pd.Series(to_texts(model_input), dtype=object)})
+        content = self.normalizer(df).content.fillna('')
+        return self.vectorizer.transform(content.values)
+
+    def predict_proba(self, model_input) -> np.ndarray:
+        """Probability of the positive (happiness) class per text"""
+        return self.classifier.predict_proba(self.transform(model_input))[:, 1]
+
+    def predict(self, context, model_input, params=None):
+        return self.classifier.predict(self.transform(model_input))
@@ -0,0 +1,228 @@
+import re
+import sys
+import nltk
+import logging
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from functools import lru_cache
+from nltk.corpus import stopwords
+from nltk.stem import WordNetLemmatizer
+
+# the text normalization shared by data_preprocessing and the served pyfunc, which ships this
+# package alone: importing it must not download data, open log files or pull in the pipeline
+logger = logging.getLogger('data_Preprocessing')
+
+# bump whenever a normalization step changes its output, this invalidates the preprocessing cache
+NORMALIZER_VERSION = '1'
+
+PUNCTUATION_PATTERN = '[%s]' % re.escape(r"""!"#$%&'()*+,،-./:;<=>؟?@[\]^_`{|}~""")
+URL_PATTERN = re.compile(r'https?://\S+|www\.\S+')
+
+def ensure_nltk_data():
+    """Download the NLTK corpora the normalizer reads, unless they are installed already"""
+    for resource in ('wordnet', 'stopwords'):
+        try:
+            nltk.data.find(f'corpora/{resource}')
+        except LookupError:
+            nltk.download(resource, quiet=True)
+
+@lru_cache(maxsize=None)
+def get_stop_words():
+    """Load the english stop words once per process"""
+    return frozenset(stopwords.words("english"))
+
+@lru_cache(maxsize=None)
+def get_lemmatizer():
+    """Create the lemmatizer once per process"""
+    return WordNetLemmatizer()
+
+@lru_cache(maxsize=None)
+def lemmatize_token(token):
+    """Lemmatize a single token, memoized across rows and frames"""
+    return get_lemmatizer().lemmatize(token)
+
+def lemmatization(text):
+    try:
+        lemmatizer= get_lemmatizer()
+        text = text.split()
+        text=[lemmatizer.lemmatize(y) for y in text]
+        return " " .join(text)
+    except Exception as e:
+        logger.error(f"Error in lemmatization: {e}")
+        raise
+
+def remove_stop_words(text):
+    try:
+        stop_words = get_stop_words()
+        Text=[i for i in str(text).split() if i not in stop_words]
+        return " ".join(Text)
+    except Exception as e:
+        logger.error(f"Error in removing stop words: {e}")
+        raise
+
+def removing_numbers(text):
+    try:
+        text=''.join([i for i in text if not i.isdigit()])
+        return text
+    except Exception as e:
+        logger.error(f"Error in removing numbers: {e}")
+        raise
+
+def lower_case(text):
+    try:
+        text = text.split()
+        text=[y.lower() for y in text]
+        return " " .join(text)
+    except Exception as e:
+        logger.error(f"Error in converting to lower case: {e}")
+        raise
+
+def removing_punctuations(text):
+    try:
+        ## Remove punctuations
+        text = re.sub(PUNCTUATION_PATTERN, ' ', text)
+        text = text.replace('؛',"", )
+
+        ## remove extra whitespace
+        text = re.sub(r'\s+', ' ', text)
+        text =  " ".join(text.split())
+        return text.strip()
+    except Exception as e:
+        logger.error(f"Error in removing punctuations: {e}")
+        raise
+
+def removing_urls(text):
+    try:
+        return URL_PATTERN.sub(r'', text)
+    except Exception as e:
+        logger.error(f"Error in removing urls: {e}")
+        raise
+
+
+def remove_small_sentences(text):
+    """Remove sentences with less than 3 words"""
+    try:
+        if len(str(text).split()) < 3:
+            return np.nan
+        return text
+    except Exception as e:
+        logger.error(f"Error in removing small sentences: {e}")
+        return text
+    
+def normalize_text(df, drop_short=True):
+    """Every normalization step on df.content; drop_short=False keeps texts under 3 words, as serving does"""
+    try:
+        logger.info("Starting text normalization")
+        df.content=df.content.apply(lambda content : lower_case(content))
+        logger.debug("Converted text to lower case")
+        df.content=df.content.apply(lambda content : remove_stop_words(content))
+        logger.debug("Removed stop words")
+        df.content=df.content.apply(lambda content : removing_numbers(content))
+        logger.debug("Removed numbers")
+        df.content=df.content.apply(lambda content : removing_punctuations(content))
+        logger.debug("Removed punctuations")
+        df.content=df.content.apply(lambda content : removing_urls(content))
+        logger.debug("Removed urls")
+        df.content=df.content.apply(lambda content : lemmatization(content))
+        logger.debug("Applied lemmatization")
+        if drop_short:
+            df.content=df.content.apply(lambda content : remove_small_sentences(content))
+            logger.debug("Removed small sentences")
+        return df
+    except Exception as e:
+        logger.error(f"Error in text normalization: {str(e)}")
+        return df
+
+def get_character_class(predicate):
+    """Regex character class of every code point satisfying predicate.
+
+    Spelled out with literal characters so that it means the same thing to
+    Python's re and to RE2, which pyarrow uses for string[pyarrow] columns.
+    """
+    return '[%s]' % ''.join(chr(codepoint) for codepoint in range(sys.maxunicode + 1) if predicate(chr(codepoint)))
+
+@lru_cache(maxsize=None)
+def get_whitespace_pattern():
+    """Whitespace that is not already a single space, per str.split()'s definition"""
+    # lone spaces are left alone, rewriting every one of them is most of the cost
+    return '%s{2,}|%s' % (
+        get_character_class(str.isspace), get_character_class(lambda char: char.isspace() and char != ' ')
+    )
+
+@lru_cache(maxsize=None)
+def get_digit_pattern():
+    """Characters removed by removing_numbers, i.e. str.isdigit()"""
+    return get_character_class(str.isdigit)
+
+@lru_cache(maxsize=None)
+def get_stop_words_pattern():
+    """A stop word padded by single spaces on both sides"""
+    return ' (?:%s) ' % '|'.join(re.escape(word) for word in sorted(get_stop_words()))
+
+def squeeze_spaces(content):
+    """Collapse runs of spaces and trim them, the column-wise " ".join(text.split())"""
+    return content.str.replace(' {2,}', ' ', regex=True).str.strip(' ')
+
+def normalize_text_vectorized(df, drop_short=True):
+    """Column-wise equivalent of normalize_text on a string[pyarrow] column.
+
+    Every step except lemmatization is a regex or string kernel over the whole
+    column. Lemmatization runs once per distinct token and is mapped back onto
+    the tokens with pyarrow compute.
+    """
+    try:
+        logger.info("Starting vectorized text normalization")
+        content_dtype = df.content.dtype
+        # str.lower on python strings keeps the full unicode case mapping of lower_case
+        content = df.content.astype(object).str.lower().astype('string[pyarrow]')
+        content = content.str.replace(get_whitespace_pattern(), ' ', regex=True).str.strip(' ')
+        logger.debug("Converted text to lower case")
+        # double the separators so that neighbouring stop words each keep their own padding
+        content = ' ' + content.str.replace(' ', '  ', regex=False) + ' '
+        content = squeeze_spaces(content.str.replace(get_stop_words_pattern(), ' ', regex=True))
+        logger.debug("Removed stop words")
+        content = content.str.replace(get_digit_pattern(), '', regex=True)
+        logger.debug("Removed numbers")
+        content = content.str.replace(PUNCTUATION_PATTERN, ' ', regex=True).str.replace('؛', '', regex=False)
+        content = squeeze_spaces(content)
+        logger.debug("Removed punctuations")
+        content = squeeze_spaces(content.str.replace(URL_PATTERN.pattern, '', regex=True))
+        logger.debug("Removed urls")
+
+        tokens = pc.ascii_split_whitespace(pa.array(content))
+        words = pc.list_flatten(tokens)
+        vocabulary = pc.unique(words)
+        lemmas = pa.array(
+            [lemmatize_token(word) if word else word for word in vocabulary.to_pylist()], type=pa.string()
+        )
+        lemmatized = pa.ListArray.from_arrays(
+            tokens.offsets, lemmas.take(pc.index_in(words, value_set=vocabulary)), mask=tokens.is_null()
+        )
+        joined = pc.binary_join(lemmatized, ' ').to_numpy(zero_copy_only=False)
+        content = pd.Series(joined, index=df.index, dtype=object)
+        logger.debug("Applied lemmatization")
+        if drop_short:
+            # '' splits into a single empty token, which is below the threshold either way
+            word_counts = pd.Series(pc.list_value_length(tokens).to_numpy(zero_copy_only=False), index=df.index)
+            content = content.where(word_counts >= 3, np.nan)
+            logger.debug("Removed small sentences")
+
+        df.content = content if content_dtype == object else content.astype(content_dtype)
+        return df
+    except Exception as e:
+        logger.error(f"Error in vectorized text normalization: {str(e)}")
+        raise
+
+NORMALIZERS = {
+    'apply': normalize_text,
+    'vectorized': normalize_text_vectorized,
+}
+
+def get_normalizer(engine):
+    try:
+        return NORMALIZERS[engine]
+    except KeyError:
+        logger.error(f"Unknown preprocessing engine '{engine}', expected one of {list(NORMALIZERS)}")
+        raise
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+# small vocabularies the tweets are drawn from; every normalizer step has something to do on them
+POSITIVE_WORDS = ['love', 'happy', 'great', 'awesome', 'smiling', 'loved', 'fun', 'best', 'laughing', 'sunshine',
+                  'friends', 'enjoying', 'wonderful', 'thanks', 'excited', 'birthday', 'beautiful', 'cute']
+NEGATIVE_WORDS = ['sad', 'miss', 'hate', 'tired', 'crying', 'worst', 'sick', 'lonely', 'missed', 'hurts',
+                  'bored', 'broken', 'sorry', 'upset', 'raining', 'lost', 'headache', 'exams']
+NEUTRAL_WORDS = ['today', 'work', 'tonight', 'going', 'home', 'school', 'weekend', 'movie', 'music', 'phone',
+                 'morning', 'dinner', 'coffee', 'watching', 'days', 'night', 'game', 'train', 'class', 'dogs']
+STOP_WORDS = ['i', 'the', 'and', 'to', 'a', 'is', 'my', 'it', 'so', 'for', 'in', 'of', 'me', 'this', 'at', 'was']
+DECORATIONS = ['!', '!!', '?', '...', ',', ':)', ':(', '#', '&amp;', '-', '"']
+
+
+def generate_tweets(n_docs: int, seed: int) -> pd.DataFrame:
+    """Seeded tweet-like corpus with 'content' and a 0/1 'sentiment', identical for the same n_docs and seed.
+
+    Texts have 5 to 30 tokens mixing sentiment words, stop words, mixed case,
+    numbers, punctuation, mentions and URLs, like the raw tweets the app receives.
+    """
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, 2, size=n_docs)
+    lengths = rng.integers(5, 31, size=n_docs)
+    texts = []
+    for label, length in zip(labels, lengths):
+        sentiment_words = POSITIVE_WORDS if label else NEGATIVE_WORDS
+        tokens = []
+        for kind in rng.choice(6, size=length, p=[0.25, 0.3, 0.3, 0.05, 0.05, 0.05]):
+            if kind == 0:
+                token = sentiment_words[rng.integers(len(sentiment_words))]
+            elif kind == 1:
+                token = NEUTRAL_WORDS[rng.integers(len(NEUTRAL_WORDS))]
+            elif kind == 2:
+                token = STOP_WORDS[rng.integers(len(STOP_WORDS))]
+            elif kind == 3:
+                token = str(rng.integers(1, 2030))
+            elif kind == 4:
+                token = f"@user{rng.integers(1000)}"
+            else:
+                token = f"http://t.co/{rng.integers(10 ** 6):x}"
+            if rng.random() < 0.15:
+                token = token.capitalize() if rng.random() < 0.7 else token.upper()
+            if rng.random() < 0.2:
+                token += DECORATIONS[rng.integers(len(DECORATIONS))]
+            tokens.append(token)
+        texts.append(' '.join(tokens))
+    return pd.DataFrame({'content': texts, 'sentiment': labels})
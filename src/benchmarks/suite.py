@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import yaml
+import pickle
+import timeit
+import logging
+import platform
+import statistics
+import numpy as np
+
+from src.benchmarks.corpus import generate_tweets
+
+# logging configure
+
+logger = logging.getLogger('benchmarks')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# stage loggers that would otherwise log on every timed call
+QUIET_LOGGERS = [
+    'data_Preprocessing', 'feature_engineering', 'model_training', 'pyfunc_model', 'tracking_backend', 'registry',
+]
+
+def load_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('benchmark parameters retrieved')
+        return params
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
+
+def calibration():
+    """Fixed pure-python and numpy work, timed with the cases so the comparison can factor out the machine's speed"""
+    words = [str(number) for number in range(2000)]
+    sorted(word[::-1] for word in words)
+    np.sort(np.arange(20000)[::-1])
+
+
+def loop_count(timer, min_seconds: float) -> int:
+    """Calls per loop, doubled until one loop takes min_seconds"""
+    number = 1
+    while timer.timeit(number) < min_seconds:
+        number *= 2
+    return number
+
+
+def time_cases(cases: dict, repeat: int, min_seconds: float) -> dict:
+    """Milliseconds per call of every case, with the repeats of all cases interleaved.
+
+    Round-robin repeats spread any slow period of the machine over every case
+    instead of one; the best loop is the least disturbed and is the one compared.
+    """
+    timers = {name: timeit.Timer(func) for name, func in cases.items()}
+    numbers = {name: loop_count(timer, min_seconds) for name, timer in timers.items()}
+    times = {name: [] for name in cases}
+    for _ in range(repeat):
+        for name, timer in timers.items():
+            times[name].append(timer.timeit(numbers[name]) / numbers[name] * 1000)
+    return {
+        name: {'best_ms': min(values), 'median_ms': statistics.median(values), 'number': numbers[name]}
+        for name, values in times.items()
+    }
+
+
+def build_model(corpus, params: dict, workdir: str):
+    """Normalizer, vectorizer and classifier fitted on the corpus as the pipeline fits them.
+
+    They are saved as a pyfunc in workdir.
+    """
+    from sentiment_serving.text_normalizer import get_normalizer
+    from src.features.feature_engineering import build_features
+    from src.model.model_building import train_model
+    from src.model.pyfunc_model import save_sentiment_model
+
+    engine = params['data_preprocessing']['engine']
+    normalized = get_normalizer(engine)(corpus.copy())
+    # one process, the corpus is far below the shard size anyway
+    feature_params = {**params['feature_engineering'], 'n_jobs': 1}
+    vectorizer_path = os.path.join(workdir, 'vectorizer.pkl')
+    X_train, y_train, _, _, vectorizer = build_features(normalized, normalized.head(1), feature_params, vectorizer_path)
+    classifier = train_model(X_train, y_train, params['model_building'])
+    classifier_path = os.path.join(workdir, 'model.pkl')
+    with open(classifier_path, 'wb') as file:
+        pickle.dump(classifier, file)
+
+    model_path = os.path.join(workdir, 'pyfunc')
+    save_sentiment_model(model_path, classifier_path, vectorizer_path, engine)
+    return normalized['content'].fillna('').tolist(), vectorizer, classifier, model_path
+
+
+def preprocessing_cases(corpus) -> dict:
+    """Every normalizer step on the output of the step before it, as normalize_text chains them, and both engines"""
+    from sentiment_serving import text_normalizer
+
+    steps = ['lower_case', 'remove_stop_words', 'removing_numbers', 'removing_punctuations',
+             'removing_urls', 'lemmatization', 'remove_small_sentences']
+    cases = {}
+    texts = corpus['content'].tolist()
+    for name in steps:
+        step = getattr(text_normalizer, name)
+        cases[f"preprocessing.{name}"] = lambda step=step, texts=texts: [step(text) for text in texts]
+        texts = [step(text) for text in texts]
+        # dropped sentences are nan from here on, the later steps never see them in normalize_text either
+        texts = [text for text in texts if isinstance(text, str)]
+    for name in ('normalize_text', 'normalize_text_vectorized'):
+        normalizer = getattr(text_normalizer, name)
+        cases[f"preprocessing.{name}"] = lambda normalizer=normalizer: normalizer(corpus.copy())
+    return cases
+
+
+def scoring_cases(texts: list, vectorizer, classifier, batch_size: int) -> dict:
+    """Vectorizer transform and classifier scoring on one row and on one batch"""
+    X = vectorizer.transform(texts[:batch_size])
+    # sliced once, slicing a sparse matrix costs more than scoring one row
+    X_single = X[:1]
+    return {
+        'vectorizer.transform_single': lambda: vectorizer.transform(texts[:1]),
+        'vectorizer.transform_batch': lambda: vectorizer.transform(texts[:batch_size]),
+        'model.predict_proba_single': lambda: classifier.predict_proba(X_single),
+        'model.predict_proba_batch': lambda: classifier.predict_proba(X),
+    }
+
+
+def app_cases(model_path: str, text: str) -> dict:
+    """POST /predict through the Flask test client, against the pyfunc in model_path instead of the registry"""
+    os.environ['MODEL_URI'] = model_path
+    from apps.app import app
+
+    client = app.test_client()
+
+    def predict():
+        response = client.post('/predict', data={'text': text})
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict answered {response.status_code}")
+
+    return {'app.predict': predict}
+
+
+def run_suite(params: dict, workdir: str) -> dict:
+    """Time every case on the synthetic corpus, in milliseconds per call"""
+    bench = params['benchmarks']
+    corpus = generate_tweets(bench['n_docs'], bench['seed'])
+    texts, vectorizer, classifier, model_path = build_model(corpus, params, workdir)
+
+    cases = preprocessing_cases(corpus)
+    cases.update(scoring_cases(texts, vectorizer, classifier, bench['batch_size']))
+    cases.update(app_cases(model_path, corpus['content'].iloc[0]))
+    # after the app import: it imports src.tracking, whose loggers set their levels again
+    for name in QUIET_LOGGERS:
+        logging.getLogger(name).setLevel('WARNING')
+
+    results = time_cases({'calibration': calibration, **cases}, bench['repeat'], bench['min_seconds'])
+    for name, result in results.items():
+        logger.info(f"{name}: {result['best_ms']:.4f} ms (median {result['median_ms']:.4f} ms)")
+    return {
+        'environment': {'python': platform.python_version(), 'machine': platform.machine(), 'platform': sys.platform},
+        'n_docs': bench['n_docs'],
+        'batch_size': bench['batch_size'],
+        'cases': results,
+    }
+
+
+def compare(baseline: dict, current: dict, tolerance: float, slack_ms: float) -> list:
+    """One check per case.
+
+    The best time, scaled to the baseline's machine speed, may grow to baseline * (1 + tolerance) + slack_ms.
+    """
+    # the calibration ratio factors out a faster or slower machine, or a slower period of the same one
+    speed = baseline['cases']['calibration']['best_ms'] / current['cases']['calibration']['best_ms']
+    checks = []
+    for name, result in current['cases'].items():
+        if name == 'calibration':
+            continue
+        scaled_ms = result['best_ms'] * speed
+        if name not in baseline['cases']:
+            # a new case has nothing to regress against until the baseline is updated
+            checks.append({'case': name, 'baseline_ms': None, 'current_ms': result['best_ms'], 'scaled_ms': scaled_ms,
+                           'limit_ms': None, 'passed': True})
+            continue
+        baseline_ms = baseline['cases'][name]['best_ms']
+        limit = baseline_ms * (1 + tolerance) + slack_ms
+        checks.append({'case': name, 'baseline_ms': baseline_ms, 'current_ms': result['best_ms'],
+                       'scaled_ms': scaled_ms, 'limit_ms': limit, 'passed': scaled_ms <= limit})
+    return checks
+
+
+def load_report(file_path: str) -> dict:
+    with open(file_path, 'r') as file:
+        return json.load(file)
+
+
+def save_report(report: dict, file_path: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug(f"Benchmark report saved to {file_path}")
+    except Exception as e:
+        logger.error(f"Error saving the benchmark report: {str(e)}")
+        raise
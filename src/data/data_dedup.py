@@ -0,0 +1,257 @@
+import os
+import json
+import time
+import yaml
+import hashlib
+import logging
+import numpy as np
+import pandas as pd
+import scipy.sparse
+import scipy.sparse.csgraph
+from src.data.storage import load_storage_params, read_table, write_table
+from src.features.preprocessing_cache import PreprocessingCache
+
+# logging configure
+
+logger = logging.getLogger('data_dedup')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# documents signed per block, bounds the shingles x permutations matrix
+SIGNATURE_BLOCK = 2000
+
+
+def load_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        params = params['data_dedup']
+        if params['num_perm'] % params['bands']:
+            raise ValueError(f"num_perm ({params['num_perm']}) must be a multiple of bands ({params['bands']})")
+        logger.debug('dedup parameters retrieved')
+        return params
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
+
+def exact_keys(content: pd.Series) -> np.ndarray:
+    """Group id per row, rows with byte identical text share an id"""
+    digests = [hashlib.blake2b(str(text).encode('utf-8'), digest_size=16).digest() for text in content]
+    return pd.factorize(pd.Series(digests))[0]
+
+
+def normalize_for_shingles(text, size: int) -> bytes:
+    """Lowercase and squeeze whitespace, padding short texts so they still form one shingle"""
+    text = ' '.join(str(text).lower().split()).encode('utf-8')
+    return text.ljust(size)
+
+
+def shingle_hashes(texts: list, size: int):
+    """Hashes of the byte shingles of every text and the offset of each text's first shingle.
+
+    All texts of a block are hashed in one pass over their concatenated bytes, windows
+    that would cross from one text into the next are dropped.
+    """
+    encoded = [normalize_for_shingles(text, size) for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+    windows = np.lib.stride_tricks.sliding_window_view(data, size)
+    # polynomial hash of each window, uint64 arithmetic wraps which is fine for hashing
+    hashes = windows @ (np.uint64(257) ** np.arange(size, dtype=np.uint64))
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    valid = np.ones(len(windows), dtype=bool)
+    for boundary in range(1, size):
+        crossing = ends[:-1] - boundary
+        valid[crossing[crossing >= 0]] = False
+    hashes = hashes[valid]
+    offsets = starts - np.searchsorted(np.flatnonzero(~valid), starts)
+    return hashes, offsets
+
+
+def minhash_signatures(texts: list, size: int, num_perm: int, seed: int) -> np.ndarray:
+    """MinHash signature matrix (documents x num_perm), computed block by block"""
+    rng = np.random.default_rng(seed)
+    # multiply-shift hashing, (a * x + b) >> 32 with odd a, wraps in uint64 instead of taking a modulus
+    a = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)[:, None] | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)[:, None]
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    for start in range(0, len(texts), SIGNATURE_BLOCK):
+        block = texts[start:start + SIGNATURE_BLOCK]
+        hashes, offsets = shingle_hashes(block, size)
+        # permutations x shingles keeps the reduction over contiguous memory
+        permuted = ((a * hashes + b) >> np.uint64(32)).astype(np.uint32)
+        signatures[start:start + len(block)] = np.minimum.reduceat(permuted, offsets, axis=1).T
+    return signatures
+
+
+def near_duplicate_clusters(signatures: np.ndarray, bands: int, threshold: float) -> np.ndarray:
+    """Cluster id per document (its lowest index) from LSH banding over MinHash signatures.
+
+    Documents that share a band bucket are candidates. A candidate is linked to the
+    bucket's first document when their estimated Jaccard similarity reaches threshold,
+    so every band costs a linear number of comparisons. Clusters are the connected
+    components of those links.
+    """
+    n, num_perm = signatures.shape
+    rows = num_perm // bands
+    heads, members = [], []
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        _, buckets = np.unique(block.view(np.dtype((np.void, block.dtype.itemsize * rows))), return_inverse=True)
+        order = np.argsort(buckets.ravel(), kind='stable')
+        sorted_buckets = buckets.ravel()[order]
+        first = np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]]
+        # every document points at the first document of its bucket
+        head = order[np.flatnonzero(first)[np.cumsum(first) - 1]]
+        candidates = ~first
+        heads.append(head[candidates])
+        members.append(order[candidates])
+    heads, members = np.concatenate(heads), np.concatenate(members)
+    pairs = np.unique(np.stack([heads, members], axis=1), axis=0)
+    similarity = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    pairs = pairs[similarity >= threshold]
+    graph = scipy.sparse.coo_matrix((np.ones(len(pairs), bool), (pairs[:, 0], pairs[:, 1])), shape=(n, n))
+    _, labels = scipy.sparse.csgraph.connected_components(graph, directed=False)
+    # name each component after its lowest document index
+    lowest = np.full(labels.max() + 1, n)
+    np.minimum.at(lowest, labels, np.arange(n))
+    return lowest[labels]
+
+
+def empty_report() -> dict:
+    keys = ['rows_in', 'rows_out', 'exact_duplicates_removed', 'near_duplicates_removed',
+            'train_removed', 'test_removed', 'clusters_split_across_sides']
+    return {**dict.fromkeys(keys, 0), 'dedup_seconds': 0.0}
+
+
+def deduplicate(train_data: pd.DataFrame, test_data: pd.DataFrame, params: dict):
+    """Drop exact and near duplicate rows across both splits.
+
+    Each duplicate cluster keeps only its first row in train-then-test order, so a
+    cluster always ends up on a single side and test never shares text with train.
+    """
+    try:
+        if len(train_data) + len(test_data) == 0:
+            logger.warning("No rows to deduplicate")
+            return train_data, test_data, empty_report()
+        combined = pd.concat([train_data, test_data], ignore_index=True)
+        is_train = np.r_[np.ones(len(train_data), bool), np.zeros(len(test_data), bool)]
+
+        start = time.perf_counter()
+        exact = exact_keys(combined['content'])
+        # near duplicate search only runs on one representative of each exact group
+        unique_rows = pd.Series(np.arange(len(combined))).groupby(exact).first().to_numpy()
+        signatures = minhash_signatures(
+            combined['content'].iloc[unique_rows].tolist(),
+            params['shingle_size'], params['num_perm'], params['seed'],
+        )
+        near = near_duplicate_clusters(signatures, params['bands'], params['threshold'])
+        cluster = unique_rows[near][exact]
+        keep = cluster == np.arange(len(combined))
+        elapsed = time.perf_counter() - start
+
+        exact_removed = len(combined) - len(unique_rows)
+        report = {
+            'rows_in': int(len(combined)),
+            'rows_out': int(keep.sum()),
+            'exact_duplicates_removed': int(exact_removed),
+            'near_duplicates_removed': int(len(combined) - keep.sum() - exact_removed),
+            'train_removed': int((~keep & is_train).sum()),
+            'test_removed': int((~keep & ~is_train).sum()),
+            # clusters that straddled the split before dedup, a source of train/test leakage
+            'clusters_split_across_sides': int(
+                pd.Series(is_train).groupby(cluster).nunique().gt(1).sum()
+            ),
+            'dedup_seconds': round(elapsed, 3),
+        }
+        logger.debug(f"Removed {report['exact_duplicates_removed']} exact and "
+                     f"{report['near_duplicates_removed']} near duplicates in {elapsed:.2f}s")
+        return combined[keep & is_train], combined[keep & ~is_train], report
+    except KeyError as e:
+        logger.error(f"Missing column {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error during dedup: {str(e)}")
+        raise
+
+
+def estimate_time_saved(report: dict, cache_path: str) -> float:
+    """Preprocessing seconds the removed rows would have cost, from the counters of the local preprocessing cache.
+
+    The counters depend on this machine's cache, so the estimate is only logged,
+    never written to the tracked report. None without a cache.
+    """
+    if not os.path.exists(cache_path):
+        return None
+    # the cost counters are shared by every normalizer version, so no version is needed to read them
+    with PreprocessingCache(cache_path, '', float('inf')) as cache:
+        if not cache.get_meta('normalized_texts', 0):
+            return None
+        return (report['rows_in'] - report['rows_out']) * cache.seconds_per_text()
+
+
+def complete_report(report: dict, cache_path: str) -> dict:
+    """Add the fraction of rows removed and log the machine-local estimate of the time it saves"""
+    report['fraction_removed'] = round((report['rows_in'] - report['rows_out']) / max(report['rows_in'], 1), 4)
+    seconds_saved = estimate_time_saved(report, cache_path)
+    if seconds_saved is not None:
+        logger.info(f"Removed rows save ~{seconds_saved:.2f}s of preprocessing "
+                    f"(machine-local estimate from {cache_path})")
+    return report
+
+
+def save_report(report: dict, file_path: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug(f"Dedup report saved to {file_path}")
+    except Exception as e:
+        logger.error(f"Error saving dedup report: {str(e)}")
+        raise
+
+
+def main():
+    try:
+        params = load_params(params_path='params.yaml')
+        storage = load_storage_params(params_path='params.yaml')
+        with open('params.yaml', 'r') as file:
+            cache_path = yaml.safe_load(file)['data_preprocessing']['cache']['path']
+
+        train_data = read_table('./data/raw', 'train', storage)
+        test_data = read_table('./data/raw', 'test', storage)
+
+        train_data, test_data, report = deduplicate(train_data, test_data, params)
+        complete_report(report, cache_path)
+
+        write_table(train_data, os.path.join('data', 'dedup'), 'train', storage)
+        write_table(test_data, os.path.join('data', 'dedup'), 'test', storage)
+        save_report(report, 'reports/dedup.json')
+        logger.info("Dedup completed successfully")
+    except Exception as e:
+        logger.error(f"Failed to complete the dedup process: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    main()
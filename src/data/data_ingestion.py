@@ -1,8 +1,15 @@
 import numpy as np
 import pandas as pd
 import os
+import glob
+import shutil
+import hashlib
+import tempfile
+import urllib.request
+from urllib.parse import urlparse
 from sklearn.model_selection import train_test_split
 import yaml
+from src.data.storage import load_storage_params, write_table
 
 import logging
 
@@ -24,13 +31,18 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
-def load_params(params_path: str) -> float:
+# only these columns are parsed, tweet_id is never materialized
+USECOLS = ['sentiment', 'content']
+SENTIMENTS = {'happiness': 1, 'sadness': 0}
+SHARD_PATTERNS = ('*.csv', '*.csv.gz', '*.csv.bz2', '*.csv.zst')
+
+def load_params(params_path: str) -> dict:
     try:
         with open(params_path, 'r') as file:
             params = yaml.safe_load(file)
-        test_size = params['data_ingestion']['test_size']
-        logger.debug('test size retrieved')
-        return test_size
+        params = params['data_ingestion']
+        logger.debug('data ingestion parameters retrieved')
+        return params
     except FileNotFoundError:
         logger.error('File not found')
         raise
@@ -41,11 +53,65 @@ def load_params(params_path: str) -> float:
         logger.error('some error occured')
         raise
 
-def load_data(data_url: str) -> pd.DataFrame:
+def file_digest(path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def fetch_source(url: str, cache_dir: str, sha256: str = None) -> str:
+    """Return a local copy of url, downloading only when the cached copy is missing or fails its hash check"""
     try:
-        df = pd.read_csv(data_url)
-        return df
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, os.path.basename(urlparse(url).path) or 'source.csv')
+        digest_path = path + '.sha256'
+        if os.path.exists(path):
+            expected = sha256
+            if expected is None and os.path.exists(digest_path):
+                with open(digest_path) as file:
+                    expected = file.read().strip()
+            if expected is not None and file_digest(path) == expected:
+                logger.debug(f"Using cached source {path}")
+                return path
+            logger.warning(f"Cached source {path} failed its hash check, downloading again")
+
+        logger.debug(f"Downloading {url}")
+        # stream into a temporary file next to the cache so a failed download never replaces a good copy
+        with urllib.request.urlopen(url) as response, \
+                tempfile.NamedTemporaryFile(dir=cache_dir, delete=False) as tmp:
+            shutil.copyfileobj(response, tmp, 1 << 20)
+        digest = file_digest(tmp.name)
+        if sha256 is not None and digest != sha256:
+            os.remove(tmp.name)
+            raise ValueError(f"Downloaded {url} has sha256 {digest}, expected {sha256}")
+        os.replace(tmp.name, path)
+        with open(digest_path, 'w') as file:
+            file.write(digest)
+        logger.debug(f"Cached {url} at {path} (sha256 {digest})")
+        return path
+    except Exception as e:
+        logger.error(f"Error fetching {url}: {str(e)}")
+        raise
+
+def resolve_sources(source: str, cache_dir: str, sha256: str = None) -> list:
+    """Expand a source into local CSV files: a URL (cached), a file, or a directory of shards"""
+    if urlparse(source).scheme in ('http', 'https'):
+        return [fetch_source(source, cache_dir, sha256)]
+    if os.path.isdir(source):
+        shards = sorted(path for pattern in SHARD_PATTERNS for path in glob.glob(os.path.join(source, pattern)))
+        if not shards:
+            raise FileNotFoundError(f"No CSV shards found in {source}")
+        return shards
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Source not found: {source}")
+    return [source]
+
+def load_data(data_url: str, usecols: list = USECOLS) -> pd.DataFrame:
+    try:
+        df = pd.read_csv(data_url, usecols=usecols, engine='pyarrow', dtype={'sentiment': 'category'})
         logger.debug('data loaded')
+        return df
     except pd.errors.ParserError as e:
         print(f"Error: Failed to parse the CSV file from {data_url}.")
         print(e)
@@ -57,11 +123,10 @@ def load_data(data_url: str) -> pd.DataFrame:
 
 def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
     try:
-        df.drop(columns=['tweet_id'], inplace=True)
-        final_df = df[df['sentiment'].isin(['happiness', 'sadness'])]
-        final_df.loc[:, 'sentiment'] = final_df['sentiment'].map({'happiness': 1, 'sadness': 0})
-        return final_df
+        final_df = df[df['sentiment'].isin(list(SENTIMENTS))].copy()
+        final_df['sentiment'] = final_df['sentiment'].astype('object').map(SENTIMENTS).astype('int64')
         logger.debug('data preprocessed')
+        return final_df
     except KeyError as e:
         print(f"Error: Missing column {e} in the dataframe.")
         raise
@@ -70,12 +135,79 @@ def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
         print(e)
         raise
 
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
+def stream_data(paths: list, chunksize: int, usecols: list = USECOLS) -> pd.DataFrame:
+    """Read the sources chunk by chunk, keeping only the filtered rows of each chunk in memory"""
+    try:
+        kept, rows = [], 0
+        for path in paths:
+            # the pyarrow engine cannot chunk, the C engine still prunes columns while parsing
+            reader = pd.read_csv(path, usecols=usecols, dtype={'sentiment': 'category'}, chunksize=chunksize)
+            with reader:
+                for chunk in reader:
+                    rows += len(chunk)
+                    kept.append(preprocess_data(chunk))
+        logger.debug(f"Streamed {rows} rows from {len(paths)} source(s), kept {sum(map(len, kept))}")
+        return pd.concat(kept, ignore_index=True)
+    except Exception as e:
+        logger.error(f"Error streaming sources: {str(e)}")
+        raise
+
+def ingest(params: dict) -> pd.DataFrame:
+    paths = resolve_sources(params['source'], params['cache_dir'], params.get('sha256'))
+    usecols = USECOLS
+    if params.get('split') == 'hash' and params['split_key'] not in USECOLS:
+        usecols = [params['split_key'], *USECOLS]
+    if params.get('chunksize'):
+        return stream_data(paths, params['chunksize'], usecols)
+    frames = [load_data(path, usecols) for path in paths]
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    return preprocess_data(df)
+
+def hash_fraction(values: pd.Series) -> np.ndarray:
+    """Map each value to a stable point in [0, 1) from a 64 bit blake2b digest of its text"""
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest(), 'big')
+         for value in values),
+        dtype=np.float64, count=len(values),
+    ) / 2.0 ** 64
+
+def hash_split(df: pd.DataFrame, test_size: float, key: str, stratify: bool = False):
+    """Assign rows to train or test from the hash of their key instead of a global shuffle.
+
+    A row lands in test when its hash falls below test_size, so appended rows never
+    move existing ones. With stratify each sentiment sends exactly its share of
+    lowest hashes to test, which can only move rows at the cut-off of each class.
+    """
+    try:
+        fraction = hash_fraction(df[key])
+        if stratify:
+            rank = pd.Series(fraction, index=df.index).groupby(df['sentiment']).rank(method='first', pct=True)
+            # pct ranks run from 1/n to 1, shift them so exactly round(test_size * n) rows fall below the cut-off
+            counts = df['sentiment'].map(df['sentiment'].value_counts())
+            is_test = (rank.to_numpy() - 0.5 / counts.to_numpy()) < test_size
+        else:
+            is_test = fraction < test_size
+        df = df.drop(columns=[key]) if key not in USECOLS else df
+        train_data, test_data = df[~is_test], df[is_test]
+        logger.debug(f"Hash split on {key}: {len(train_data)} train rows, {len(test_data)} test rows")
+        return train_data, test_data
+    except KeyError as e:
+        logger.error(f"Missing split column {e}")
+        raise
+    except Exception as e:
+        logger.error(f"Error splitting data: {str(e)}")
+        raise
+
+def split_data(df: pd.DataFrame, params: dict):
+    if params.get('split') == 'hash':
+        return hash_split(df, params['test_size'], params['split_key'], params.get('stratify', False))
+    return train_test_split(df, test_size=params['test_size'], random_state=42)
+
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str, storage: dict) -> None:
     try:
         data_path = os.path.join(data_path, 'raw')
-        os.makedirs(data_path, exist_ok=True)
-        train_data.to_csv(os.path.join(data_path, "train.csv"), index=False)
-        test_data.to_csv(os.path.join(data_path, "test.csv"), index=False)
+        write_table(train_data, data_path, "train", storage)
+        write_table(test_data, data_path, "test", storage)
         logger.debug('data saved')
     except Exception as e:
         print(f"Error: An unexpected error occurred while saving the data.")
@@ -84,11 +216,11 @@ def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str)
 
 def main():
     try:
-        test_size = load_params(params_path='params.yaml')
-        df = load_data(data_url='https://raw.githubusercontent.com/campusx-official/jupyter-masterclass/main/tweet_emotions.csv')
-        final_df = preprocess_data(df)
-        train_data, test_data = train_test_split(final_df, test_size=test_size, random_state=42)
-        save_data(train_data, test_data, data_path='data')
+        params = load_params(params_path='params.yaml')
+        storage = load_storage_params(params_path='params.yaml')
+        final_df = ingest(params)
+        train_data, test_data = split_data(final_df, params)
+        save_data(train_data, test_data, data_path='data', storage=storage)
         logger.info("Data ingestion completed successfully.")
     except Exception as e:
         print(f"Error: {e}")
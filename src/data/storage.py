@@ -0,0 +1,131 @@
+import os
+import time
+import yaml
+import logging
+import numpy as np
+import pandas as pd
+import scipy.sparse
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# logging configure
+
+logger = logging.getLogger('storage')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+EXTENSIONS = {'csv': 'csv', 'parquet': 'parquet'}
+
+# read parquet strings back as string[pyarrow] instead of python objects
+ARROW_STRING_TYPES = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+
+
+def load_storage_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        storage = params['storage']
+        if storage['format'] not in EXTENSIONS:
+            raise ValueError(f"Unknown storage format '{storage['format']}', expected one of {list(EXTENSIONS)}")
+        logger.debug('storage parameters retrieved')
+        return storage
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
+
+def table_path(directory: str, name: str, storage: dict) -> str:
+    return os.path.join(directory, f"{name}.{EXTENSIONS[storage['format']]}")
+
+
+def read_table(directory: str, name: str, storage: dict) -> pd.DataFrame:
+    """Read one stage table, e.g. read_table('data/raw', 'train', storage)"""
+    path = table_path(directory, name, storage)
+    try:
+        start = time.perf_counter()
+        if storage['format'] == 'parquet':
+            df = pq.read_table(path).to_pandas(types_mapper=ARROW_STRING_TYPES.get)
+        else:
+            # no field is read as missing, a tweet reading "null", "nan" or "" stays text;
+            # csv cannot tell a missing value from "", both come back as "" (stages fillna('') anyway)
+            df = pd.read_csv(path, keep_default_na=False)
+        logger.debug(f"Read {path} ({os.path.getsize(path) / 1024:.1f} KiB) in {time.perf_counter() - start:.3f}s")
+        return df
+    except FileNotFoundError:
+        logger.error(f"File not found: {path}")
+        raise
+    except Exception as e:
+        logger.error(f"Error reading {path}: {str(e)}")
+        raise
+
+
+def write_table(df: pd.DataFrame, directory: str, name: str, storage: dict) -> None:
+    """Write one stage table without the pandas index"""
+    path = table_path(directory, name, storage)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        start = time.perf_counter()
+        if storage['format'] == 'parquet':
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            # object and arrow backed strings must give the same file, so keep one string type and drop pandas metadata
+            schema = pa.schema([
+                pa.field(field.name, pa.string() if pa.types.is_large_string(field.type) else field.type)
+                for field in table.schema
+            ])
+            pq.write_table(table.cast(schema).replace_schema_metadata(None), path, compression=storage['compression'])
+        else:
+            df.to_csv(path, index=False)
+        logger.debug(f"Wrote {path} ({os.path.getsize(path) / 1024:.1f} KiB) in {time.perf_counter() - start:.3f}s")
+    except Exception as e:
+        logger.error(f"Error writing {path}: {str(e)}")
+        raise
+
+
+def save_sparse_features(X, y, directory: str, name: str) -> None:
+    """Store a feature matrix as CSR <name>.npz and its labels as <name>_labels.npy"""
+    try:
+        os.makedirs(directory, exist_ok=True)
+        start = time.perf_counter()
+        X = scipy.sparse.csr_matrix(X)
+        # canonical column order within rows, so equal matrices always give equal files
+        X.sort_indices()
+        scipy.sparse.save_npz(os.path.join(directory, f"{name}.npz"), X)
+        np.save(os.path.join(directory, f"{name}_labels.npy"), np.asarray(y))
+        logger.debug(f"Wrote {name} features {X.shape} with {X.nnz} non-zeros in {time.perf_counter() - start:.3f}s")
+    except Exception as e:
+        logger.error(f"Error writing {name} features: {str(e)}")
+        raise
+
+
+def load_sparse_features(directory: str, name: str):
+    """Load the CSR feature matrix and label array written by save_sparse_features"""
+    try:
+        start = time.perf_counter()
+        X = scipy.sparse.load_npz(os.path.join(directory, f"{name}.npz")).tocsr()
+        y = np.load(os.path.join(directory, f"{name}_labels.npy"), allow_pickle=False)
+        logger.debug(f"Read {name} features {X.shape} with {X.nnz} non-zeros in {time.perf_counter() - start:.3f}s")
+        return X, y
+    except FileNotFoundError as e:
+        logger.error(f"Feature files not found: {str(e)}")
+        raise
+    except Exception as e:
+        logger.error(f"Error reading {name} features: {str(e)}")
+        raise
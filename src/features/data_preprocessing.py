@@ -5,8 +5,19 @@ import re
 import nltk
 import string
 import logging
+import time
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from nltk.corpus import stopwords
 from nltk.stem import SnowballStemmer, WordNetLemmatizer
+from src.data.storage import load_storage_params, read_table, write_table
+from src.features.preprocessing_cache import PreprocessingCache
+# the normalizer itself lives in sentiment_serving, which the served model ships on its own
+from sentiment_serving.text_normalizer import (
+    NORMALIZER_VERSION, get_digit_pattern, get_lemmatizer, get_normalizer, get_stop_words, get_stop_words_pattern,
+    get_whitespace_pattern, normalize_text,
+)
 
 
 logger = logging.getLogger('data_Preprocessing')
@@ -30,119 +41,130 @@ logger.addHandler(file_handler)
 nltk.download('wordnet')
 nltk.download('stopwords')
 
-def lemmatization(text):
+def load_params(params_path: str) -> dict:
     try:
-        lemmatizer= WordNetLemmatizer()
-        text = text.split()
-        text=[lemmatizer.lemmatize(y) for y in text]
-        return " " .join(text)
-    except Exception as e:
-        logger.error(f"Error in lemmatization: {e}")
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        preprocessing_params = params['data_preprocessing']
+        logger.debug('preprocessing parameters retrieved')
+        return preprocessing_params
+    except FileNotFoundError:
+        logger.error('File not found')
         raise
-
-def remove_stop_words(text):
-    try:
-        stop_words = set(stopwords.words("english"))
-        Text=[i for i in str(text).split() if i not in stop_words]
-        return " ".join(Text)
-    except Exception as e:
-        logger.error(f"Error in removing stop words: {e}")
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
         raise
-
-def removing_numbers(text):
-    try:
-        text=''.join([i for i in text if not i.isdigit()])
-        return text
     except Exception as e:
-        logger.error(f"Error in removing numbers: {e}")
+        logger.error('some error occured')
         raise
 
-def lower_case(text):
+def init_worker():
+    """Load NLTK resources up front in each worker process"""
+    # per-chunk step logs from every worker would drown the stage output
+    logger.setLevel('WARNING')
+    get_stop_words()
+    # wordnet is loaded lazily on the first lemmatize call
+    get_lemmatizer().lemmatize('warmup')
+    get_whitespace_pattern()
+    get_digit_pattern()
+    get_stop_words_pattern()
+
+def normalize_text_parallel(df, n_jobs, chunksize, normalizer=normalize_text):
+    """Normalize the text in row chunks on a process pool, keeping the row order"""
     try:
-        text = text.split()
-        text=[y.lower() for y in text]
-        return " " .join(text)
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs <= 1 or len(df) <= chunksize:
+            return normalizer(df)
+
+        logger.info(f"Normalizing {len(df)} rows in chunks of {chunksize} on {n_jobs} workers")
+        chunks = [df.iloc[start:start + chunksize] for start in range(0, len(df), chunksize)]
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_worker) as executor:
+            # map yields results in submission order, so concat restores the original order
+            processed_chunks = list(executor.map(normalizer, chunks))
+        return pd.concat(processed_chunks)
     except Exception as e:
-        logger.error(f"Error in converting to lower case: {e}")
+        logger.error(f"Error in parallel text normalization: {str(e)}")
         raise
 
-def removing_punctuations(text):
-    try:
-        ## Remove punctuations
-        text = re.sub('[%s]' % re.escape("""!"#$%&'()*+,،-./:;<=>؟?@[\]^_`{|}~"""), ' ', text)
-        text = text.replace('؛',"", )
-
-        ## remove extra whitespace
-        text = re.sub('\s+', ' ', text)
-        text =  " ".join(text.split())
-        return text.strip()
-    except Exception as e:
-        logger.error(f"Error in removing punctuations: {e}")
-        raise
+def normalize_text_cached(df, cache, normalize):
+    """Normalize only the texts missing from the cache and merge the cached rows back in order
 
-def removing_urls(text):
+    normalize is called once, with a frame holding each unseen text a single time.
+    """
     try:
-        url_pattern = re.compile(r'https?://\S+|www\.\S+')
-        return url_pattern.sub(r'', text)
+        keys = [cache.make_key(text) for text in df.content]
+        cached = cache.get_many(list({key for key in keys if key is not None}))
+        hits = sum(key in cached for key in keys)
+
+        unseen = {}
+        for position, (key, text) in enumerate(zip(keys, df.content)):
+            if key is None:
+                # not a string, normalize it every time under a key of its own
+                key = keys[position] = ('uncached', position)
+            if key not in cached and key not in unseen:
+                unseen[key] = text
+
+        normalized = {}
+        elapsed = 0.0
+        if unseen:
+            start = time.perf_counter()
+            unseen_df = normalize(pd.DataFrame({'content': list(unseen.values())}))
+            elapsed = time.perf_counter() - start
+            normalized = {key: None if pd.isna(value) else value for key, value in zip(unseen, unseen_df.content)}
+            cache.put_many({key: value for key, value in normalized.items() if isinstance(key, bytes)})
+            cache.record_cost(len(unseen), elapsed)
+
+        values = [cached[key] if key in cached else normalized[key] for key in keys]
+        content = pd.Series([np.nan if value is None else value for value in values], index=df.index, dtype=object)
+        df.content = content if df.content.dtype == object else content.astype(df.content.dtype)
+
+        time_saved = hits * cache.seconds_per_text()
+        logger.info(
+            f"Preprocessing cache: {hits}/{len(df)} rows hit ({hits / max(len(df), 1):.1%}), "
+            f"normalized {len(unseen)} new texts in {elapsed:.2f}s, saved ~{time_saved:.2f}s"
+        )
+        return df
     except Exception as e:
-        logger.error(f"Error in removing urls: {e}")
+        logger.error(f"Error in cached text normalization: {str(e)}")
         raise
 
-
-def remove_small_sentences(text):
-    """Remove sentences with less than 3 words"""
-    try:
-        if len(str(text).split()) < 3:
-            return np.nan
-        return text
-    except Exception as e:
-        logger.error(f"Error in removing small sentences: {e}")
-        return text
-    
-def normalize_text(df):
-
-    try:
-        logger.info("Starting text normalization")
-        df.content=df.content.apply(lambda content : lower_case(content))
-        logger.debug("Converted text to lower case")
-        df.content=df.content.apply(lambda content : remove_stop_words(content))
-        logger.debug("Removed stop words")
-        df.content=df.content.apply(lambda content : removing_numbers(content))
-        logger.debug("Removed numbers")
-        df.content=df.content.apply(lambda content : removing_punctuations(content))
-        logger.debug("Removed punctuations")
-        df.content=df.content.apply(lambda content : removing_urls(content))
-        logger.debug("Removed urls")
-        df.content=df.content.apply(lambda content : lemmatization(content))
-        logger.debug("Applied lemmatization")
-        df.content=df.content.apply(lambda content : remove_small_sentences(content))
-        logger.debug("Removed small sentences")
-        return df
-    except Exception as e:
-        logger.error(f"Error in text normalization: {str(e)}")
-        return df
+def preprocess(train_data: pd.DataFrame, test_data: pd.DataFrame, params: dict):
+    """Normalize both splits with the configured engine, through the cache when enabled"""
+    normalize = partial(
+        normalize_text_parallel,
+        n_jobs=params['n_jobs'],
+        chunksize=params['chunksize'],
+        normalizer=get_normalizer(params['engine']),
+    )
+    cache_params = params['cache']
+    if cache_params['enabled']:
+        with PreprocessingCache(cache_params['path'], NORMALIZER_VERSION, cache_params['max_mb'] * 1024 ** 2) as cache:
+            return (normalize_text_cached(train_data, cache, normalize),
+                    normalize_text_cached(test_data, cache, normalize))
+    return normalize(train_data), normalize(test_data)
 
 def main():
+    params = load_params(params_path='params.yaml')
+    storage = load_storage_params(params_path='params.yaml')
+
     try:
         # load the data
-        train_data = pd.read_csv('./data/raw/train.csv')
-        test_data = pd.read_csv('./data/raw/test.csv')
+        train_data = read_table('./data/dedup', 'train', storage)
+        test_data = read_table('./data/dedup', 'test', storage)
         logger.debug("Successfully loaded train and test data")
     except FileNotFoundError as e:
         logger.error("File not found")
         raise
 
     # normalize the text
-    train_processed_data = normalize_text(train_data)
-    test_processed_data = normalize_text(test_data)
+    train_processed_data, test_processed_data = preprocess(train_data, test_data, params)
 
     # store the data inside data/interim
     data_path = os.path.join("data","interim")
 
-    os.makedirs(data_path, exist_ok=True)
-
-    train_processed_data.to_csv(os.path.join(data_path,"train_processed.csv"))
-    test_processed_data.to_csv(os.path.join(data_path,"test_processed.csv"))
+    write_table(train_processed_data, data_path, "train_processed", storage)
+    write_table(test_processed_data, data_path, "test_processed", storage)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -3,8 +3,12 @@ import pandas as pd
 import os
 import yaml
 import logging
-from sklearn.feature_extraction.text import CountVectorizer
+import scipy.sparse
+from numbers import Integral
+from concurrent.futures import ProcessPoolExecutor
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
 import pickle
+from src.data.storage import load_storage_params, read_table, save_sparse_features
 
 # Set up logging configuration
 logger = logging.getLogger('feature_engineering')
@@ -28,12 +32,30 @@ try:
 except Exception as e:
     print(f"Error setting up logging: {str(e)}")
 
+def load_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        params = params['feature_engineering']
+        logger.debug('feature engineering parameters retrieved')
+        return params
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
 def load_data():
     try:
         # Load the processed data
         logger.info("Loading processed data...")
-        train_data = pd.read_csv('./data/interim/train_processed.csv')
-        test_data = pd.read_csv('./data/interim/test_processed.csv')
+        storage = load_storage_params('params.yaml')
+        train_data = read_table('./data/interim', 'train_processed', storage)
+        test_data = read_table('./data/interim', 'test_processed', storage)
         
         train_data.fillna('', inplace=True)
         test_data.fillna('', inplace=True)
@@ -47,79 +69,219 @@ def load_data():
         logger.error(f"Error loading data: {str(e)}")
         raise
 
-def apply_bow_vectorization(X_train, X_test):
+def resolve_n_jobs(n_jobs: int) -> int:
+    return (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+
+def count_shard(texts, vectorizer_params: dict):
+    """Count one shard against its own vocabulary.
+
+    Returns the shard's terms in first occurrence order with their term and document
+    frequencies, and the shard's count matrix with the column of each term.
+    """
+    counter = CountVectorizer(**{**vectorizer_params, 'max_features': None, 'min_df': 1, 'max_df': 1.0})
+    X = counter.fit_transform(texts)
+    # vocabulary_ keeps the insertion order of the first time each term was seen
+    terms = np.array(list(counter.vocabulary_), dtype=object)
+    columns = np.fromiter(counter.vocabulary_.values(), dtype=np.int64, count=len(terms))
+    term_freqs = np.asarray(X.sum(axis=0)).ravel()[columns]
+    doc_freqs = np.bincount(X.indices, minlength=X.shape[1])[columns]
+    return terms, term_freqs, doc_freqs, X, columns
+
+def remap_shard(X, terms, columns, vocabulary: dict):
+    """Move a shard's count matrix onto the merged vocabulary, dropping pruned terms"""
+    local_to_global = np.full(X.shape[1], -1, dtype=np.int64)
+    local_to_global[columns] = [vocabulary.get(term, -1) for term in terms]
+    indices = local_to_global[X.indices]
+    keep = indices >= 0
+    indptr = np.r_[0, np.cumsum(keep)][X.indptr]
+    remapped = scipy.sparse.csr_matrix(
+        (X.data[keep], indices[keep].astype(X.indices.dtype), indptr.astype(X.indptr.dtype)),
+        shape=(X.shape[0], len(vocabulary)),
+    )
+    remapped.sort_indices()
+    return remapped
+
+def merge_vocabulary(shard_counts, vectorizer: CountVectorizer) -> dict:
+    """Merge per-shard counts and prune them the way CountVectorizer.fit does.
+
+    Terms are ranked in alphabetical order with the same argsort sklearn applies, so
+    ties at the max_features cut-off break identically, and the dict is filled in
+    global first occurrence order, the order a serial fit inserts terms in.
+    """
+    terms, term_freqs, doc_freqs, matrices, _ = zip(*shard_counts)
+    codes, uniques = pd.factorize(np.concatenate(terms))
+    term_freqs = np.bincount(codes, weights=np.concatenate(term_freqs), minlength=len(uniques)).astype(np.int64)
+    doc_freqs = np.bincount(codes, weights=np.concatenate(doc_freqs), minlength=len(uniques)).astype(np.int64)
+
+    alphabetical = np.array(sorted(range(len(uniques)), key=uniques.__getitem__), dtype=np.int64)
+    tfs, dfs = term_freqs[alphabetical], doc_freqs[alphabetical]
+
+    n_doc = sum(X.shape[0] for X in matrices)
+    max_df, min_df = vectorizer.max_df, vectorizer.min_df
+    high = max_df if isinstance(max_df, Integral) else max_df * n_doc
+    low = min_df if isinstance(min_df, Integral) else min_df * n_doc
+    mask = (dfs <= high) & (dfs >= low)
+    limit = vectorizer.max_features
+    if limit is not None and mask.sum() > limit:
+        mask_inds = (-tfs[mask]).argsort()[:limit]
+        new_mask = np.zeros(len(dfs), dtype=bool)
+        new_mask[np.where(mask)[0][mask_inds]] = True
+        mask = new_mask
+    if not mask.any():
+        raise ValueError("After pruning, no terms remain. Try a lower min_df or a higher max_df.")
+
+    new_indices = np.cumsum(mask) - 1
+    if limit is None:
+        # without max_features sklearn renumbers after pruning, leaving plain ints
+        new_indices = new_indices.tolist()
+    position = np.empty(len(uniques), dtype=np.int64)
+    position[alphabetical] = np.arange(len(uniques))
+    return {term: new_indices[position[code]] for code, term in enumerate(uniques) if mask[position[code]]}
+
+_shard_vectorizer = None
+
+def init_transform_worker(vectorizer):
+    global _shard_vectorizer
+    _shard_vectorizer = vectorizer
+
+def transform_shard(texts):
+    return _shard_vectorizer.transform(texts)
+
+def sharded_fit_transform(vectorizer, X_train, X_test, n_jobs: int, chunksize: int):
+    """Fit vectorizer's vocabulary from shards counted in parallel.
+
+    The training shards' count matrices are remapped onto the merged vocabulary rather
+    than tokenized again, the test split is transformed on the pool.
+    """
+    train_shards = [X_train[start:start + chunksize] for start in range(0, len(X_train), chunksize)]
+    test_shards = [X_test[start:start + chunksize] for start in range(0, len(X_test), chunksize)]
+    vectorizer_params = vectorizer.get_params()
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        shard_counts = list(executor.map(count_shard, train_shards, [vectorizer_params] * len(train_shards)))
+    vectorizer.fixed_vocabulary_ = False
+    vectorizer.vocabulary_ = merge_vocabulary(shard_counts, vectorizer)
+    # a serial fit builds the analyzer once, which records the stop word list it checked
+    vectorizer.build_analyzer()
+    logger.debug(f"Merged the vocabulary of {len(train_shards)} shards")
+
+    X_train_bow = scipy.sparse.vstack(
+        [remap_shard(X, terms, columns, vectorizer.vocabulary_) for terms, _, _, X, columns in shard_counts],
+        format='csr',
+    )
+    # workers receive the fitted vectorizer once, shards come back as CSR and are stacked in order
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=init_transform_worker, initargs=(vectorizer,)) as executor:
+        X_test_bow = scipy.sparse.vstack(list(executor.map(transform_shard, test_shards)), format='csr')
+    return X_train_bow, X_test_bow
+
+def apply_bow_vectorization(X_train, X_test, params, vectorizer_path=None):
     try:
-        with open("params.yaml", 'r') as file:
-            params = yaml.safe_load(file)
-        max_features = params['feature_engineering']['max_features']
+        max_features = params['max_features']
         logger.debug('max_features retrieved')
         logger.info("Applying Bag of Words vectorization...")
         vectorizer = CountVectorizer(max_features=max_features)
         
-        # Fit and transform training data
-        X_train_bow = vectorizer.fit_transform(X_train)
-        logger.debug("Training data vectorized")
-        
-        # Transform test data
-        X_test_bow = vectorizer.transform(X_test)
-        logger.debug("Test data vectorized")
+        n_jobs = resolve_n_jobs(params['n_jobs'])
+        if n_jobs > 1 and len(X_train) > params['chunksize']:
+            logger.info(f"Fitting and transforming in shards of {params['chunksize']} on {n_jobs} workers")
+            X_train_bow, X_test_bow = sharded_fit_transform(vectorizer, X_train, X_test, n_jobs, params['chunksize'])
+        else:
+            # Fit and transform training data
+            X_train_bow = vectorizer.fit_transform(X_train)
+            logger.debug("Training data vectorized")
+            
+            # Transform test data
+            X_test_bow = vectorizer.transform(X_test)
+            logger.debug("Test data vectorized")
 
         # save vectorizer for future use 
-        pickle.dump(vectorizer, open("models/vectorizer.pkl", "wb"))
+        if vectorizer_path:
+            pickle.dump(vectorizer, open(vectorizer_path, "wb"))
         
-        return X_train_bow, X_test_bow
+        return X_train_bow, X_test_bow, vectorizer
     except Exception as e:
         logger.error(f"Error in BOW vectorization: {str(e)}")
         raise
 
-def create_feature_dataframes(X_train_bow, y_train, X_test_bow, y_test):
+def transform_in_chunks(vectorizer, texts, chunksize: int):
+    """Transform texts chunk by chunk, only one chunk of token counts is built at a time"""
+    return scipy.sparse.vstack(
+        [vectorizer.transform(texts[start:start + chunksize]) for start in range(0, len(texts), chunksize)],
+        format='csr',
+    )
+
+def apply_hashing_vectorization(X_train, X_test, params, vectorizer_path=None):
     try:
-        logger.info("Creating feature dataframes...")
-        train_df = pd.DataFrame(X_train_bow.toarray())
-        train_df['label'] = y_train
-        
-        test_df = pd.DataFrame(X_test_bow.toarray())
-        test_df['label'] = y_test
-        
-        logger.debug("Feature dataframes created successfully")
-        return train_df, test_df
+        hashing = params['hashing']
+        logger.info("Applying hashed Bag of Words vectorization...")
+        # stateless: no fit pass and no vocabulary, the pickle only carries these parameters
+        vectorizer = HashingVectorizer(
+            n_features=hashing['n_features'],
+            alternate_sign=hashing['alternate_sign'],
+            norm=None,
+        )
+
+        X_train_bow = transform_in_chunks(vectorizer, X_train, hashing['chunksize'])
+        logger.debug("Training data vectorized")
+
+        X_test_bow = transform_in_chunks(vectorizer, X_test, hashing['chunksize'])
+        logger.debug("Test data vectorized")
+
+        if vectorizer_path:
+            pickle.dump(vectorizer, open(vectorizer_path, "wb"))
+
+        return X_train_bow, X_test_bow, vectorizer
     except Exception as e:
-        logger.error(f"Error creating feature dataframes: {str(e)}")
+        logger.error(f"Error in hashing vectorization: {str(e)}")
         raise
 
-def save_features(train_df, test_df):
+VECTORIZERS = {
+    'bow': apply_bow_vectorization,
+    'hashing': apply_hashing_vectorization,
+}
+
+def save_features(X_train_bow, y_train, X_test_bow, y_test):
     try:
         logger.info("Saving feature engineered data...")
         data_path = os.path.join("data", "features")
-        os.makedirs(data_path, exist_ok=True)
-        
-        train_df.to_csv(os.path.join(data_path, "train_bow.csv"), index=False)
-        test_df.to_csv(os.path.join(data_path, "test_bow.csv"), index=False)
-        
+
+        # kept sparse end to end, a dense copy costs rows x max_features
+        save_sparse_features(X_train_bow, y_train, data_path, "train_bow")
+        save_sparse_features(X_test_bow, y_test, data_path, "test_bow")
+
         logger.info("Features saved successfully")
     except Exception as e:
         logger.error(f"Error saving features: {str(e)}")
         raise
 
+def build_features(train_data, test_data, params, vectorizer_path=None):
+    """Vectorize both splits, returning (X_train_bow, y_train, X_test_bow, y_test, vectorizer)"""
+    # Prepare features and labels
+    X_train = train_data['content'].fillna('').values
+    y_train = train_data['sentiment'].values
+    X_test = test_data['content'].fillna('').values
+    y_test = test_data['sentiment'].values
+
+    # Apply the configured vectorization
+    if vectorizer_path:
+        os.makedirs(os.path.dirname(vectorizer_path) or '.', exist_ok=True)
+    if params['vectorizer'] not in VECTORIZERS:
+        raise ValueError(f"Unknown vectorizer '{params['vectorizer']}', expected one of {list(VECTORIZERS)}")
+    X_train_bow, X_test_bow, vectorizer = VECTORIZERS[params['vectorizer']](X_train, X_test, params, vectorizer_path)
+    return X_train_bow, y_train, X_test_bow, y_test, vectorizer
+
 def main():
     try:
         # Load data
         train_data, test_data = load_data()
         
-        # Prepare features and labels
-        X_train = train_data['content'].values
-        y_train = train_data['sentiment'].values
-        X_test = test_data['content'].values
-        y_test = test_data['sentiment'].values
-        
-        # Apply BOW vectorization
-        X_train_bow, X_test_bow = apply_bow_vectorization(X_train, X_test)
-        
-        # Create feature dataframes
-        train_df, test_df = create_feature_dataframes(X_train_bow, y_train, X_test_bow, y_test)
+        params = load_params('params.yaml')
+        # the untouched vectorizer travels with the features, feature selection writes the one models use
+        X_train_bow, y_train, X_test_bow, y_test, vectorizer = build_features(
+            train_data, test_data, params, os.path.join("data", "features", "vectorizer.pkl")
+        )
         
         # Save features
-        save_features(train_df, test_df)
+        save_features(X_train_bow, y_train, X_test_bow, y_test)
         
         logger.info("Feature engineering pipeline completed successfully")
         
@@ -0,0 +1,241 @@
+import os
+import copy
+import json
+import yaml
+import pickle
+import shutil
+import logging
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.feature_selection import chi2
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from src.data.storage import load_sparse_features, save_sparse_features
+from src.model.model_building import train_model
+
+# logging configure
+
+logger = logging.getLogger('feature_selection')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+FEATURE_FILES = ['train_bow.npz', 'train_bow_labels.npy', 'test_bow.npz', 'test_bow_labels.npy']
+
+
+def load_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('feature selection parameters retrieved')
+        return params['feature_selection']
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
+
+def score_chi2(X, y, params):
+    return chi2(X, y)[0]
+
+
+def score_mutual_info(X, y, params):
+    """Mutual information between term presence and the label, from one sparse product per class.
+
+    sklearn's mutual_info_classif loops over columns in Python, this gives the same
+    quantity for binarized features at the cost of a matrix product.
+    """
+    present = (X > 0).astype(np.float64).T.tocsr()
+    classes, y_codes = np.unique(y, return_inverse=True)
+    onehot = np.eye(len(classes))[y_codes]
+    n = X.shape[0]
+    # joint counts: (term present, class) and (term absent, class)
+    with_term = present @ onehot
+    without_term = onehot.sum(axis=0) - with_term
+    p_term = with_term.sum(axis=1, keepdims=True) / n
+    p_class = onehot.sum(axis=0, keepdims=True) / n
+    mi = np.zeros(X.shape[1])
+    for joint, marginal in ((with_term / n, p_term), (without_term / n, 1 - p_term)):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mi += np.nansum(np.where(joint > 0, joint * np.log(joint / (marginal * p_class)), 0.0), axis=1)
+    return mi
+
+
+def score_l1(X, y, params):
+    clf = LogisticRegression(penalty='l1', solver='liblinear', C=params['l1_C'], random_state=params['random_state'])
+    clf.fit(X, y)
+    return np.abs(clf.coef_).ravel()
+
+
+SCORERS = {
+    'chi2': score_chi2,
+    'mutual_info': score_mutual_info,
+    'l1': score_l1,
+}
+
+
+def score_features(X_train, y_train, params: dict) -> np.ndarray:
+    """Supervised score per column, computed on the training split only"""
+    try:
+        if params['method'] not in SCORERS:
+            raise ValueError(f"Unknown selection method '{params['method']}', expected one of {list(SCORERS)}")
+        # chi2 gives NaN for columns that never occur, they rank last
+        return np.nan_to_num(SCORERS[params['method']](X_train, y_train, params), nan=0.0)
+    except Exception as e:
+        logger.error(f"Error scoring features: {str(e)}")
+        raise
+
+
+def rank_features(scores: np.ndarray) -> np.ndarray:
+    """Columns from best to worst, ties keep the vocabulary order"""
+    return np.argsort(-scores, kind='stable')
+
+
+def select_features(scores: np.ndarray, k: int = None, threshold: float = None) -> np.ndarray:
+    """Kept columns in ascending order, the top k or those scoring at least threshold"""
+    if k is not None:
+        kept = rank_features(scores)[:k]
+    elif threshold is not None:
+        kept = np.flatnonzero(scores >= threshold)
+    else:
+        raise ValueError("feature_selection needs either k or threshold")
+    return np.sort(kept)
+
+
+def prune_vectorizer(vectorizer: CountVectorizer, kept: np.ndarray) -> CountVectorizer:
+    """Copy of a fitted CountVectorizer whose vocabulary only holds the kept columns, renumbered in order"""
+    remap = np.full(len(vectorizer.vocabulary_), -1, dtype=np.int64)
+    remap[kept] = np.arange(len(kept))
+    pruned = copy.deepcopy(vectorizer)
+    pruned.vocabulary_ = {
+        term: remap[index] for term, index in vectorizer.vocabulary_.items() if remap[index] >= 0
+    }
+    return pruned
+
+
+def auc_by_size(X_fit, y_fit, X_val, y_val, scores, sizes, model_params) -> list:
+    """Validation AUC and accuracy of the configured model trained on the top n features, for each n in sizes"""
+    ranking = rank_features(scores)
+    report = []
+    for size in sorted({min(size, X_fit.shape[1]) for size in sizes}):
+        kept = np.sort(ranking[:size])
+        clf = train_model(X_fit[:, kept], y_fit, model_params)
+        report.append({
+            'n_features': int(size),
+            'auc': roc_auc_score(y_val, clf.predict_proba(X_val[:, kept])[:, 1]),
+            'accuracy': accuracy_score(y_val, clf.predict(X_val[:, kept])),
+        })
+        logger.debug(f"{size} features: auc {report[-1]['auc']:.4f}")
+    return report
+
+
+def select(X_train, y_train, X_test, y_test, vectorizer, params: dict):
+    """Score, select and prune; returns both reduced matrices, the pruned vectorizer, the scores and the kept columns"""
+    try:
+        if not isinstance(vectorizer, CountVectorizer):
+            raise ValueError("Feature selection rewrites a vocabulary, it needs the 'bow' vectorizer")
+        scores = score_features(X_train, y_train, params)
+        kept = select_features(scores, params.get('k'), params.get('threshold'))
+        logger.info(f"Kept {len(kept)} of {X_train.shape[1]} features by {params['method']}")
+        return X_train[:, kept], X_test[:, kept], prune_vectorizer(vectorizer, kept), scores, kept
+    except Exception as e:
+        logger.error(f"Error selecting features: {str(e)}")
+        raise
+
+
+def selection_report(params, X_train, y_train, kept, model_params) -> dict:
+    """Selection summary with the AUC curve over report_sizes, the selected size and the full vocabulary.
+
+    The curve is measured on a validation split carved from train, with features
+    ranked on the rest of train, so choosing k from it never looks at the test
+    split model_evaluation reports on.
+    """
+    fit_rows, val_rows = train_test_split(
+        np.arange(X_train.shape[0]), test_size=params['validation_size'],
+        random_state=params['random_state'], stratify=y_train,
+    )
+    X_fit, y_fit = X_train[fit_rows], y_train[fit_rows]
+    return {
+        'enabled': True,
+        'method': params['method'],
+        'n_features_in': int(X_train.shape[1]),
+        'n_features_out': int(len(kept)),
+        'validation_size': params['validation_size'],
+        'auc_by_size': auc_by_size(
+            X_fit, y_fit, X_train[val_rows], y_train[val_rows], score_features(X_fit, y_fit, params),
+            params['report_sizes'] + [len(kept), X_train.shape[1]], model_params,
+        ),
+    }
+
+
+def save_report(report: dict, file_path: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug(f"Feature selection report saved to {file_path}")
+    except Exception as e:
+        logger.error(f"Error saving the feature selection report: {str(e)}")
+        raise
+
+
+def main():
+    try:
+        params = load_params('params.yaml')
+        with open('params.yaml', 'r') as file:
+            model_params = yaml.safe_load(file)['model_building']
+        input_path, output_path = os.path.join('data', 'features'), os.path.join('data', 'processed')
+        os.makedirs(output_path, exist_ok=True)
+
+        if not params['enabled']:
+            # pass the features through untouched so downstream stages always read data/processed
+            for name in FEATURE_FILES:
+                shutil.copyfile(os.path.join(input_path, name), os.path.join(output_path, name))
+            shutil.copyfile(os.path.join(input_path, 'vectorizer.pkl'), os.path.join(output_path, 'vectorizer.pkl'))
+            save_report({'enabled': False}, 'reports/feature_selection.json')
+            logger.info("Feature selection disabled, features passed through")
+            return
+
+        X_train, y_train = load_sparse_features(input_path, 'train_bow')
+        X_test, y_test = load_sparse_features(input_path, 'test_bow')
+        with open(os.path.join(input_path, 'vectorizer.pkl'), 'rb') as file:
+            vectorizer = pickle.load(file)
+
+        X_train_selected, X_test_selected, pruned, scores, kept = select(
+            X_train, y_train, X_test, y_test, vectorizer, params
+        )
+        save_sparse_features(X_train_selected, y_train, output_path, 'train_bow')
+        save_sparse_features(X_test_selected, y_test, output_path, 'test_bow')
+        # the vectorizer the model is trained and served with travels with the features it produced
+        with open(os.path.join(output_path, 'vectorizer.pkl'), 'wb') as file:
+            pickle.dump(pruned, file)
+
+        save_report(
+            selection_report(params, X_train, y_train, kept, model_params),
+            'reports/feature_selection.json',
+        )
+        logger.info("Feature selection completed successfully")
+    except Exception as e:
+        logger.error(f"Failed to complete feature selection: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import os
+import time
+import sqlite3
+import hashlib
+
+
+class PreprocessingCache:
+    """Row level cache of normalized text on local disk.
+
+    Entries live in a single SQLite table keyed by a 16 byte blake2b digest of
+    the normalizer version and the raw text, so a new normalizer version never
+    reads results of an older one. The table is kept under max_bytes by
+    evicting the least recently used entries.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, path: str, version: str, max_bytes: int):
+        self.path = path
+        self.version = version.encode('utf-8')
+        self.max_bytes = max_bytes
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        # only takes effect on a new database, it lets evictions hand pages back to the OS
+        self.connection.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS normalized ('
+            'key BLOB PRIMARY KEY, value TEXT, size INTEGER NOT NULL, last_used REAL NOT NULL'
+            ') WITHOUT ROWID'
+        )
+        self.connection.execute('CREATE INDEX IF NOT EXISTS normalized_last_used ON normalized (last_used)')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value REAL)')
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.evict()
+        self.connection.close()
+
+    def make_key(self, text) -> bytes:
+        """Cache key of a raw text, None when the value cannot be cached"""
+        if not isinstance(text, str):
+            return None
+        return hashlib.blake2b(self.version + b'\0' + text.encode('utf-8'), digest_size=16).digest()
+
+    def get_many(self, keys) -> dict:
+        """Look up normalized values, a None value stands for a dropped (NaN) row"""
+        found = {}
+        now = time.time()
+        for start in range(0, len(keys), self.BATCH_SIZE):
+            batch = keys[start:start + self.BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            rows = self.connection.execute(
+                f'SELECT key, value FROM normalized WHERE key IN ({placeholders})', batch
+            ).fetchall()
+            found.update(rows)
+            self.connection.execute(
+                f'UPDATE normalized SET last_used = ? WHERE key IN ({placeholders})', [now, *batch]
+            )
+        self.connection.commit()
+        return found
+
+    def put_many(self, items: dict) -> None:
+        now = time.time()
+        self.connection.executemany(
+            'INSERT OR REPLACE INTO normalized (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+            (
+                (key, value, len(key) + (len(value.encode('utf-8')) if value is not None else 0), now)
+                for key, value in items.items()
+            ),
+        )
+        self.connection.commit()
+
+    def size(self) -> int:
+        return self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM normalized').fetchone()[0]
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits in max_bytes"""
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return 0
+        evicted = []
+        candidates = self.connection.execute('SELECT key, size FROM normalized ORDER BY last_used')
+        for key, size in candidates:
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        candidates.close()
+        self.connection.executemany('DELETE FROM normalized WHERE key = ?', evicted)
+        self.connection.commit()
+        # executescript steps the pragma to completion, execute() would free a single page
+        self.connection.executescript('PRAGMA incremental_vacuum;')
+        return len(evicted)
+
+    def get_meta(self, name: str, default=None):
+        row = self.connection.execute('SELECT value FROM meta WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, name: str, value) -> None:
+        self.connection.execute('INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)', (name, value))
+        self.connection.commit()
+
+    def record_cost(self, texts: int, seconds: float) -> None:
+        """Accumulate normalization cost, the basis of the time saved estimate"""
+        self.set_meta('normalized_texts', self.get_meta('normalized_texts', 0) + texts)
+        self.set_meta('normalize_seconds', self.get_meta('normalize_seconds', 0.0) + seconds)
+
+    def seconds_per_text(self) -> float:
+        return self.get_meta('normalize_seconds', 0.0) / max(self.get_meta('normalized_texts', 0), 1)
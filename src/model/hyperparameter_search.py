@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import yaml
+import logging
+import numpy as np
+from joblib import parallel_config
+from scipy.stats import loguniform, uniform
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, RandomizedSearchCV
+from sklearn.linear_model import LogisticRegression
+from src.data.storage import load_sparse_features
+from src.model.model_building import load_params as load_model_params
+
+# logging configure
+
+logger = logging.getLogger('hyperparameter_search')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+DISTRIBUTIONS = {
+    'loguniform': lambda low, high: loguniform(low, high),
+    'uniform': lambda low, high: uniform(low, high - low),
+}
+
+# the LogisticRegression settings model_building takes from params.yaml
+MODEL_KEYS = ['C', 'solver', 'penalty', 'random_state']
+
+
+def load_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('hyperparameter search parameters retrieved')
+        return params['hyperparameter_search']
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
+
+def build_space(space: dict) -> dict:
+    """Search space from params.yaml: a list is a set of choices, {loguniform: [low, high]} a distribution"""
+    distributions = {}
+    for name, values in space.items():
+        if isinstance(values, dict):
+            (kind, (low, high)), = values.items()
+            if kind not in DISTRIBUTIONS:
+                raise ValueError(f"Unknown distribution '{kind}' for {name}, expected one of {list(DISTRIBUTIONS)}")
+            distributions[name] = DISTRIBUTIONS[kind](low, high)
+        else:
+            distributions[name] = list(values)
+    return distributions
+
+
+def build_search(params: dict, model_params: dict):
+    """Successive halving or plain randomized search over the model_building LogisticRegression"""
+    estimator = LogisticRegression(**{key: model_params[key] for key in MODEL_KEYS})
+    common = dict(
+        estimator=estimator,
+        param_distributions=build_space(params['space']),
+        scoring=params['scoring'],
+        cv=params['cv'],
+        n_jobs=params['n_jobs'],
+        random_state=params['random_state'],
+    )
+    if params['method'] == 'halving':
+        return HalvingRandomSearchCV(
+            n_candidates=params['n_candidates'], factor=params['factor'], min_resources=params['min_resources'],
+            **common
+        )
+    if params['method'] == 'random':
+        return RandomizedSearchCV(n_iter=params['n_candidates'], **common)
+    raise ValueError(f"Unknown search method '{params['method']}', expected 'halving' or 'random'")
+
+
+def run_search(X_train, y_train, params: dict, model_params: dict):
+    """Fit the search; workers read the training matrix from one memory map instead of a pickled copy each"""
+    try:
+        search = build_search(params, model_params)
+        os.makedirs(params['mmap_dir'], exist_ok=True)
+        start = time.perf_counter()
+        # arrays over max_nbytes, including the CSR buffers, are dumped once and memory-mapped read-only by every worker
+        with parallel_config(backend='loky', max_nbytes=params['mmap_min_bytes'], mmap_mode='r',
+                             temp_folder=params['mmap_dir']):
+            search.fit(X_train, y_train)
+        seconds = time.perf_counter() - start
+        logger.info(
+            f"{len(search.cv_results_['params'])} trials in {seconds:.1f}s, "
+            f"best {params['scoring']} {search.best_score_:.4f} with {search.best_params_}"
+        )
+        return search, seconds
+    except Exception as e:
+        logger.error(f"Error during hyperparameter search: {str(e)}")
+        raise
+
+
+def trial_records(cv_results: dict) -> list:
+    """One dict of params and metrics per trial, from cv_results_"""
+    keys = ('mean_test_score', 'std_test_score', 'mean_fit_time', 'n_resources', 'iter')
+    metric_keys = [key for key in keys if key in cv_results]
+    return [
+        {
+            'params': cv_results['params'][index],
+            'metrics': {key: float(cv_results[key][index]) for key in metric_keys},
+            'rank': int(cv_results['rank_test_score'][index]),
+        }
+        for index in range(len(cv_results['params']))
+    ]
+
+
+def search_report(search, params: dict, seconds: float) -> dict:
+    return {
+        'enabled': True,
+        'method': params['method'],
+        'scoring': params['scoring'],
+        'best_params': {
+            key: value.item() if isinstance(value, np.generic) else value for key, value in search.best_params_.items()
+        },
+        'best_score': float(search.best_score_),
+        'n_trials': len(search.cv_results_['params']),
+        'seconds': round(seconds, 3),
+    }
+
+
+def log_trials(report: dict, trials: list, experiment_name: str) -> str:
+    """Log the search as a parent run with one child run per trial; every param and metric is sent in one flush"""
+    import mlflow
+    from src.tracking.batch_logger import BatchLogger
+
+    mlflow.set_experiment(experiment_name)
+    client = mlflow.MlflowClient()
+    tracker = BatchLogger(client, background=False, max_pending=100000)
+    with mlflow.start_run(run_name='hyperparameter_search') as parent:
+        run_ids = []
+        for trial in trials:
+            child = client.create_run(
+                parent.info.experiment_id,
+                tags={'mlflow.parentRunId': parent.info.run_id, 'mlflow.runName': f"trial {trial['params']}"},
+            )
+            tracker.log_params(trial['params'], run_id=child.info.run_id)
+            tracker.log_metrics(trial['metrics'], run_id=child.info.run_id)
+            tracker.set_tag('rank', trial['rank'], run_id=child.info.run_id)
+            run_ids.append(child.info.run_id)
+        tracker.log_metrics({f"best_{report['scoring']}": report['best_score'], 'search_seconds': report['seconds']})
+        tracker.log_params(report['best_params'])
+        tracker.close()
+        for run_id in run_ids:
+            client.set_terminated(run_id)
+        logger.debug(f"Logged {len(trials)} trials to MLflow run {parent.info.run_id} "
+                     f"in {tracker.batches_sent} batches")
+        return parent.info.run_id
+
+
+def save_report(report: dict, file_path: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug(f"Hyperparameter search report saved to {file_path}")
+    except Exception as e:
+        logger.error(f"Error saving the hyperparameter search report: {str(e)}")
+        raise
+
+
+def main():
+    try:
+        params = load_params('params.yaml')
+        report_path = 'reports/hyperparameter_search.json'
+        if not params['enabled']:
+            # model_building then trains with the params.yaml values as they are
+            save_report({'enabled': False}, report_path)
+            logger.info("Hyperparameter search disabled")
+            return
+
+        model_params = load_model_params()
+        X_train, y_train = load_sparse_features(os.path.join('data', 'processed'), 'train_bow')
+        search, seconds = run_search(X_train, y_train, params, model_params)
+        report = search_report(search, params, seconds)
+        save_report(report, report_path)
+
+        if params['log_to_mlflow']:
+            from src.tracking.backend import configure_tracking
+            configure_tracking()
+            log_trials(report, trial_records(search.cv_results_), params['experiment'])
+        logger.info("Hyperparameter search completed successfully")
+    except Exception as e:
+        logger.error(f"Failed to complete the hyperparameter search: {str(e)}")
+        raise
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,15 @@
 import numpy as np
 import pandas as pd
 import pickle
+import copy
+import os
+import json
 import yaml
+import time
 import logging
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import log_loss
+from src.data.storage import load_sparse_features
 
 # Logging configuration
 try:
@@ -41,13 +47,21 @@ def load_params():
         logger.error(f"Error loading parameters: {str(e)}")
         raise
 
-def load_training_data(file_path : str) -> pd:
+def apply_search_results(model_params, report_path='reports/hyperparameter_search.json'):
+    """model_params with the best values found by the hyperparameter_search stage, when it ran"""
+    if not os.path.exists(report_path):
+        return model_params
+    with open(report_path, 'r') as f:
+        report = json.load(f)
+    if not report.get('enabled'):
+        return model_params
+    logger.info(f"Using searched parameters {report['best_params']}")
+    return {**model_params, **report['best_params']}
+
+def load_training_data(data_path : str):
     try:
         logger.info("Loading training data")
-        train_data = pd.read_csv(file_path)
-        
-        X_train = train_data.iloc[:,0:-1].values
-        y_train = train_data.iloc[:,-1].values
+        X_train, y_train = load_sparse_features(data_path, 'train_bow')
         
         logger.debug(f"Data loaded successfully. Shape: {X_train.shape}")
         return X_train, y_train
@@ -58,27 +72,183 @@ def load_training_data(file_path : str) -> pd:
         logger.error(f"Error loading training data: {str(e)}")
         raise
 
-def train_model(X_train, y_train, model_params):
+def train_batch(X_train, y_train, model_params, init=None):
     try:
-        logger.info("Training GradientBoostingClassifier")
+        logger.info("Training LogisticRegression")
+        solver = model_params['solver']
+        if init is not None:
+            # liblinear always starts from zero, warm starts need a solver that takes initial coefficients
+            solvers = model_params['warm_start']['solvers']
+            if model_params['penalty'] not in solvers:
+                raise ValueError(f"No warm start solver for penalty '{model_params['penalty']}', "
+                                 f"warm_start.solvers covers {list(solvers)}")
+            solver = solvers[model_params['penalty']]
         model = LogisticRegression(
             C = model_params['C'],
-            solver = model_params['solver'],
+            solver = solver,
             penalty = model_params['penalty'],
             random_state= model_params['random_state'],
+            warm_start = init is not None,
         )
+        if init is not None:
+            model.coef_, model.intercept_ = init
+        start = time.perf_counter()
         model.fit(X_train, y_train)
-        logger.info("Model training completed")
+        logger.info(f"Model training completed in {np.max(model.n_iter_)} iterations "
+                    f"and {time.perf_counter() - start:.3f}s "
+                    f"({'warm' if init is not None else 'cold'} start, {solver})")
         return model
     except Exception as e:
         logger.error(f"Error during model training: {str(e)}")
         raise
 
-def save_model(model):
+def iter_chunks(order, chunksize):
+    """Consecutive row index blocks of at most chunksize rows"""
+    for start in range(0, len(order), chunksize):
+        yield order[start:start + chunksize]
+
+def train_minibatch(X_train, y_train, model_params):
+    """Logistic regression by mini-batch SGD, fed one chunk of rows at a time through partial_fit.
+
+    The chunks are slices of the in-memory training matrix: this bounds the work per step, not
+    the memory, which is the same as for train_batch.
+    With a holdout fraction, the holdout split is scored after every epoch; training stops once
+    its log loss has not improved by tol for patience epochs and the best epoch's model is
+    returned. A holdout of 0 runs every epoch and returns the last model.
+    """
+    try:
+        params = model_params['minibatch']
+        if not 0 <= params['holdout'] < 1:
+            raise ValueError(f"minibatch holdout must be in [0, 1), got {params['holdout']}")
+        rng = np.random.default_rng(model_params['random_state'])
+        order = rng.permutation(X_train.shape[0])
+        n_holdout = int(len(order) * params['holdout'])
+        holdout, train = np.sort(order[:n_holdout]), np.sort(order[n_holdout:])
+        X_holdout, y_holdout = X_train[holdout], y_train[holdout]
+        classes = np.unique(y_train)
+
+        logger.info(f"Training SGDClassifier on {len(train)} rows in chunks of {params['chunksize']}, "
+                    f"{n_holdout} held out")
+        model = SGDClassifier(
+            loss='log_loss',
+            penalty=model_params['penalty'],
+            alpha=params['alpha'],
+            random_state=model_params['random_state'],
+        )
+        best_model, best_loss, stale = None, np.inf, 0
+        start = time.perf_counter()
+        for epoch in range(1, params['epochs'] + 1):
+            epoch_rows = rng.permutation(train) if params['shuffle'] else train
+            for rows in iter_chunks(epoch_rows, params['chunksize']):
+                model.partial_fit(X_train[rows], y_train[rows], classes=classes)
+            if n_holdout == 0:
+                best_model = model
+                continue
+            loss = log_loss(y_holdout, model.predict_proba(X_holdout), labels=classes)
+            logger.debug(f"Epoch {epoch}: holdout log loss {loss:.5f} after {time.perf_counter() - start:.2f}s")
+            if loss < best_loss - params['tol']:
+                best_model, best_loss, stale = copy.deepcopy(model), loss, 0
+            else:
+                stale += 1
+                if stale >= params['patience']:
+                    logger.info(f"Stopping early after epoch {epoch}")
+                    break
+        if n_holdout == 0:
+            logger.info(f"Model training completed after {params['epochs']} epochs without early stopping")
+        else:
+            logger.info(f"Model training completed, best holdout log loss {best_loss:.5f}")
+        return best_model
+    except Exception as e:
+        logger.error(f"Error during minibatch model training: {str(e)}")
+        raise
+
+TRAINERS = {
+    'batch': train_batch,
+    'minibatch': train_minibatch,
+}
+
+def train_model(X_train, y_train, model_params, init=None):
+    """Fit the model with the trainer named by model_params['trainer'] ('batch' when absent).
+
+    init is an optional (coef, intercept) pair to continue from, see load_warm_start.
+    """
+    trainer = model_params.get('trainer', 'batch')
+    if trainer not in TRAINERS:
+        raise ValueError(f"Unknown trainer '{trainer}', expected one of {list(TRAINERS)}")
+    if init is None:
+        return TRAINERS[trainer](X_train, y_train, model_params)
+    if trainer != 'batch':
+        raise ValueError("Warm starts are only supported by the 'batch' trainer")
+    return train_batch(X_train, y_train, model_params, init)
+
+def vectorizer_terms(vectorizer):
+    """Column names of a fitted bag-of-words vectorizer, None for hashing where columns never move"""
+    if hasattr(vectorizer, 'vocabulary_'):
+        return vectorizer.get_feature_names_out().tolist()
+    return None
+
+def remap_coefficients(coef, intercept, old_terms, new_terms, n_features):
+    """Previous coefficients laid out for the new columns; terms new to the vocabulary start at zero"""
+    if old_terms is None and new_terms is None:
+        if coef.shape[1] != n_features:
+            raise ValueError(f"Previous model has {coef.shape[1]} features, the new data {n_features}")
+        return coef.copy(), intercept.copy()
+    if old_terms is None or new_terms is None:
+        raise ValueError("Only one of the previous and new feature sets has a vocabulary, columns cannot be matched")
+    old_index = {term: column for column, term in enumerate(old_terms)}
+    pairs = np.array(
+        [(old_index[term], column) for column, term in enumerate(new_terms) if term in old_index], dtype=np.int64
+    ).reshape(-1, 2)
+    remapped = np.zeros((coef.shape[0], n_features), dtype=coef.dtype)
+    remapped[:, pairs[:, 1]] = coef[:, pairs[:, 0]]
+    logger.debug(f"Remapped {len(pairs)} of {n_features} coefficients from the previous model's {len(old_terms)} terms")
+    return remapped, intercept.copy()
+
+def load_previous_model(source: str):
+    """Previous model and the terms it was trained on, from models/ or from the registry's Production version"""
+    if source == 'file':
+        with open('models/model.pkl', 'rb') as f:
+            model = pickle.load(f)
+        terms = None
+        if os.path.exists('models/model_terms.json'):
+            with open('models/model_terms.json', 'r') as f:
+                terms = json.load(f)
+        return model, terms
+    if source == 'registry':
+        import mlflow
+        from src.tracking.backend import configure_tracking
+        from src.tracking.registry import get_registry
+        configure_tracking()
+        version = get_registry().latest_version("own_model", "Production")
+        if version is None:
+            raise LookupError("No Production version of own_model to warm start from")
+        # the registered pyfunc carries its own vectorizer, which names the coefficients' columns
+        sentiment_model = mlflow.pyfunc.load_model(f"models:/own_model/{version}").unwrap_python_model()
+        return sentiment_model.classifier, vectorizer_terms(sentiment_model.vectorizer)
+    raise ValueError(f"Unknown warm start source '{source}', expected 'file' or 'registry'")
+
+def load_warm_start(model_params, terms, n_features):
+    """(coef, intercept) to continue from when warm_start is enabled; None means a cold start"""
+    params = model_params.get('warm_start', {})
+    if not params.get('enabled'):
+        return None
+    try:
+        model, old_terms = load_previous_model(params['source'])
+        logger.info(f"Warm starting from the {params['source']} model")
+        return remap_coefficients(model.coef_, model.intercept_, old_terms, terms, n_features)
+    except (FileNotFoundError, LookupError, ValueError) as e:
+        # the first run has nothing to start from
+        logger.warning(f"No usable previous model, training from scratch: {str(e)}")
+        return None
+
+def save_model(model, terms=None):
     try:
         logger.info("Saving trained model")
         with open('models/model.pkl', 'wb') as f:
             pickle.dump(model, f)
+        # the column names the coefficients belong to, so the next warm start can remap them
+        with open('models/model_terms.json', 'w') as f:
+            json.dump(terms, f)
         logger.info("Model saved successfully")
     except Exception as e:
         logger.error(f"Error saving model: {str(e)}")
@@ -87,16 +257,21 @@ def save_model(model):
 def main():
     try:
         # Load parameters
-        model_params = load_params()
+        model_params = apply_search_results(load_params())
         
         # Load training data
-        X_train, y_train = load_training_data('./data/features/train_bow.csv')
+        X_train, y_train = load_training_data('./data/processed')
         
-        # Train model
-        model = train_model(X_train, y_train, model_params)
+        # Column names of the training features, for remapping warm starts
+        with open('data/processed/vectorizer.pkl', 'rb') as f:
+            terms = vectorizer_terms(pickle.load(f))
+
+        # Train model, from the previous coefficients when warm_start is enabled
+        init = load_warm_start(model_params, terms, X_train.shape[1])
+        model = train_model(X_train, y_train, model_params, init)
         
         # Save model
-        save_model(model)
+        save_model(model, terms)
         
         logger.info("Model building pipeline completed successfully")
     except Exception as e:
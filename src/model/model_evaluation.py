@@ -3,29 +3,17 @@ import pandas as pd
 import logging
 import pickle
 import json
+import time
 import os
-from dotenv import load_dotenv
-import tempfile
+import yaml
 from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
-import mlflow, dagshub
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Set up DagsHub credentials for MLflow tracking
-dagshub_token = os.getenv("DAGSHUB_PAT")
-if not dagshub_token:
-    raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
-
-os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
-os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
-
-dagshub_url = "https://dagshub.com"
-repo_owner = 'shahriar0999'
-repo_name = 'mlops-small-project'
-
-# Set up MLflow tracking URI
-mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
+import mlflow
+from src.data.storage import load_sparse_features, load_storage_params, read_table
+from src.features.feature_engineering import load_params as load_feature_params
+from src.features.data_preprocessing import load_params as load_preprocessing_params
+from src.model.pyfunc_model import load_local_model, log_sentiment_model
+from src.tracking.backend import configure_tracking
+from src.tracking.batch_logger import BatchLogger
 
 # Logging configuration
 try:
@@ -48,6 +36,22 @@ except Exception as e:
     print(f"Error configuring logging: {str(e)}")
     raise
 
+def load_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('evaluation parameters retrieved')
+        return params['model_evaluation']
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
 def load_model():
     try:
         logger.info("Loading trained model")
@@ -62,13 +66,10 @@ def load_model():
         logger.error(f"Error loading model: {str(e)}")
         raise
 
-def load_test_data(data_path: str) -> pd.DataFrame:
+def load_test_data(data_path: str):
     try:
         logger.info("Loading test data")
-        test_data = pd.read_csv(data_path) # './data/features/test_bow.csv'
-        
-        X_test = test_data.iloc[:,0:-1].values
-        y_test = test_data.iloc[:,-1].values
+        X_test, y_test = load_sparse_features(data_path, 'test_bow') # './data/processed'
         
         logger.debug(f"Test data loaded successfully. Shape: {X_test.shape}")
         return X_test, y_test
@@ -80,11 +81,75 @@ def load_test_data(data_path: str) -> pd.DataFrame:
         raise
 
 
-def evaluate_model(clf, X_test: np.ndarray, y_test: np.ndarray) -> dict:
-    """Evaluate the model and return the evaluation metrics."""
+def predict_proba_chunked(clf, X, chunksize: int = 10000) -> np.ndarray:
+    """Class probabilities for X, scored chunksize rows at a time"""
+    return np.vstack([clf.predict_proba(X[start:start + chunksize]) for start in range(0, X.shape[0], chunksize)])
+
+def bootstrap_weights(n: int, n_resamples: int, rng: np.random.Generator) -> np.ndarray:
+    """How often each of n rows is drawn in each resample, from an (n_resamples, n) matrix of resampled indices"""
+    indices = rng.integers(0, n, size=(n_resamples, n))
+    # offset each resample's indices into its own row, so one bincount counts them all
+    offsets = np.arange(n_resamples)[:, None] * n
+    counts = np.bincount((indices + offsets).ravel(), minlength=n_resamples * n)
+    return counts.reshape(n_resamples, n).astype(np.float64)
+
+def batched_auc(weights: np.ndarray, y_true: np.ndarray, y_score: np.ndarray) -> np.ndarray:
+    """ROC AUC of every weighted resample at once, from a single sort of the scores; tied scores count half"""
+    order = np.argsort(y_score, kind='mergesort')
+    sorted_scores = y_score[order]
+    tie_starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+    positive = (y_true[order] == 1)
+    sorted_weights = weights[:, order]
+    # weighted positives and negatives per distinct score, lowest score first
+    pos = np.add.reduceat(sorted_weights * positive, tie_starts, axis=1)
+    neg = np.add.reduceat(sorted_weights * ~positive, tie_starts, axis=1)
+    neg_below = np.cumsum(neg, axis=1) - neg
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (pos * (neg_below + 0.5 * neg)).sum(axis=1) / (pos.sum(axis=1) * neg.sum(axis=1))
+
+def batched_metrics(weights: np.ndarray, y_true: np.ndarray, y_pred: np.ndarray, y_score: np.ndarray) -> dict:
+    """Accuracy, precision, recall and AUC of every weighted resample, one matrix-vector product each"""
+    positive = (y_true == 1).astype(np.float64)
+    predicted = (y_pred == 1).astype(np.float64)
+    true_positive = weights @ (positive * predicted)
+    # undefined values (no predicted positives, a single class) stay NaN and are left out of the interval
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return {
+            'accuracy': weights @ (positive == predicted).astype(np.float64) / weights.sum(axis=1),
+            'precision': true_positive / (weights @ predicted),
+            'recall': true_positive / (weights @ positive),
+            'auc': batched_auc(weights, y_true, y_score),
+        }
+
+def bootstrap_intervals(y_true: np.ndarray, y_pred: np.ndarray, y_score: np.ndarray, params: dict) -> dict:
+    """Percentile bootstrap confidence intervals, resamples scored params['chunksize'] at a time"""
+    try:
+        start = time.perf_counter()
+        rng = np.random.default_rng(params['random_state'])
+        samples = {}
+        for done in range(0, params['n_resamples'], params['chunksize']):
+            weights = bootstrap_weights(len(y_true), min(params['chunksize'], params['n_resamples'] - done), rng)
+            for name, values in batched_metrics(weights, y_true, y_pred, y_score).items():
+                samples.setdefault(name, []).append(values)
+
+        tail = (1 - params['confidence']) / 2 * 100
+        intervals = {}
+        for name, values in samples.items():
+            lower, upper = np.nanpercentile(np.concatenate(values), [tail, 100 - tail])
+            intervals[f"{name}_ci_lower"], intervals[f"{name}_ci_upper"] = float(lower), float(upper)
+        logger.debug(f"{params['n_resamples']} bootstrap resamples in {time.perf_counter() - start:.2f}s")
+        return intervals
+    except Exception as e:
+        logger.error('Error computing bootstrap intervals: %s', e)
+        raise
+
+def evaluate_model(clf, X_test, y_test: np.ndarray, chunksize: int = 10000, bootstrap: dict = None) -> dict:
+    """Evaluate the model and return the evaluation metrics, with confidence intervals if bootstrap params are given."""
     try:
-        y_pred = clf.predict(X_test)
-        y_pred_proba = clf.predict_proba(X_test)[:, 1]
+        # one scoring pass, the labels are the most probable class as in clf.predict
+        proba = predict_proba_chunked(clf, X_test, chunksize)
+        y_pred = clf.classes_[proba.argmax(axis=1)]
+        y_pred_proba = proba[:, 1]
 
         accuracy = accuracy_score(y_test, y_pred)
         precision = precision_score(y_test, y_pred)
@@ -97,12 +162,51 @@ def evaluate_model(clf, X_test: np.ndarray, y_test: np.ndarray) -> dict:
             'recall': recall,
             'auc': auc
         }
+        if bootstrap:
+            metrics_dict.update(bootstrap_intervals(np.asarray(y_test), y_pred, y_pred_proba, bootstrap))
         logger.debug('Model evaluation metrics calculated')
         return metrics_dict
     except Exception as e:
         logger.error('Error during model evaluation: %s', e)
         raise
 
+def latency_percentiles(predict, inputs, batch_size: int, n_calls: int, warmup: int) -> dict:
+    """p50/p95/p99 wall time in milliseconds of predict on consecutive batch_size slices of inputs"""
+    for _ in range(warmup):
+        predict(inputs[:batch_size])
+    n_starts = max(len(inputs) - batch_size + 1, 1)
+    times = []
+    for call in range(n_calls):
+        start = (call * batch_size) % n_starts
+        begin = time.perf_counter()
+        predict(inputs[start:start + batch_size])
+        times.append((time.perf_counter() - begin) * 1000)
+    p50, p95, p99 = np.percentile(times, [50, 95, 99])
+    return {'p50_ms': p50, 'p95_ms': p95, 'p99_ms': p99}
+
+def serving_metrics(model_path: str, vectorizer_path: str, engine: str, texts: list, params: dict) -> dict:
+    """Load time, artifact size and raw-text latency of the combined model the app serves"""
+    try:
+        start = time.perf_counter()
+        model = load_local_model(model_path, vectorizer_path, engine)
+        metrics = {
+            'load_seconds': time.perf_counter() - start,
+            'artifact_bytes': os.path.getsize(model_path) + os.path.getsize(vectorizer_path),
+        }
+        predict = lambda batch: model.predict(None, batch)
+        for name, batch_size, n_calls in (
+            ('single_row', 1, params['n_single']),
+            ('batch', params['batch_size'], params['n_batches']),
+        ):
+            percentiles = latency_percentiles(predict, texts, batch_size, n_calls, params['warmup'])
+            metrics.update({f"{name}_{key}": value for key, value in percentiles.items()})
+        metrics['batch_size'] = params['batch_size']
+        logger.debug(f"Serving metrics: {metrics}")
+        return metrics
+    except Exception as e:
+        logger.error('Error measuring serving metrics: %s', e)
+        raise
+
 def save_metrics(metrics: dict, file_path: str) -> None:
     """Save the evaluation metrics to a JSON file."""
     try:
@@ -126,34 +230,47 @@ def save_model_info(run_id: str, model_path: str, file_path: str) -> None:
 
 
 def main():
+    configure_tracking()
     mlflow.set_experiment("dvc-pipeline")
+    # metrics and params are sent in batches on a background thread while the model is uploaded
+    tracker = BatchLogger()
     with mlflow.start_run() as run:  # Start an MLflow run
         try:
+            params = load_params('params.yaml')
+            engine = load_preprocessing_params('params.yaml')['engine']
             clf = load_model()
-            X_test, y_test = load_test_data('./data/features/test_bow.csv')
+            X_test, y_test = load_test_data('./data/processed')
+
+            metrics = evaluate_model(clf, X_test, y_test, params['chunksize'], params['bootstrap'])
 
-            metrics = evaluate_model(clf, X_test, y_test)
+            # latency of the raw-text model the app serves, on the test tweets before normalization
+            test_texts = read_table('./data/dedup', 'test', load_storage_params('params.yaml'))['content'].tolist()
+            metrics.update(serving_metrics(
+                'models/model.pkl', 'data/processed/vectorizer.pkl', engine, test_texts, params['latency']
+            ))
             
             save_metrics(metrics, 'reports/metrics.json')
             
             # Log metrics to MLflow
-            for metric_name, metric_value in metrics.items():
-                mlflow.log_metric(metric_name, metric_value)
+            tracker.log_metrics(metrics)
             
+            # Log the feature mode, so bow and hashing runs can be compared
+            tracker.log_param('vectorizer', load_feature_params('params.yaml')['vectorizer'])
+            tracker.log_param('n_features', X_test.shape[1])
+
+            # Solver iterations, so warm and cold starts can be compared
+            if hasattr(clf, 'n_iter_'):
+                tracker.log_metric('n_iter', int(np.max(clf.n_iter_)))
+
             # Log model parameters to MLflow
             if hasattr(clf, 'get_params'):
-                params = clf.get_params()
-                for param_name, param_value in params.items():
-                    mlflow.log_param(param_name, param_value)
+                tracker.log_params(clf.get_params())
             
             # old
             # mlflow.log_artifact('models/model.pkl', artifact_path="models")
 
-            # new
-            with tempfile.TemporaryDirectory() as tmp_dir:
-                model_path = os.path.join(tmp_dir, "models")
-                mlflow.sklearn.save_model(clf, model_path)
-                mlflow.log_artifacts(model_path, "models")
+            # one pyfunc with the normalizer config, vectorizer and classifier, it takes raw text
+            log_sentiment_model("models", 'models/model.pkl', 'data/processed/vectorizer.pkl', engine)
             
             # Save model info
             save_model_info(run.info.run_id, "models", 'reports/model_info.json')
@@ -169,6 +286,9 @@ def main():
         except Exception as e:
             logger.error('Failed to complete the model evaluation process: %s', e)
             print(f"Error: {e}")
+        finally:
+            # everything buffered reaches the run before it is closed
+            tracker.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,198 @@
+import os
+import json
+import time
+import queue
+import yaml
+import logging
+import resource
+import tempfile
+import multiprocessing
+import numpy as np
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+
+# logging configure
+
+logger = logging.getLogger('promotion_gate')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+def load_params(params_path: str) -> dict:
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('promotion parameters retrieved')
+        return params['promotion']
+    except FileNotFoundError:
+        logger.error('File not found')
+        raise
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+    except Exception as e:
+        logger.error('some error occured')
+        raise
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def measure_model(model_path: str, texts: list, labels: np.ndarray, latency: dict, queue) -> None:
+    """Load a downloaded pyfunc and replay the held-out texts through it; runs in a fresh process so RSS is its own"""
+    import mlflow
+
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    model = mlflow.pyfunc.load_model(model_path)
+    load_seconds = time.perf_counter() - start
+    # only now: model_evaluation imports the repo's sentiment_serving, which would otherwise be the
+    # copy the version loads instead of the one it was logged with
+    from src.model.model_evaluation import latency_percentiles
+
+    proba = model.unwrap_python_model().predict_proba(texts)
+    y_pred = model.predict(texts)
+    result = {
+        'accuracy': accuracy_score(labels, y_pred),
+        'precision': precision_score(labels, y_pred),
+        'recall': recall_score(labels, y_pred),
+        'auc': roc_auc_score(labels, proba),
+        'load_seconds': load_seconds,
+    }
+    runs = (('single_row', 1, latency['n_single']), ('batch', latency['batch_size'], latency['n_batches']))
+    for name, batch_size, n_calls in runs:
+        percentiles = latency_percentiles(model.predict, texts, batch_size, n_calls, latency['warmup'])
+        result[f"{name}_p99_ms"] = percentiles['p99_ms']
+    result['rss_mb'] = peak_rss_mb() - rss_before
+    queue.put({key: float(value) for key, value in result.items()})
+
+
+def process_result(process, results, timeout: float):
+    """What the process puts on results, failing if it exits without a result or runs past timeout seconds"""
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            # checked before the get: a result put before the exit is already in the queue
+            exited = process.exitcode is not None
+            try:
+                return results.get(timeout=1)
+            except queue.Empty:
+                if exited:
+                    raise RuntimeError(f"measurement process exited with code {process.exitcode} without a result")
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"measurement process did not finish within {timeout}s")
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def measure_version(model_uri: str, texts: list, labels: np.ndarray, latency: dict, timeout: float) -> dict:
+    """Quality and serving cost of a registered version, from a local download replayed in a spawned process"""
+    import mlflow
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            model_path = mlflow.artifacts.download_artifacts(model_uri, dst_path=tmp_dir)
+            context = multiprocessing.get_context('spawn')
+            results = context.Queue()
+            process = context.Process(target=measure_model, args=(model_path, texts, labels, latency, results))
+            process.start()
+            result = process_result(process, results, timeout)
+            result['artifact_bytes'] = directory_bytes(model_path)
+        logger.debug(f"Measured {model_uri}: {result}")
+        return result
+    except Exception as e:
+        logger.error(f"Error measuring {model_uri}: {str(e)}")
+        raise
+
+
+def compare(baseline: dict, candidate: dict, params: dict) -> list:
+    """One check per budget: quality may drop by at most max_drop, costs may grow to baseline * max_ratio + slack"""
+    checks = []
+    for metric, max_drop in params['max_drop'].items():
+        limit = baseline[metric] - max_drop
+        checks.append({'metric': metric, 'baseline': baseline[metric], 'candidate': candidate[metric],
+                       'limit': limit, 'passed': candidate[metric] >= limit})
+    for metric, max_ratio in params['max_ratio'].items():
+        # the slack keeps small, noisy baselines (a few ms, a few MB) from failing on jitter
+        limit = baseline[metric] * max_ratio + params['slack'].get(metric, 0)
+        checks.append({'metric': metric, 'baseline': baseline[metric], 'candidate': candidate[metric],
+                       'limit': limit, 'passed': candidate[metric] <= limit})
+    return checks
+
+
+def gate_report(model_name: str, baseline_version, candidate_version, baseline: dict, candidate: dict,
+                params: dict) -> dict:
+    checks = compare(baseline, candidate, params)
+    return {
+        'model_name': model_name,
+        'baseline_version': str(baseline_version),
+        'candidate_version': str(candidate_version),
+        'passed': all(check['passed'] for check in checks),
+        'checks': checks,
+    }
+
+
+def error_report(model_name: str, baseline_version, candidate_version, error: str) -> dict:
+    """A refusal for a gate that could not measure both versions"""
+    return {
+        'model_name': model_name,
+        'baseline_version': str(baseline_version),
+        'candidate_version': str(candidate_version),
+        'passed': False,
+        'checks': [],
+        'error': error,
+    }
+
+
+def run_gate(model_name: str, baseline_version, candidate_version, texts: list, labels: np.ndarray,
+             params: dict) -> dict:
+    """Replay the same held-out texts through both versions and check the candidate against the budgets"""
+    try:
+        latency, timeout = params['latency'], params['timeout_seconds']
+        baseline = measure_version(f"models:/{model_name}/{baseline_version}", texts, labels, latency, timeout)
+        candidate = measure_version(f"models:/{model_name}/{candidate_version}", texts, labels, latency, timeout)
+    except RuntimeError as e:
+        # a crashed or hung measurement refuses the candidate instead of stopping the promotion run
+        return error_report(model_name, baseline_version, candidate_version, str(e))
+    report = gate_report(model_name, baseline_version, candidate_version, baseline, candidate, params)
+    for check in report['checks']:
+        logger.info(
+            f"{check['metric']}: baseline {check['baseline']:.4g}, candidate {check['candidate']:.4g}, "
+            f"limit {check['limit']:.4g} {'ok' if check['passed'] else 'REGRESSION'}"
+        )
+    return report
+
+
+def save_report(report: dict, file_path: str) -> None:
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'w') as file:
+            json.dump(report, file, indent=4)
+        logger.debug(f"Promotion gate report saved to {file_path}")
+    except Exception as e:
+        logger.error(f"Error saving the promotion gate report: {str(e)}")
+        raise
+
+
+def log_report(client, run_id: str, report: dict) -> None:
+    """Attach the report to the candidate's run, with a tag saying how the gate went"""
+    client.log_dict(run_id, report, 'promotion_gate.json')
+    client.set_tag(run_id, 'promotion_gate', 'passed' if report['passed'] else 'refused')
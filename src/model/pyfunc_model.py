@@ -0,0 +1,93 @@
+import os
+import json
+import shutil
+import pickle
+import logging
+import tempfile
+import mlflow
+from mlflow.models import infer_signature
+from sentiment_serving.model import INPUT_EXAMPLE, SentimentModel
+
+# logging configure
+
+logger = logging.getLogger('pyfunc_model')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# the package the served model imports, shipped with it; nothing else is called sentiment_serving, so
+# a process that has its own src (the app, the promotion gate) still loads the code the model was logged with
+SERVING_PACKAGE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'sentiment_serving'))
+
+
+def write_normalizer_config(directory: str, engine: str) -> str:
+    from sentiment_serving.text_normalizer import NORMALIZER_VERSION
+
+    normalizer_path = os.path.join(directory, 'normalizer.json')
+    with open(normalizer_path, 'w') as file:
+        json.dump({'engine': engine, 'version': NORMALIZER_VERSION}, file)
+    return normalizer_path
+
+
+def load_local_model(classifier_path: str, vectorizer_path: str, engine: str) -> SentimentModel:
+    """The combined model assembled from local files, exactly as the logged pyfunc loads it"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifacts = {
+            'normalizer': write_normalizer_config(tmp_dir, engine),
+            'vectorizer': vectorizer_path,
+            'classifier': classifier_path,
+        }
+        model = SentimentModel()
+        model.load_context(mlflow.pyfunc.PythonModelContext(artifacts=artifacts, model_config={}))
+    return model
+
+
+def write_serving_code(directory: str) -> str:
+    """Copy the sentiment_serving modules into directory, without caches or anything else"""
+    package = os.path.join(directory, 'sentiment_serving')
+    shutil.copytree(SERVING_PACKAGE, package, ignore=shutil.ignore_patterns('__pycache__'))
+    return package
+
+
+def save_sentiment_model(model_path: str, classifier_path: str, vectorizer_path: str, engine: str) -> None:
+    """Write the classifier and vectorizer files with the normalizer config as one pyfunc directory"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        artifacts = {
+            'normalizer': write_normalizer_config(tmp_dir, engine),
+            'vectorizer': vectorizer_path,
+            'classifier': classifier_path,
+        }
+
+        # run the example through the assembled model once, for the signature
+        model = load_local_model(classifier_path, vectorizer_path, engine)
+        signature = infer_signature(INPUT_EXAMPLE, model.predict(None, INPUT_EXAMPLE))
+
+        mlflow.pyfunc.save_model(
+            model_path,
+            python_model=SentimentModel(),
+            artifacts=artifacts,
+            # the normalizer and SentimentModel only, so the app does not need its own copy of them
+            code_paths=[write_serving_code(tmp_dir)],
+            signature=signature,
+            input_example=INPUT_EXAMPLE,
+        )
+
+
+def log_sentiment_model(artifact_path: str, classifier_path: str, vectorizer_path: str, engine: str) -> None:
+    """Log the classifier and vectorizer files with the normalizer config as one pyfunc under artifact_path"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_path = os.path.join(tmp_dir, artifact_path)
+        save_sentiment_model(model_path, classifier_path, vectorizer_path, engine)
+        mlflow.log_artifacts(model_path, artifact_path)
+        logger.debug(f"Logged the combined model to {artifact_path}")
@@ -1,27 +1,8 @@
 import json
 import mlflow
 import logging
-import os
-import dagshub
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Set up DagsHub credentials for MLflow tracking
-dagshub_token = os.getenv("DAGSHUB_PAT")
-if not dagshub_token:
-    raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
-
-os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
-os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
-
-dagshub_url = "https://dagshub.com"
-repo_owner = 'shahriar0999'
-repo_name = 'mlops-small-project'
-
-# Set up MLflow tracking URI
-mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
+from src.tracking.backend import configure_tracking
+from src.tracking.registry import get_registry
 
 
 # logging configuration
@@ -66,13 +47,7 @@ def register_model(model_name: str, model_info: dict):
         print(model_version)
         
         # Transition the model to "Staging" stage
-        client = mlflow.tracking.MlflowClient()
-        client.transition_model_version_stage(
-            name=model_name,
-            version=model_version.version,
-            stage="Staging",
-            archive_existing_versions=False
-        )
+        get_registry().transition(model_name, model_version.version, "Staging", archive_existing_versions=False)
         
         logger.debug(f'Model {model_name} version {model_version.version} registered and transitioned to Staging.')
     except Exception as e:
@@ -81,6 +56,7 @@ def register_model(model_name: str, model_info: dict):
 
 def main():
     try:
+        configure_tracking()
         model_info_path = 'reports/model_info.json'
         model_info = load_model_info(model_info_path)
         
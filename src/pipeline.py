@@ -0,0 +1,182 @@
+"""Run the DVC pipeline stages in one process.
+
+Stages hand DataFrames and sparse matrices to each other in memory instead of
+re-reading the previous stage's output from disk. Nothing is written unless
+--materialize is given, in which case the selected stages write the same files
+`dvc repro` would. Logging the run to MLflow and registering the model are
+left to the model_evaluation and model_registration stages.
+
+    python -m src.pipeline                       # run and print metrics, write nothing
+    python -m src.pipeline --materialize         # also write every stage's outputs
+    python -m src.pipeline --materialize model_building model_evaluation
+"""
+
+import os
+import json
+import time
+import pickle
+import argparse
+import logging
+from contextlib import contextmanager
+
+from src.data import data_ingestion, data_dedup
+from src.data.storage import load_storage_params, write_table, save_sparse_features
+from src.features import data_preprocessing, feature_engineering, feature_selection
+from src.model import model_building, model_evaluation, hyperparameter_search
+
+# logging configure
+
+logger = logging.getLogger('pipeline')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+STAGES = [
+    'data_ingestion',
+    'data_dedup',
+    'data_preprocessing',
+    'feature_engineering',
+    'feature_selection',
+    'hyperparameter_search',
+    'model_building',
+    'model_evaluation',
+]
+
+
+@contextmanager
+def timed(stage: str, timings: dict):
+    start = time.perf_counter()
+    yield
+    timings[stage] = time.perf_counter() - start
+    logger.info(f"{stage} finished in {timings[stage]:.2f}s")
+
+
+def run(materialize=()) -> dict:
+    """Run every stage in memory, writing only the outputs of the stages listed in materialize"""
+    # the stages read params.yaml themselves, like they do under dvc repro
+    params_path = 'params.yaml'
+    storage = load_storage_params(params_path)
+    timings = {}
+
+    with timed('data_ingestion', timings):
+        params = data_ingestion.load_params(params_path)
+        train_data, test_data = data_ingestion.split_data(data_ingestion.ingest(params), params)
+        if 'data_ingestion' in materialize:
+            data_ingestion.save_data(train_data, test_data, 'data', storage)
+
+    with timed('data_dedup', timings):
+        params = data_dedup.load_params(params_path)
+        train_data, test_data, report = data_dedup.deduplicate(train_data, test_data, params)
+        if 'data_dedup' in materialize:
+            write_table(train_data, os.path.join('data', 'dedup'), 'train', storage)
+            write_table(test_data, os.path.join('data', 'dedup'), 'test', storage)
+            cache_path = data_preprocessing.load_params(params_path)['cache']['path']
+            data_dedup.complete_report(report, cache_path)
+            data_dedup.save_report(report, 'reports/dedup.json')
+
+    # the serving latency in model_evaluation is measured on raw text
+    raw_test_texts = test_data['content'].tolist()
+
+    with timed('data_preprocessing', timings):
+        params = data_preprocessing.load_params(params_path)
+        train_data, test_data = data_preprocessing.preprocess(train_data, test_data, params)
+        if 'data_preprocessing' in materialize:
+            write_table(train_data, os.path.join('data', 'interim'), 'train_processed', storage)
+            write_table(test_data, os.path.join('data', 'interim'), 'test_processed', storage)
+
+    with timed('feature_engineering', timings):
+        vectorizer_path = None
+        if 'feature_engineering' in materialize:
+            vectorizer_path = os.path.join('data', 'features', 'vectorizer.pkl')
+        X_train, y_train, X_test, y_test, vectorizer = feature_engineering.build_features(
+            train_data, test_data, feature_engineering.load_params(params_path), vectorizer_path
+        )
+        if 'feature_engineering' in materialize:
+            feature_engineering.save_features(X_train, y_train, X_test, y_test)
+
+    with timed('feature_selection', timings):
+        params = feature_selection.load_params(params_path)
+        if params['enabled']:
+            X_train_full = X_train
+            X_train, X_test, vectorizer, scores, kept = feature_selection.select(
+                X_train, y_train, X_test, y_test, vectorizer, params
+            )
+        if 'feature_selection' in materialize:
+            save_sparse_features(X_train, y_train, os.path.join('data', 'processed'), 'train_bow')
+            save_sparse_features(X_test, y_test, os.path.join('data', 'processed'), 'test_bow')
+            with open(os.path.join('data', 'processed', 'vectorizer.pkl'), 'wb') as file:
+                pickle.dump(vectorizer, file)
+            report = {'enabled': False}
+            if params['enabled']:
+                report = feature_selection.selection_report(
+                    params, X_train_full, y_train, kept, model_building.load_params()
+                )
+            feature_selection.save_report(report, 'reports/feature_selection.json')
+
+    with timed('hyperparameter_search', timings):
+        params = hyperparameter_search.load_params(params_path)
+        model_params = model_building.load_params()
+        report = {'enabled': False}
+        if params['enabled']:
+            search, seconds = hyperparameter_search.run_search(X_train, y_train, params, model_params)
+            report = hyperparameter_search.search_report(search, params, seconds)
+            model_params = {**model_params, **report['best_params']}
+        if 'hyperparameter_search' in materialize:
+            hyperparameter_search.save_report(report, 'reports/hyperparameter_search.json')
+
+    with timed('model_building', timings):
+        params = model_params
+        terms = model_building.vectorizer_terms(vectorizer)
+        init = model_building.load_warm_start(params, terms, X_train.shape[1])
+        clf = model_building.train_model(X_train, y_train, params, init)
+        if 'model_building' in materialize:
+            model_building.save_model(clf, terms)
+
+    with timed('model_evaluation', timings):
+        params = model_evaluation.load_params(params_path)
+        metrics = model_evaluation.evaluate_model(clf, X_test, y_test, params['chunksize'], params['bootstrap'])
+        if 'model_evaluation' in materialize:
+            # the serving metrics load the model files, so they need this run's model and vectorizer on disk
+            if {'feature_selection', 'model_building'} <= set(materialize):
+                engine = data_preprocessing.load_params(params_path)['engine']
+                metrics.update(model_evaluation.serving_metrics(
+                    'models/model.pkl', os.path.join('data', 'processed', 'vectorizer.pkl'), engine, raw_test_texts,
+                    params['latency']
+                ))
+            else:
+                logger.warning("Serving metrics skipped, "
+                               "they need feature_selection and model_building materialized too")
+            model_evaluation.save_metrics(metrics, 'reports/metrics.json')
+
+    print(f"\n{'stage':<22} {'seconds':>8}")
+    for stage, seconds in timings.items():
+        print(f"{stage:<22} {seconds:>8.2f}")
+    print(f"{'total':<22} {sum(timings.values()):>8.2f}")
+    print(json.dumps(metrics, indent=4))
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the pipeline stages in one process')
+    parser.add_argument(
+        '--materialize', nargs='*', choices=STAGES, default=None,
+        help='write the outputs of these stages, or of every stage when no stage is named',
+    )
+    args = parser.parse_args()
+    materialize = () if args.materialize is None else (args.materialize or STAGES)
+    run(materialize)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+import os
+import yaml
+import logging
+import mlflow
+from dotenv import load_dotenv
+
+# logging configure
+
+logger = logging.getLogger('tracking_backend')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# used when params.yaml is not around, e.g. inside the app image
+DEFAULT_PARAMS = {
+    'backend': 'dagshub',
+    'dagshub': {'repo_owner': 'shahriar0999', 'repo_name': 'mlops-small-project'},
+    'file': {'path': 'mlruns'},
+    'sqlite': {'path': 'mlflow.db'},
+    'registry': {'cache_ttl': 60, 'max_retries': 3, 'backoff': 0.5, 'pool_maxsize': 10},
+}
+
+BACKENDS = ['dagshub', 'file', 'sqlite']
+
+
+def load_params(params_path: str) -> dict:
+    """The tracking section of params.yaml, or the defaults when the file or section is missing"""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('tracking parameters retrieved')
+        return {**DEFAULT_PARAMS, **params.get('tracking', {})}
+    except FileNotFoundError:
+        return dict(DEFAULT_PARAMS)
+    except yaml.YAMLError as e:
+        logger.error('yaml error')
+        raise
+
+
+def tracking_uri(params: dict, backend: str) -> str:
+    """MLflow tracking URI for backend; the local stores hold the model registry too"""
+    if backend == 'dagshub':
+        # Set up DagsHub credentials for MLflow tracking
+        dagshub_token = os.getenv("DAGSHUB_PAT")
+        if not dagshub_token:
+            raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
+
+        os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
+        os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
+        return f"https://dagshub.com/{params['dagshub']['repo_owner']}/{params['dagshub']['repo_name']}.mlflow"
+    if backend == 'file':
+        return 'file://' + os.path.abspath(params['file']['path'])
+    if backend == 'sqlite':
+        return 'sqlite:///' + os.path.abspath(params['sqlite']['path'])
+    raise ValueError(f"Unknown tracking backend '{backend}', expected one of {BACKENDS}")
+
+
+def configure_tracking(backend: str = None, params_path: str = 'params.yaml') -> str:
+    """Point MLflow tracking and the model registry at the configured backend and return its URI.
+
+    The backend is the argument if given, else the TRACKING_BACKEND environment
+    variable, else tracking.backend in params.yaml.
+    """
+    # Load environment variables from .env file
+    load_dotenv()
+    params = load_params(params_path)
+    backend = backend or os.getenv('TRACKING_BACKEND') or params['backend']
+    uri = tracking_uri(params, backend)
+    # MLflow keeps one pooled HTTP session per process, sized when the first request is made
+    os.environ.setdefault('MLFLOW_HTTP_POOL_MAXSIZE', str(params['registry']['pool_maxsize']))
+    mlflow.set_tracking_uri(uri)
+    mlflow.set_registry_uri(uri)
+    logger.debug(f"MLflow tracking on the {backend} backend at {uri}")
+    return uri
@@ -0,0 +1,200 @@
+import time
+import queue
+import atexit
+import logging
+import threading
+from collections import defaultdict
+
+import mlflow
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.utils.validation import MAX_METRICS_PER_BATCH, MAX_PARAMS_TAGS_PER_BATCH
+
+# logging configure
+
+logger = logging.getLogger('batch_logger')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# markers passed through the queue to the background thread
+_FLUSH = object()
+_STOP = object()
+
+
+class BatchLogger:
+    """Buffers MLflow metrics, params and tags and sends them with log_batch.
+
+    With background=True a daemon thread does the sending, so the log_* calls return
+    at once; it sends whenever max_pending entries are buffered or flush_interval
+    seconds have passed. flush() blocks until everything logged so far has been sent,
+    close() (also registered with atexit) flushes and stops the thread. Failed batches
+    are retried max_retries times with exponential backoff, then counted in failed.
+    """
+
+    def __init__(self, client=None, background=True, max_pending=1000, flush_interval=5.0, max_retries=3, backoff=0.5):
+        self.client = client or mlflow.MlflowClient()
+        self.background = background
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.failed = 0
+        self.batches_sent = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._closed = False
+        if background:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name='mlflow-batch-logger', daemon=True)
+            self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @staticmethod
+    def _run_id(run_id):
+        if run_id is not None:
+            return run_id
+        active_run = mlflow.active_run()
+        if active_run is None:
+            raise RuntimeError("No run_id given and no active MLflow run")
+        return active_run.info.run_id
+
+    def _add(self, run_id, entity):
+        if self._closed:
+            raise RuntimeError("BatchLogger is closed")
+        item = (self._run_id(run_id), entity)
+        if self.background:
+            self._queue.put(item)
+            return
+        with self._lock:
+            self._pending.append(item)
+            if len(self._pending) >= self.max_pending:
+                self._send(self._take_pending())
+
+    def log_metric(self, key, value, step=0, timestamp=None, run_id=None):
+        timestamp = timestamp if timestamp is not None else int(time.time() * 1000)
+        self._add(run_id, Metric(key, float(value), timestamp, step))
+
+    def log_metrics(self, metrics: dict, step=0, run_id=None):
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self.log_metric(key, value, step, timestamp, run_id)
+
+    def log_param(self, key, value, run_id=None):
+        self._add(run_id, Param(key, str(value)))
+
+    def log_params(self, params: dict, run_id=None):
+        for key, value in params.items():
+            self.log_param(key, value, run_id)
+
+    def set_tag(self, key, value, run_id=None):
+        self._add(run_id, RunTag(key, str(value)))
+
+    def set_tags(self, tags: dict, run_id=None):
+        for key, value in tags.items():
+            self.set_tag(key, value, run_id)
+
+    def flush(self):
+        """Block until every entry logged so far has been sent (or given up on)"""
+        if self.background:
+            if not self._closed:
+                self._queue.put(_FLUSH)
+                self._queue.join()
+            return
+        with self._lock:
+            self._send(self._take_pending())
+
+    def close(self):
+        if self._closed:
+            return
+        if self.background:
+            self._queue.put(_STOP)
+            self._thread.join()
+        else:
+            self.flush()
+        self._closed = True
+        atexit.unregister(self.close)
+
+    def _take_pending(self):
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _drain(self):
+        pending = self._take_pending()
+        self._send(pending)
+        for _ in pending:
+            self._queue.task_done()
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                # flush_interval passed without a new entry, send what is buffered
+                if self._pending:
+                    self._drain()
+                continue
+            if item is _FLUSH or item is _STOP:
+                self._drain()
+                self._queue.task_done()
+                if item is _STOP:
+                    return
+                continue
+            self._pending.append(item)
+            if len(self._pending) >= self.max_pending:
+                self._drain()
+
+    def _send(self, pending):
+        """log_batch per run, split to MLflow's per-request limits; params keep their first value"""
+        by_run = defaultdict(lambda: {'metrics': [], 'params': {}, 'tags': {}})
+        for run_id, entity in pending:
+            entities = by_run[run_id]
+            if isinstance(entity, Metric):
+                entities['metrics'].append(entity)
+            elif isinstance(entity, Param):
+                entities['params'].setdefault(entity.key, entity)
+            else:
+                entities['tags'][entity.key] = entity
+        for run_id, entities in by_run.items():
+            metrics = entities['metrics']
+            params, tags = list(entities['params'].values()), list(entities['tags'].values())
+            while metrics or params or tags:
+                batch = dict(
+                    metrics=metrics[:MAX_METRICS_PER_BATCH],
+                    params=params[:MAX_PARAMS_TAGS_PER_BATCH],
+                    tags=tags[:MAX_PARAMS_TAGS_PER_BATCH],
+                )
+                metrics = metrics[MAX_METRICS_PER_BATCH:]
+                params, tags = params[MAX_PARAMS_TAGS_PER_BATCH:], tags[MAX_PARAMS_TAGS_PER_BATCH:]
+                self._send_batch(run_id, **batch)
+
+    def _send_batch(self, run_id, metrics, params, tags):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.client.log_batch(run_id, metrics=metrics, params=params, tags=tags)
+                self.batches_sent += 1
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.failed += len(metrics) + len(params) + len(tags)
+                    logger.error(f"Giving up on a batch for run {run_id} after {attempt + 1} attempts: {str(e)}")
+                    return
+                delay = self.backoff * 2 ** attempt
+                logger.warning(f"log_batch for run {run_id} failed ({str(e)}), retrying in {delay:.1f}s")
+                time.sleep(delay)
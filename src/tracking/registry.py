@@ -0,0 +1,123 @@
+import time
+import logging
+import threading
+
+import mlflow
+from mlflow.exceptions import MlflowException
+
+from src.tracking.backend import load_params
+
+# logging configure
+
+logger = logging.getLogger('registry')
+logger.setLevel('DEBUG')
+
+console_handler = logging.StreamHandler()
+console_handler.setLevel('DEBUG')
+
+file_handler = logging.FileHandler('errors.log')
+file_handler.setLevel('ERROR')
+
+formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+console_handler.setFormatter(formatter)
+file_handler.setFormatter(formatter)
+
+logger.addHandler(console_handler)
+logger.addHandler(file_handler)
+
+# the order the app picks a version to serve in
+SERVING_STAGES = ('Production', 'Staging', 'None')
+
+
+class RegistryClient:
+    """Model registry lookups through one MlflowClient, cached for ttl seconds and retried with backoff.
+
+    Over HTTP the client reuses MLflow's pooled session, so repeated lookups share
+    connections. Version lookups are cached per model until ttl passes or invalidate()
+    is called; transition() invalidates the model it changes. Server errors and
+    connection failures are retried max_retries times, errors the registry answered
+    with (such as an unknown model) are raised at once.
+    """
+
+    def __init__(self, client=None, ttl=60.0, max_retries=3, backoff=0.5):
+        self.client = client or mlflow.MlflowClient()
+        self.ttl = ttl
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def _call(self, method, *args, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return getattr(self.client, method)(*args, **kwargs)
+            except MlflowException as e:
+                if e.get_http_status_code() < 500 or attempt == self.max_retries:
+                    raise
+                error = e
+            except OSError as e:
+                if attempt == self.max_retries:
+                    raise
+                error = e
+            delay = self.backoff * 2 ** attempt
+            logger.warning(f"Registry call {method} failed ({str(error)}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def _latest_versions(self, model_name: str, stages: tuple) -> dict:
+        """Latest version per stage of model_name, {stage: version}, from the cache or one registry request"""
+        key = (model_name, stages)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > now:
+                return cached[1]
+        # the file store answers with int versions, the REST stores with strings
+        versions = {
+            version.current_stage: str(version.version)
+            for version in self._call('get_latest_versions', model_name, stages=list(stages))
+        }
+        with self._lock:
+            self._cache[key] = (now + self.ttl, versions)
+        return versions
+
+    def latest_version(self, model_name: str, stage: str):
+        """Latest version of model_name in stage, or None"""
+        return self._latest_versions(model_name, (stage,)).get(stage)
+
+    def resolve_version(self, model_name: str, stages: tuple = SERVING_STAGES):
+        """(version, stage) of the first of stages holding a version of model_name, or (None, None)"""
+        versions = self._latest_versions(model_name, tuple(stages))
+        for stage in stages:
+            if stage in versions:
+                return versions[stage], stage
+        return None, None
+
+    def transition(self, model_name: str, version, stage: str, archive_existing_versions: bool = False):
+        try:
+            return self._call(
+                'transition_model_version_stage',
+                name=model_name, version=version, stage=stage, archive_existing_versions=archive_existing_versions,
+            )
+        finally:
+            self.invalidate(model_name)
+
+    def invalidate(self, model_name: str = None) -> None:
+        """Drop the cached lookups of model_name, or all of them"""
+        with self._lock:
+            for key in [key for key in self._cache if model_name is None or key[0] == model_name]:
+                del self._cache[key]
+
+
+_registries = {}
+
+
+def get_registry(params_path: str = 'params.yaml') -> RegistryClient:
+    """The process-wide RegistryClient for the current registry URI, set up by configure_tracking"""
+    registry_uri = mlflow.get_registry_uri()
+    if registry_uri not in _registries:
+        params = load_params(params_path)['registry']
+        _registries[registry_uri] = RegistryClient(
+            mlflow.MlflowClient(registry_uri=registry_uri),
+            ttl=params['cache_ttl'], max_retries=params['max_retries'], backoff=params['backoff'],
+        )
+    return _registries[registry_uri]
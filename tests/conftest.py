@@ -1,46 +1,84 @@
 import pytest
 import mlflow
 import os
-import pandas as pd
-import pickle
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+import sys
+import yaml
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.benchmarks.corpus import generate_tweets
+from src.benchmarks.suite import build_model
+from src.data.storage import load_storage_params, read_table
+from src.tracking.backend import configure_tracking
+from src.tracking.registry import get_registry
+
+MODEL_NAME = "own_model"
+
+
+def remote_registry() -> bool:
+    """TRACKING_BACKEND=dagshub tests the model dvc repro registered, anything else runs offline"""
+    return os.getenv('TRACKING_BACKEND') == 'dagshub'
+
+
+def load_params() -> dict:
+    with open('params.yaml', 'r') as file:
+        return yaml.safe_load(file)
+
+
+@pytest.fixture(scope="session")
+def local_model_path(tmp_path_factory):
+    """A pyfunc fitted on the synthetic benchmark corpus the way the pipeline fits it"""
+    params = load_params()
+    corpus = generate_tweets(params['benchmarks']['n_docs'], params['benchmarks']['seed'])
+    _, _, _, model_path = build_model(corpus, params, str(tmp_path_factory.mktemp('model')))
+    return model_path
+
+
+def seed_local_registry(workdir, model_path: str) -> None:
+    """Point tracking at a file store in workdir and register model_path there as the Staging version"""
+    params_path = str(workdir / 'params.yaml')
+    with open(params_path, 'w') as file:
+        yaml.safe_dump({'tracking': {'file': {'path': str(workdir / 'mlruns')}}}, file)
+    configure_tracking('file', params_path=params_path)
+
+    mlflow.set_experiment("tests")
+    with mlflow.start_run() as run:
+        mlflow.log_artifacts(model_path, 'model')
+    version = mlflow.register_model(f"runs:/{run.info.run_id}/model", MODEL_NAME).version
+    mlflow.MlflowClient().transition_model_version_stage(MODEL_NAME, version, 'Staging')
+
 
 @pytest.fixture(scope="session")
-def model_and_data():
-    # setup dagshub credentials for mlflow tracking
-    dagshub_token = os.getenv("DAGSHUB_PAT")
-    if not dagshub_token:
-        raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
-    
-    os.environ["MLFLOW_TRACKING_USERNAME"] = dagshub_token
-    os.environ["MLFLOW_TRACKING_PASSWORD"] = dagshub_token
-
-    dagshub_url = "https://dagshub.com"
-    repo_owner = 'shahriar0999'
-    repo_name = 'mlops-small-project'
-
-    # Set up MLflow tracking URI
-    mlflow.set_tracking_uri(f'{dagshub_url}/{repo_owner}/{repo_name}.mlflow')
+def model_and_data(request, tmp_path_factory):
+    if remote_registry():
+        configure_tracking()
+        # the raw test tweets and their labels, the model normalizes and vectorizes them itself
+        test_df = read_table("data/dedup", "test", load_storage_params("params.yaml"))
+    else:
+        seed_local_registry(tmp_path_factory.mktemp('registry'), request.getfixturevalue('local_model_path'))
+        # synthetic tweets the local model was not fitted on
+        bench = load_params()['benchmarks']
+        test_df = generate_tweets(bench['batch_size'], bench['seed'] + 1)
 
     # Load the latest model version from MLflow model registry
-    model_name = "own_model"
-    model_version = get_latest_model_version(model_name)
+    model_version = get_registry().latest_version(MODEL_NAME, 'Staging')
     if model_version is None:
-        raise ValueError(f"No model found in stage 'Staging' for model '{model_name}'")
-    
-    model_uri = f"models:/{model_name}/{model_version}"
-    model = mlflow.pyfunc.load_model(model_uri)
-
-    # load the vectorizer
-    vectorizer = pickle.load(open("models/vectorizer.pkl", "rb"))
+        raise ValueError(f"No model found in stage 'Staging' for model '{MODEL_NAME}'")
 
-    # load the test data
-    test_data = pd.read_csv("data/features/test_bow.csv")
+    model_uri = f"models:/{MODEL_NAME}/{model_version}"
+    model = mlflow.pyfunc.load_model(model_uri)
 
-    return model, vectorizer, test_data
+    test_data = (test_df['content'].tolist(), test_df['sentiment'].values)
+    return model, test_data
 
 
-def get_latest_model_version(model_name, stage='Staging'):
-    client = mlflow.MlflowClient()
-    latest_version = client.get_latest_versions(model_name, stages=[stage])
-    return latest_version[0].version if latest_version else None
\ No newline at end of file
+@pytest.fixture(scope="session")
+def served_model(request):
+    """Serve the local model from apps/app.py unless the tests run against the remote registry"""
+    if remote_registry():
+        yield
+        return
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv('MODEL_URI', request.getfixturevalue('local_model_path'))
+        yield
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import mlflow
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tracking.batch_logger import BatchLogger
+
+
+class FlakyClient:
+    """MlflowClient stand-in whose first log_batch calls fail"""
+
+    def __init__(self, client, failures):
+        self.client = client
+        self.failures = failures
+        self.calls = 0
+
+    def log_batch(self, *args, **kwargs):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("tracking server unavailable")
+        return self.client.log_batch(*args, **kwargs)
+
+
+def test_batches_reach_a_local_file_store(tmp_path):
+    mlflow.set_tracking_uri(tmp_path.as_uri())
+    mlflow.set_experiment("batch_logger")
+    client = FlakyClient(mlflow.MlflowClient(), failures=1)
+    with mlflow.start_run() as run:
+        with BatchLogger(client=client, backoff=0.01) as tracker:
+            for step in range(1200):
+                tracker.log_metric('loss', 1 / (step + 1), step=step)
+            tracker.log_params({f"p{index}": index for index in range(120)})
+            tracker.set_tag('stage', 'test')
+            tracker.flush()
+            assert tracker.failed == 0
+            # a send at 1000 buffered entries, two more for the rest (100 params per request), one retry
+            assert client.calls == 4
+
+    data = mlflow.get_run(run.info.run_id).data
+    assert len(mlflow.MlflowClient().get_metric_history(run.info.run_id, 'loss')) == 1200
+    assert len(data.params) == 120
+    assert data.tags['stage'] == 'test'
+
+
+def test_synchronous_mode_sends_on_flush(tmp_path):
+    mlflow.set_tracking_uri(tmp_path.as_uri())
+    mlflow.set_experiment("batch_logger")
+    with mlflow.start_run() as run:
+        tracker = BatchLogger(background=False)
+        tracker.log_metrics({'accuracy': 0.9, 'auc': 0.95})
+        assert mlflow.get_run(run.info.run_id).data.metrics == {}
+        tracker.close()
+    assert mlflow.get_run(run.info.run_id).data.metrics == {'accuracy': 0.9, 'auc': 0.95}
@@ -0,0 +1,91 @@
+import os
+import sys
+import json
+
+import yaml
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.benchmarks.corpus import generate_tweets
+from src.benchmarks.suite import compare, time_cases
+
+BASELINE = {'cases': {
+    'calibration': {'best_ms': 2.0}, 'vectorizer.transform_batch': {'best_ms': 4.0}, 'app.predict': {'best_ms': 10.0},
+}}
+
+
+def report(calibration=2.0, **best_ms):
+    cases = {name.replace('__', '.'): {'best_ms': value} for name, value in best_ms.items()}
+    return {'cases': {'calibration': {'best_ms': calibration}, **cases}}
+
+
+def failed(checks):
+    return [check['case'] for check in checks if not check['passed']]
+
+
+def test_corpus_is_deterministic():
+    corpus = generate_tweets(200, seed=7)
+    assert corpus.equals(generate_tweets(200, seed=7))
+    assert not corpus.equals(generate_tweets(200, seed=8))
+    assert set(corpus['sentiment']) == {0, 1}
+    lengths = corpus['content'].str.split().str.len()
+    assert lengths.min() >= 5 and lengths.max() <= 30
+    # something for every normalizer step to remove
+    for pattern in (r'http://', r'\d', r'[!?.,]', r'[A-Z]', r'\b(?:the|and|my)\b'):
+        assert corpus['content'].str.contains(pattern).any(), pattern
+
+
+def test_slowdowns_within_tolerance_pass():
+    checks = compare(BASELINE, report(vectorizer__transform_batch=4.9, app__predict=8.0), tolerance=0.25, slack_ms=0.01)
+    assert failed(checks) == []
+
+
+def test_regressions_and_new_cases():
+    current = report(vectorizer__transform_batch=5.2, app__predict=9.0, model__predict_proba_single=0.1)
+    checks = compare(BASELINE, current, tolerance=0.25, slack_ms=0.01)
+    assert failed(checks) == ['vectorizer.transform_batch']
+    new = [check for check in checks if check['case'] == 'model.predict_proba_single'][0]
+    assert new['baseline_ms'] is None and new['passed']
+
+
+def test_times_are_scaled_by_the_calibration():
+    # the whole run was twice as slow, calibration included: nothing regressed
+    current = report(calibration=4.0, vectorizer__transform_batch=8.0, app__predict=20.0)
+    checks = compare(BASELINE, current, tolerance=0.25, slack_ms=0.01)
+    assert failed(checks) == []
+    assert [check['scaled_ms'] for check in checks] == [4.0, 10.0]
+    # a faster machine does not hide a slower case
+    current = report(calibration=1.0, vectorizer__transform_batch=3.0, app__predict=5.0)
+    checks = compare(BASELINE, current, tolerance=0.25, slack_ms=0.01)
+    assert failed(checks) == ['vectorizer.transform_batch']
+
+
+def test_time_cases_reports_milliseconds_per_call():
+    calls = {'a': 0, 'b': 0}
+
+    def case(name):
+        def func():
+            calls[name] += 1
+        return func
+
+    results = time_cases({'a': case('a'), 'b': case('b')}, repeat=3, min_seconds=0.001)
+    for name, result in results.items():
+        assert calls[name] >= 3 * result['number']
+        assert 0 < result['best_ms'] <= result['median_ms']
+
+
+def test_baseline_covers_every_case():
+    root = os.path.join(os.path.dirname(__file__), '..')
+    with open(os.path.join(root, 'params.yaml')) as file:
+        params = yaml.safe_load(file)['benchmarks']
+    with open(os.path.join(root, params['baseline'])) as file:
+        baseline = json.load(file)
+    steps = ['lower_case', 'remove_stop_words', 'removing_numbers', 'removing_punctuations',
+             'removing_urls', 'lemmatization', 'remove_small_sentences', 'normalize_text', 'normalize_text_vectorized']
+    expected = {f"preprocessing.{step}" for step in steps} | {
+        'calibration', 'vectorizer.transform_single', 'vectorizer.transform_batch',
+        'model.predict_proba_single', 'model.predict_proba_batch', 'app.predict',
+    }
+    assert set(baseline['cases']) == expected
+    assert baseline['n_docs'] == params['n_docs'] and baseline['batch_size'] == params['batch_size']
@@ -0,0 +1,59 @@
+import os
+import sys
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.data_dedup import complete_report, deduplicate
+
+
+PARAMS = {'shingle_size': 5, 'num_perm': 64, 'bands': 16, 'threshold': 0.8, 'seed': 42}
+
+
+def test_exact_and_near_duplicates_removed_across_splits():
+    train = pd.DataFrame({
+        'sentiment': [1, 0, 1],
+        'content': [
+            "just finished my morning run and feeling great about today",
+            "my phone battery died again in the middle of the call",
+            "cannot believe how good the new album sounds on repeat",
+        ],
+    })
+    test = pd.DataFrame({
+        'sentiment': [1, 0, 0],
+        'content': [
+            "just finished my morning run and feeling great about today",
+            "My phone battery died again in the middle of the call!",
+            "stuck in traffic for two hours with no end in sight",
+        ],
+    })
+
+    train_out, test_out, report = deduplicate(train, test, PARAMS)
+
+    assert report['exact_duplicates_removed'] == 1
+    assert report['near_duplicates_removed'] == 1
+    assert report['rows_out'] == 4
+    # every cluster keeps its train copy, so nothing in test repeats a train text
+    assert len(train_out) == 3
+    assert test_out['content'].tolist() == ["stuck in traffic for two hours with no end in sight"]
+
+
+def test_empty_splits_pass_through():
+    empty = pd.DataFrame({'sentiment': pd.Series(dtype='int64'), 'content': pd.Series(dtype=object)})
+    train_out, test_out, report = deduplicate(empty, empty.copy(), PARAMS)
+    assert train_out.empty and test_out.empty
+    assert report['rows_in'] == report['rows_out'] == 0
+
+    train = pd.DataFrame({'sentiment': [1, 1], 'content': ["the same tweet twice", "the same tweet twice"]})
+    train_out, test_out, report = deduplicate(train, empty, PARAMS)
+    assert len(train_out) == 1 and test_out.empty
+
+
+def test_report_does_not_depend_on_the_local_cache(tmp_path):
+    train = pd.DataFrame({'sentiment': [1, 1], 'content': ["the same tweet twice", "the same tweet twice"]})
+    _, _, report = deduplicate(train, train.iloc[:0], PARAMS)
+    report = complete_report(report, str(tmp_path / 'missing.sqlite'))
+    assert report['fraction_removed'] == 0.5
+    assert 'preprocessing_seconds_saved' not in report
@@ -0,0 +1,102 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.data_ingestion import fetch_source, file_digest, hash_split, ingest, split_data
+
+
+def tweets(start, stop, seed=0):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(start, stop)
+    return pd.DataFrame({
+        'tweet_id': ids,
+        'sentiment': rng.integers(0, 2, size=len(ids)),
+        'content': [f"tweet number {i}" for i in ids],
+    })
+
+
+def membership(train_data, test_data):
+    return {**dict.fromkeys(train_data['content'], 'train'), **dict.fromkeys(test_data['content'], 'test')}
+
+
+def test_hash_split_keeps_rows_in_place_when_rows_are_appended():
+    before = membership(*hash_split(tweets(0, 2000), 0.25, 'content'))
+    after = membership(*hash_split(pd.concat([tweets(0, 2000), tweets(2000, 2500, seed=1)]), 0.25, 'content'))
+    assert all(after[content] == side for content, side in before.items())
+    assert 0.2 < sum(side == 'test' for side in after.values()) / len(after) < 0.3
+
+
+def test_stratified_hash_split_only_moves_rows_at_the_cut_off():
+    original = tweets(0, 2000)
+    appended = tweets(2000, 2100, seed=1)
+    train_data, test_data = hash_split(original, 0.25, 'content', stratify=True)
+    assert hash_split(original, 0.25, 'content', stratify=True)[1].equals(test_data)
+    for data in (original, pd.concat([original, appended])):
+        _, test = hash_split(data, 0.25, 'content', stratify=True)
+        for label, count in data['sentiment'].value_counts().items():
+            assert (test['sentiment'] == label).sum() == round(0.25 * count)
+
+    before = membership(train_data, test_data)
+    after = membership(*hash_split(pd.concat([original, appended]), 0.25, 'content', stratify=True))
+    moved = [content for content, side in before.items() if after[content] != side]
+    # each appended row shifts its class's cut-off by at most one position
+    assert len(moved) <= len(appended)
+
+
+def test_tweet_id_split_key_is_dropped(tmp_path):
+    source = tmp_path / 'tweets.csv'
+    df = tweets(0, 200).assign(sentiment=lambda frame: frame['sentiment'].map({1: 'happiness', 0: 'sadness'}))
+    df.to_csv(source, index=False)
+    params = {'source': str(source), 'cache_dir': str(tmp_path / 'cache'), 'chunksize': None,
+              'split': 'hash', 'split_key': 'tweet_id', 'stratify': False, 'test_size': 0.25}
+
+    final_df = ingest(params)
+    assert 'tweet_id' in final_df.columns
+    for data in split_data(final_df, params):
+        assert list(data.columns) == ['sentiment', 'content']
+
+    # the default split never reads tweet_id
+    params['split'] = 'random'
+    assert list(ingest(params).columns) == ['sentiment', 'content']
+
+
+def test_source_cache_hits_and_refreshes(tmp_path):
+    source = tmp_path / 'tweet_emotions.csv'
+    source.write_text("tweet_id,sentiment,content\n1,happiness,first version\n")
+    url = source.as_uri()
+    cache_dir = str(tmp_path / 'cache')
+
+    path = fetch_source(url, cache_dir)
+    with open(path + '.sha256') as file:
+        first_digest = file.read()
+    assert first_digest == file_digest(str(source))
+
+    # a cached copy matching its recorded digest is used as is
+    source.write_text("tweet_id,sentiment,content\n1,happiness,second version\n")
+    assert fetch_source(url, cache_dir) == path
+    assert 'first version' in open(path).read()
+
+    # pinning the new digest refreshes the copy
+    second_digest = file_digest(str(source))
+    fetch_source(url, cache_dir, second_digest)
+    assert 'second version' in open(path).read()
+    with open(path + '.sha256') as file:
+        assert file.read() == second_digest
+
+    # a corrupted copy is downloaded again
+    with open(path, 'a') as file:
+        file.write("2,sadness,tampered\n")
+    fetch_source(url, cache_dir)
+    assert file_digest(path) == second_digest
+
+    # a download that does not match the pinned digest fails and keeps the good copy
+    with pytest.raises(ValueError):
+        fetch_source(url, cache_dir, first_digest)
+    assert file_digest(path) == second_digest
+    assert sorted(os.listdir(cache_dir)) == ['tweet_emotions.csv', 'tweet_emotions.csv.sha256']
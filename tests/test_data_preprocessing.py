@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sentiment_serving.text_normalizer import normalize_text, normalize_text_vectorized
+from src.features.data_preprocessing import normalize_text_parallel
+
+
+TWEETS = [
+    "I LOVE this song!!! http://t.co/abc so much",
+    "@friend   can't wait for the weekend 2day :)",
+    "sad  sad\tday... missing you www.example.com/page",
+    "the and a",
+    "",
+    "Wow² that's 100% awesome؛ isn't it،",
+    "Running dogs are barking at the cars",
+]
+
+
+def make_frame(repeat=1):
+    return pd.DataFrame({
+        'sentiment': [1, 0] * (len(TWEETS) * repeat // 2) + [1] * (len(TWEETS) * repeat % 2),
+        'content': TWEETS * repeat,
+    })
+
+
+def test_vectorized_engine_matches_apply():
+    expected = normalize_text(make_frame())
+    result = normalize_text_vectorized(make_frame())
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def test_vectorized_engine_on_arrow_strings():
+    expected = normalize_text(make_frame())
+    result = normalize_text_vectorized(make_frame().astype({'content': 'string[pyarrow]'}))
+    assert result['content'].dtype == 'string[pyarrow]'
+    assert result['content'].astype(object).fillna('').tolist() == expected['content'].fillna('').tolist()
+
+
+def test_parallel_matches_serial():
+    expected = normalize_text(make_frame(repeat=20)).to_csv()
+    for normalizer in (normalize_text, normalize_text_vectorized):
+        result = normalize_text_parallel(make_frame(repeat=20), n_jobs=2, chunksize=9, normalizer=normalizer)
+        assert result.to_csv() == expected
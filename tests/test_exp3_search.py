@@ -0,0 +1,48 @@
+import os
+import sys
+
+import numpy as np
+import scipy.sparse
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from notebooks import exp3_lor_bow_hp as exp3
+
+
+def make_split(n_rows=600, n_features=40, seed=0):
+    X = scipy.sparse.random(n_rows, n_features, density=0.2, format='csr', random_state=seed)
+    y = (X[:, :5].sum(axis=1).A1 > X[:, 5:10].sum(axis=1).A1).astype(np.int64)
+    cut = int(n_rows * 0.8)
+    return X[:cut], X[cut:], y[:cut], y[cut:]
+
+
+def test_grid_search_records_the_fold_models_holdout_means():
+    X_train, X_test, y_train, y_test = make_split()
+    search = exp3.build_search(X_test, y_test)
+    assert type(search).__name__ == 'GridSearchCV'
+    search.fit(X_train, y_train)
+
+    records = exp3.trial_records(search, X_test, y_test)
+    assert len(records) == 6
+    for record in records:
+        assert {f"mean_fold_holdout_{name}" for name in exp3.METRICS} <= set(record['metrics'])
+        assert not any(name.startswith('holdout_') for name in record['metrics'])
+
+
+def test_large_grids_use_halving_and_score_only_the_refit_best(monkeypatch):
+    grid = {'C': list(np.logspace(-2, 2, 10)), 'penalty': ['l1', 'l2'], 'solver': ['liblinear']}
+    monkeypatch.setattr(exp3, 'param_grid', grid)
+    X_train, X_test, y_train, y_test = make_split()
+    search = exp3.build_search(X_test, y_test)
+    assert type(search).__name__ == 'HalvingGridSearchCV'
+    search.fit(X_train, y_train)
+    assert search.n_iterations_ > 1
+
+    records = exp3.trial_records(search, X_test, y_test)
+    assert len(records) == exp3.HALVING_MIN_CANDIDATES
+    scored = [record for record in records if 'holdout_f1' in record['metrics']]
+    assert [record['params'] for record in scored] == [search.best_params_]
+    holdout = exp3.holdout_metrics(search.best_estimator_, X_test, y_test)
+    assert {name: scored[0]['metrics'][name] for name in holdout} == holdout
+    assert scored[0]['metrics']['iter'] == search.n_iterations_ - 1
@@ -0,0 +1,38 @@
+import os
+import sys
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.features.feature_engineering import sharded_fit_transform
+
+
+def make_corpus(n_docs, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array([f"word{i}" for i in range(300)] + ["café", "zebra", "apple"])
+    # zipf-like frequencies give plenty of ties at the max_features cut-off
+    weights = 1 / np.arange(1, len(words) + 1)
+    weights /= weights.sum()
+    return np.array(
+        [" ".join(rng.choice(words, rng.integers(0, 12), p=weights)) for _ in range(n_docs)],
+        dtype=object,
+    )
+
+
+def test_sharded_fit_matches_serial_fit():
+    X_train, X_test = make_corpus(400), make_corpus(100, seed=1)
+    for kwargs in ({'max_features': 50}, {'max_features': None}, {'max_features': 40, 'min_df': 2, 'max_df': 0.5}):
+        serial = CountVectorizer(**kwargs)
+        expected_train = serial.fit_transform(X_train)
+        expected_test = serial.transform(X_test)
+
+        sharded = CountVectorizer(**kwargs)
+        result_train, result_test = sharded_fit_transform(sharded, X_train, X_test, n_jobs=2, chunksize=90)
+
+        assert sharded.vocabulary_ == serial.vocabulary_
+        assert list(sharded.vocabulary_) == list(serial.vocabulary_)
+        assert (result_train != expected_train).nnz == 0
+        assert (result_test != expected_test).nnz == 0
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.feature_selection import mutual_info_classif
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.features.feature_selection import prune_vectorizer, score_mutual_info, select_features, selection_report
+
+
+def make_corpus(n_docs, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array([f"word{i}" for i in range(60)])
+    return [" ".join(rng.choice(words, rng.integers(1, 10))) for _ in range(n_docs)]
+
+
+def test_pruned_vectorizer_matches_selected_columns():
+    docs = make_corpus(200)
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(docs)
+    kept = select_features(np.arange(X.shape[1], dtype=float), k=10)
+
+    pruned = prune_vectorizer(vectorizer, kept)
+    assert (pruned.transform(docs) != X[:, kept]).nnz == 0
+    assert len(vectorizer.vocabulary_) == X.shape[1]
+
+
+def test_mutual_info_matches_sklearn_on_term_presence():
+    vectorizer = CountVectorizer()
+    X = vectorizer.fit_transform(make_corpus(200))
+    y = np.random.default_rng(1).integers(0, 2, X.shape[0])
+    expected = mutual_info_classif((X > 0).astype(int), y, discrete_features=True)
+    assert np.allclose(score_mutual_info(X, y, {}), expected)
+
+
+def test_size_curve_is_measured_on_a_validation_split_of_train():
+    docs = make_corpus(300)
+    X = CountVectorizer().fit_transform(docs).tocsr()
+    y = np.array([int('word1 ' in f"{doc} ") for doc in docs])
+    params = {'method': 'chi2', 'report_sizes': [5, 20], 'validation_size': 0.2, 'random_state': 3}
+    model_params = {'C': 1, 'solver': 'liblinear', 'penalty': 'l2', 'random_state': 3}
+
+    report = selection_report(params, X, y, np.arange(10), model_params)
+    assert [entry['n_features'] for entry in report['auc_by_size']] == [5, 10, 20, X.shape[1]]
+    assert report['validation_size'] == 0.2
+    # a label carried by a single term is found on the train rows alone
+    assert report['auc_by_size'][0]['auc'] > 0.95
+    assert report == selection_report(params, X, y, np.arange(10), model_params)
@@ -2,18 +2,6 @@ import pytest
 import sys
 import os
 
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-
-# setup dagshub credentials for mlflow tracking
-dagshub_token = os.getenv("DAGSHUB_PAT")
-if not dagshub_token:
-    raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
-    
-
 # Add project root to sys.path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
@@ -21,7 +9,7 @@ from apps.app import app as flask_app
 
 
 @pytest.fixture(scope="module")
-def client():
+def client(served_model):
     with flask_app.test_client() as client:
         yield client
 
@@ -0,0 +1,62 @@
+import os
+import sys
+import json
+
+import mlflow
+import numpy as np
+import scipy.sparse
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.model.hyperparameter_search import log_trials, run_search, search_report, trial_records
+from src.model.model_building import apply_search_results
+
+SEARCH_PARAMS = {
+    'method': 'halving', 'n_candidates': 6, 'factor': 2, 'min_resources': 'exhaust', 'cv': 3,
+    'scoring': 'roc_auc', 'n_jobs': 1, 'random_state': 3,
+    'space': {'C': {'loguniform': [0.01, 100]}, 'penalty': ['l1', 'l2']},
+    'mmap_min_bytes': '1M', 'mmap_dir': '.cache/hyperparameter_search',
+}
+MODEL_PARAMS = {'C': 1, 'solver': 'liblinear', 'penalty': 'l2', 'random_state': 3}
+
+
+def test_search_results_feed_model_building(tmp_path):
+    X = scipy.sparse.random(300, 20, density=0.3, format='csr', random_state=0)
+    y = (X[:, :3].sum(axis=1).A1 > X[:, 3:6].sum(axis=1).A1).astype(np.int64)
+
+    search, seconds = run_search(X, y, {**SEARCH_PARAMS, 'mmap_dir': str(tmp_path / 'mmap')}, MODEL_PARAMS)
+    report = search_report(search, SEARCH_PARAMS, seconds)
+    assert len(trial_records(search.cv_results_)) == report['n_trials']
+
+    report_path = tmp_path / 'hyperparameter_search.json'
+    report_path.write_text(json.dumps(report))
+    tuned = apply_search_results(MODEL_PARAMS, str(report_path))
+    assert tuned['C'] == search.best_params_['C']
+    assert tuned['solver'] == 'liblinear'
+
+    report_path.write_text(json.dumps({'enabled': False}))
+    assert apply_search_results(MODEL_PARAMS, str(report_path)) == MODEL_PARAMS
+
+
+def test_trials_are_logged_as_finished_child_runs(tmp_path):
+    mlflow.set_tracking_uri(tmp_path.as_uri())
+    trials = [
+        {'params': {'C': 0.1, 'penalty': 'l1'}, 'metrics': {'mean_test_score': 0.7}, 'rank': 2},
+        {'params': {'C': 1.0, 'penalty': 'l2'}, 'metrics': {'mean_test_score': 0.8}, 'rank': 1},
+    ]
+    report = {'scoring': 'roc_auc', 'best_score': 0.8, 'seconds': 1.5, 'best_params': {'C': 1.0, 'penalty': 'l2'}}
+    parent_id = log_trials(report, trials, 'hyperparameter_search')
+
+    parent = mlflow.get_run(parent_id)
+    assert parent.data.metrics == {'best_roc_auc': 0.8, 'search_seconds': 1.5}
+    assert parent.data.params == {'C': '1.0', 'penalty': 'l2'}
+    children = mlflow.search_runs(
+        [parent.info.experiment_id], filter_string=f"tags.mlflow.parentRunId = '{parent_id}'", output_format='list',
+    )
+    assert sorted(child.data.tags['rank'] for child in children) == ['1', '2']
+    for child in children:
+        assert child.info.status == 'FINISHED'
+        trial = trials[2 - int(child.data.tags['rank'])]
+        assert child.data.params == {key: str(value) for key, value in trial['params'].items()}
+        assert child.data.metrics == trial['metrics']
@@ -1,50 +1,37 @@
 import os
 import pandas as pd
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-
-# setup dagshub credentials for mlflow tracking
-dagshub_token = os.getenv("DAGSHUB_PAT")
-if not dagshub_token:
-    raise EnvironmentError("DAGSHUB_PAT environment variable is not set")
-    
 
 
 def test_model_loaded_properly(model_and_data):
-    model, _, _ = model_and_data
+    model, _ = model_and_data
     assert model is not None, "Model should not be None after loading."
 
 
 def test_model_signature(model_and_data):
-    model, vectorizer, _ = model_and_data
-
-    # Create dummy input matching expected vectorizer features
-    input_text = "hi how are you"
-    input_data = vectorizer.transform([input_text])
-    input_df = pd.DataFrame(input_data.toarray(), columns=[str(i) for i in range(input_data.shape[1])])
+    model, _ = model_and_data
 
-    prediction = model.predict(input_df)
+    # The model takes raw text
+    input_text = ["hi how are you"]
+    prediction = model.predict(input_text)
 
-    # Assert input shape matches vectorizer feature size
-    assert input_df.shape[1] == len(vectorizer.get_feature_names_out()), \
+    # Assert the bundled vectorizer output matches the bundled classifier's feature size (bow and hashing vectorizers)
+    sentiment_model = model.unwrap_python_model()
+    input_data = sentiment_model.transform(input_text)
+    assert input_data.shape[1] == sentiment_model.classifier.n_features_in_, \
         "Input shape does not match expected number of features from vectorizer."
 
     # Assert output shape
-    assert len(prediction) == input_df.shape[0], \
-        f"Prediction length {len(prediction)} does not match input rows {input_df.shape[0]}."
+    assert len(prediction) == len(input_text), \
+        f"Prediction length {len(prediction)} does not match input rows {len(input_text)}."
     assert prediction.ndim == 1, "Prediction should be a 1D array for binary classification."
 
 
 
 def test_model_performance(model_and_data):
-    model, _, holdout_data = model_and_data
+    model, holdout_data = model_and_data
 
-    X_test = holdout_data.iloc[:, 0:-1]
-    y_test = holdout_data.iloc[:, -1]
+    X_test, y_test = holdout_data
 
     y_pred_new = model.predict(X_test)
 
@@ -0,0 +1,94 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+import scipy.sparse
+import yaml
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.model.model_building import remap_coefficients, train_model
+
+MINIBATCH_PARAMS = {
+    'trainer': 'minibatch',
+    'penalty': 'l2',
+    'random_state': 3,
+    'minibatch': {
+        'alpha': 0.001, 'epochs': 5, 'chunksize': 50, 'shuffle': True, 'holdout': 0.2, 'patience': 2, 'tol': 0.0001,
+    },
+}
+
+SOLVERS = {'l1': 'saga', 'l2': 'lbfgs'}
+
+
+def make_data(n_rows=400, n_features=30, seed=0):
+    X = scipy.sparse.random(n_rows, n_features, density=0.2, format='csr', random_state=seed)
+    y = (X[:, :5].sum(axis=1).A1 > X[:, 5:10].sum(axis=1).A1).astype(np.int64)
+    return X, y
+
+
+def test_minibatch_trainer_is_deterministic_and_learns():
+    X, y = make_data()
+    first = train_model(X, y, MINIBATCH_PARAMS)
+    second = train_model(X, y, MINIBATCH_PARAMS)
+
+    assert np.array_equal(first.coef_, second.coef_)
+    assert first.n_features_in_ == X.shape[1]
+    assert first.predict_proba(X).shape == (X.shape[0], 2)
+    assert (first.predict(X) == y).mean() > 0.8
+
+
+def test_remap_coefficients_follows_terms_and_zeroes_new_ones():
+    coef, intercept = np.array([[1.0, 2.0, 3.0]]), np.array([0.5])
+    remapped, remapped_intercept = remap_coefficients(coef, intercept, ['a', 'b', 'c'], ['c', 'd', 'a'], 3)
+
+    assert np.array_equal(remapped, [[3.0, 0.0, 1.0]])
+    assert np.array_equal(remapped_intercept, intercept)
+
+
+def test_warm_start_continues_from_the_previous_solution():
+    X, y = make_data()
+    params = {'C': 1, 'solver': 'liblinear', 'penalty': 'l2', 'random_state': 3, 'warm_start': {'solvers': SOLVERS}}
+    cold = train_model(X, y, {**params, 'solver': 'lbfgs'})
+    warm = train_model(X, y, params, (cold.coef_, cold.intercept_))
+
+    assert warm.solver == 'lbfgs'
+    assert np.max(warm.n_iter_) < np.max(cold.n_iter_)
+    assert np.allclose(warm.coef_, cold.coef_, atol=1e-3)
+
+
+def test_minibatch_trainer_without_holdout_runs_every_epoch():
+    X, y = make_data()
+    params = {**MINIBATCH_PARAMS, 'minibatch': {**MINIBATCH_PARAMS['minibatch'], 'holdout': 0}}
+    model = train_model(X, y, params)
+
+    # every epoch passes over all 400 rows
+    assert model.t_ == 5 * X.shape[0] + 1
+    assert (model.predict(X) == y).mean() > 0.8
+
+    params['minibatch']['holdout'] = 1
+    with pytest.raises(ValueError):
+        train_model(X, y, params)
+
+
+def test_l1_warm_start_uses_a_solver_that_supports_it():
+    X, y = make_data()
+    params = {'C': 1, 'solver': 'liblinear', 'penalty': 'l1', 'random_state': 3, 'warm_start': {'solvers': SOLVERS}}
+    cold = train_model(X, y, params)
+    warm = train_model(X, y, params, (cold.coef_, cold.intercept_))
+
+    assert warm.solver == 'saga' and warm.penalty == 'l1'
+    assert (warm.predict(X) == y).mean() > 0.8
+
+    with pytest.raises(ValueError, match="penalty 'l1'"):
+        train_model(X, y, {**params, 'warm_start': {'solvers': {'l2': 'lbfgs'}}}, (cold.coef_, cold.intercept_))
+
+
+def test_every_searched_penalty_has_a_warm_start_solver():
+    with open(os.path.join(os.path.dirname(__file__), '..', 'params.yaml')) as file:
+        params = yaml.safe_load(file)
+    searched = params['hyperparameter_search']['space']['penalty']
+    model_params = params['model_building']
+    assert set(searched) | {model_params['penalty']} <= set(model_params['warm_start']['solvers'])
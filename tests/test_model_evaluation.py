@@ -0,0 +1,72 @@
+import os
+import sys
+
+import numpy as np
+import scipy.sparse
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.model.model_evaluation import (
+    batched_metrics, bootstrap_intervals, bootstrap_weights, evaluate_model, latency_percentiles, predict_proba_chunked,
+)
+
+
+def test_single_probability_pass_matches_predict():
+    X = scipy.sparse.random(500, 20, density=0.3, format='csr', random_state=0)
+    y = (X[:, :3].sum(axis=1).A1 > X[:, 3:6].sum(axis=1).A1).astype(np.int64)
+    clf = LogisticRegression().fit(X, y)
+
+    proba = predict_proba_chunked(clf, X, chunksize=64)
+    assert np.allclose(proba, clf.predict_proba(X))
+    assert np.array_equal(clf.classes_[proba.argmax(axis=1)], clf.predict(X))
+    assert evaluate_model(clf, X, y, chunksize=64)['accuracy'] == (clf.predict(X) == y).mean()
+
+
+def test_latency_percentiles_are_ordered():
+    calls = []
+    latency = latency_percentiles(calls.append, list(range(10)), batch_size=4, n_calls=20, warmup=2)
+    assert len(calls) == 22
+    assert all(len(batch) == 4 for batch in calls)
+    assert latency['p50_ms'] <= latency['p95_ms'] <= latency['p99_ms']
+
+
+def test_batched_metrics_match_sklearn_on_each_resample():
+    rng = np.random.default_rng(0)
+    y_true = rng.integers(0, 2, 300)
+    # rounded scores, so the AUC has ties to count half
+    y_score = np.round(np.clip(y_true * 0.3 + rng.random(300) * 0.7, 0, 1), 2)
+    y_pred = (y_score > 0.5).astype(np.int64)
+
+    indices = rng.integers(0, 300, size=(5, 300))
+    weights = np.stack([np.bincount(row, minlength=300) for row in indices]).astype(np.float64)
+    batched = batched_metrics(weights, y_true, y_pred, y_score)
+    for row, index in enumerate(indices):
+        assert np.isclose(batched['accuracy'][row], accuracy_score(y_true[index], y_pred[index]))
+        assert np.isclose(batched['precision'][row], precision_score(y_true[index], y_pred[index]))
+        assert np.isclose(batched['recall'][row], recall_score(y_true[index], y_pred[index]))
+        assert np.isclose(batched['auc'][row], roc_auc_score(y_true[index], y_score[index]))
+
+
+def test_bootstrap_weights_draw_n_rows_per_resample():
+    weights = bootstrap_weights(50, 7, np.random.default_rng(0))
+    assert weights.shape == (7, 50)
+    assert np.all(weights.sum(axis=1) == 50)
+
+
+def test_bootstrap_intervals_bracket_the_point_estimate():
+    X = scipy.sparse.random(500, 20, density=0.3, format='csr', random_state=0)
+    y = (X[:, :3].sum(axis=1).A1 > X[:, 3:6].sum(axis=1).A1).astype(np.int64)
+    clf = LogisticRegression().fit(X, y)
+    params = {'n_resamples': 300, 'confidence': 0.9, 'random_state': 0, 'chunksize': 64}
+
+    metrics = evaluate_model(clf, X, y, bootstrap=params)
+    for name in ('accuracy', 'precision', 'recall', 'auc'):
+        assert metrics[f"{name}_ci_lower"] <= metrics[name] <= metrics[f"{name}_ci_upper"]
+    # the same seed gives the same intervals however the resamples are batched
+    proba = clf.predict_proba(X)
+    y_pred = clf.classes_[proba.argmax(axis=1)]
+    chunked = bootstrap_intervals(y, y_pred, proba[:, 1], {**params, 'chunksize': 300})
+    assert bootstrap_intervals(y, y_pred, proba[:, 1], params) == chunked
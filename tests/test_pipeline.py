@@ -0,0 +1,92 @@
+import os
+import sys
+import json
+import pickle
+
+import pytest
+import yaml
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import pipeline
+from src.benchmarks.corpus import generate_tweets
+from src.data import data_ingestion, data_dedup
+from src.data.storage import load_sparse_features
+from src.features import data_preprocessing, feature_engineering, feature_selection
+from src.model import hyperparameter_search, model_building, model_evaluation
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# the stages run by dvc repro before model_evaluation, which also logs to MLflow
+STAGE_MAINS = [
+    data_ingestion.main, data_dedup.main, data_preprocessing.main, feature_engineering.main,
+    feature_selection.main, hyperparameter_search.main, model_building.main,
+]
+QUALITY = ['accuracy', 'precision', 'recall', 'auc']
+
+
+@pytest.fixture
+def params(tmp_path):
+    """params.yaml reading a small synthetic source, with every stage in one process"""
+    corpus = generate_tweets(600, seed=11)
+    corpus['sentiment'] = corpus['sentiment'].map({1: 'happiness', 0: 'sadness'})
+    corpus.insert(0, 'tweet_id', range(len(corpus)))
+    source = tmp_path / 'tweets.csv'
+    corpus.to_csv(source, index=False)
+
+    with open(os.path.join(ROOT, 'params.yaml')) as file:
+        params = yaml.safe_load(file)
+    params['data_ingestion']['source'] = str(source)
+    cache = {**params['data_preprocessing']['cache'], 'enabled': False}
+    params['data_preprocessing'].update({'n_jobs': 1, 'cache': cache})
+    params['feature_engineering']['n_jobs'] = 1
+    params['feature_selection'].update({'enabled': True, 'k': 100, 'report_sizes': [50]})
+    params['model_evaluation']['bootstrap']['n_resamples'] = 50
+    params['model_evaluation']['latency'].update({'n_single': 5, 'n_batches': 2, 'warmup': 1})
+    return params
+
+
+def workspace(path, params):
+    for directory in ('models', 'reports'):
+        os.makedirs(path / directory)
+    with open(path / 'params.yaml', 'w') as file:
+        yaml.safe_dump(params, file)
+    return path
+
+
+def artifacts(path) -> dict:
+    """Every file a stage wrote, reports without their wall times"""
+    files = {}
+    for directory in ('data', 'models', 'reports'):
+        for root, dirs, names in os.walk(path / directory):
+            dirs[:] = [name for name in dirs if name != 'external']
+            for name in names:
+                relative = os.path.relpath(os.path.join(root, name), path)
+                with open(os.path.join(root, name), 'rb') as file:
+                    files[relative] = file.read()
+    for name, content in files.items():
+        if name.endswith('.json') and name.startswith('reports'):
+            files[name] = {key: value for key, value in json.loads(content).items() if not key.endswith('_seconds')}
+    return files
+
+
+def test_materialized_run_matches_the_stages(tmp_path, monkeypatch, params):
+    stages = workspace(tmp_path / 'stages', params)
+    monkeypatch.chdir(stages)
+    for main in STAGE_MAINS:
+        main()
+    X_test, y_test = load_sparse_features(os.path.join('data', 'processed'), 'test_bow')
+    with open(os.path.join('models', 'model.pkl'), 'rb') as file:
+        expected = model_evaluation.evaluate_model(pickle.load(file), X_test, y_test)
+
+    in_process = workspace(tmp_path / 'in_process', params)
+    monkeypatch.chdir(in_process)
+    metrics = pipeline.run(materialize=pipeline.STAGES)
+
+    stage_files, run_files = artifacts(stages), artifacts(in_process)
+    assert 'data/processed/vectorizer.pkl' in stage_files and 'models/model.pkl' in stage_files
+    # model_evaluation is only part of the in-process run
+    assert set(run_files) - set(stage_files) == {'reports/metrics.json'}
+    for name, content in stage_files.items():
+        assert run_files[name] == content, name
+    assert {metric: metrics[metric] for metric in QUALITY} == {metric: expected[metric] for metric in QUALITY}
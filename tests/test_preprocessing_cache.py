@@ -0,0 +1,88 @@
+import os
+import sys
+import itertools
+
+import pandas as pd
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.features import preprocessing_cache
+from sentiment_serving.text_normalizer import normalize_text
+from src.features.data_preprocessing import normalize_text_cached
+from src.features.preprocessing_cache import PreprocessingCache
+
+
+class CountingNormalizer:
+    """normalize_text that records the texts it was asked to normalize"""
+
+    def __init__(self):
+        self.seen = []
+
+    def __call__(self, df):
+        self.seen.extend(df.content.tolist())
+        return normalize_text(df)
+
+
+class FakeClock:
+    """Strictly increasing time.time() so the LRU order does not depend on the clock resolution"""
+
+    def __init__(self):
+        self.ticks = itertools.count(1)
+
+    def time(self):
+        return float(next(self.ticks))
+
+
+def frame(texts):
+    return pd.DataFrame({'sentiment': [1] * len(texts), 'content': texts})
+
+
+def test_hits_merge_with_fresh_rows_in_order(tmp_path):
+    first = ["I LOVE this song so much", "sad sad day missing you", "dogs are barking at the cars"]
+    second = [
+        "dogs are barking at the cars", "a brand new tweet about cats",
+        "I LOVE this song so much", "a brand new tweet about cats", "the and a",
+    ]
+    with PreprocessingCache(str(tmp_path / 'cache.sqlite'), '1', 1 << 20) as cache:
+        normalize_text_cached(frame(first), cache, CountingNormalizer())
+
+        normalizer = CountingNormalizer()
+        result = normalize_text_cached(frame(second), cache, normalizer)
+
+    pd.testing.assert_frame_equal(result, normalize_text(frame(second)))
+    # hits are not normalized again, a repeated unseen text is normalized once
+    assert normalizer.seen == ["a brand new tweet about cats", "the and a"]
+
+
+def test_eviction_keeps_recently_used_entries_under_the_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(preprocessing_cache, 'time', FakeClock())
+    cache = PreprocessingCache(str(tmp_path / 'cache.sqlite'), '1', max_bytes=10 ** 6)
+    keys = [cache.make_key(f"text number {i}") for i in range(10)]
+    for key in keys:
+        cache.put_many({key: 'x' * 84})
+    # every entry is a 16 byte key and an 84 byte value
+    assert cache.size() == 1000
+
+    cache.get_many(keys[:2])
+    cache.max_bytes = 450
+    assert cache.evict() == 6
+    assert cache.size() <= 450
+    assert set(cache.get_many(keys)) == set(keys[:2] + keys[8:])
+    cache.close()
+
+
+def test_new_normalizer_version_invalidates_entries(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    texts = ["I LOVE this song so much", "sad sad day missing you"]
+    with PreprocessingCache(path, '1', 1 << 20) as cache:
+        normalize_text_cached(frame(texts), cache, CountingNormalizer())
+        old_keys = [cache.make_key(text) for text in texts]
+
+    with PreprocessingCache(path, '2', 1 << 20) as cache:
+        assert [cache.make_key(text) for text in texts] != old_keys
+        normalizer = CountingNormalizer()
+        result = normalize_text_cached(frame(texts), cache, normalizer)
+
+    assert normalizer.seen == texts
+    pd.testing.assert_frame_equal(result, normalize_text(frame(texts)))
@@ -0,0 +1,67 @@
+import os
+import sys
+import time
+import multiprocessing
+
+import pytest
+import yaml
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.model.promotion_gate import gate_report, process_result
+
+PARAMS = {
+    'max_drop': {'accuracy': 0.01, 'auc': 0.01},
+    'max_ratio': {'single_row_p99_ms': 1.25, 'rss_mb': 1.5},
+    'slack': {'single_row_p99_ms': 2},
+}
+BASELINE = {'accuracy': 0.85, 'auc': 0.95, 'single_row_p99_ms': 10.0, 'rss_mb': 20.0}
+
+
+def failed(report):
+    return [check['metric'] for check in report['checks'] if not check['passed']]
+
+
+def test_candidate_within_budgets_passes():
+    candidate = {'accuracy': 0.845, 'auc': 0.96, 'single_row_p99_ms': 14.0, 'rss_mb': 30.0}
+    report = gate_report('own_model', 1, 2, BASELINE, candidate, PARAMS)
+    assert report['passed'] and failed(report) == []
+    assert report['baseline_version'] == '1' and report['candidate_version'] == '2'
+
+
+def test_quality_and_cost_regressions_are_refused():
+    candidate = {'accuracy': 0.83, 'auc': 0.95, 'single_row_p99_ms': 14.6, 'rss_mb': 31.0}
+    report = gate_report('own_model', 1, 2, BASELINE, candidate, PARAMS)
+    assert not report['passed']
+    assert failed(report) == ['accuracy', 'single_row_p99_ms', 'rss_mb']
+
+
+def test_params_budget_every_measured_quantity():
+    with open(os.path.join(os.path.dirname(__file__), '..', 'params.yaml')) as file:
+        params = yaml.safe_load(file)['promotion']
+    measured = {'accuracy', 'precision', 'recall', 'auc', 'load_seconds', 'single_row_p99_ms', 'batch_p99_ms', 'rss_mb',
+                'artifact_bytes'}
+    assert set(params['max_drop']) | set(params['max_ratio']) == measured
+    assert params['timeout_seconds'] > 0
+    assert set(params['slack']) <= set(params['max_ratio'])
+
+
+def test_measurement_processes_that_crash_or_hang_fail():
+    context = multiprocessing.get_context('spawn')
+
+    results = context.Queue()
+    process = context.Process(target=results.put, args=({'accuracy': 0.9},))
+    process.start()
+    assert process_result(process, results, timeout=60) == {'accuracy': 0.9}
+
+    process = context.Process(target=os._exit, args=(3,))
+    process.start()
+    with pytest.raises(RuntimeError, match='exited with code 3'):
+        process_result(process, context.Queue(), timeout=60)
+
+    process = context.Process(target=time.sleep, args=(60,))
+    process.start()
+    with pytest.raises(RuntimeError, match='did not finish'):
+        process_result(process, context.Queue(), timeout=1)
+    assert not process.is_alive()
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import pickle
+import subprocess
+
+import mlflow
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.linear_model import LogisticRegression
+
+# Add project root to sys.path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from sentiment_serving.text_normalizer import NORMALIZER_VERSION, normalize_text
+from src.model.pyfunc_model import SentimentModel, save_sentiment_model
+
+TEXTS = [
+    "I am so happy today, what a lovely morning",
+    "Feeling sad and lonely tonight, missing everyone",
+    "Great news!!! We won the game and I love it",
+    "Worst day ever, everything went wrong again",
+    "ok",
+]
+
+
+def fit_model(tmp_path):
+    """Vectorizer and classifier fitted on the normalized TEXTS, pickled in tmp_path"""
+    labels = np.array([1, 0, 1, 0, 1])
+    content = normalize_text(pd.DataFrame({'content': TEXTS})).content.fillna('')
+    vectorizer = CountVectorizer()
+    classifier = LogisticRegression().fit(vectorizer.fit_transform(content), labels)
+
+    artifacts = {name: str(tmp_path / f"{name}.pkl") for name in ('vectorizer', 'classifier')}
+    for name, obj in (('vectorizer', vectorizer), ('classifier', classifier)):
+        with open(artifacts[name], 'wb') as file:
+            pickle.dump(obj, file)
+    return content, vectorizer, classifier, artifacts
+
+
+def load_sentiment_model(tmp_path, artifacts):
+    """SentimentModel loaded from the fitted artifacts with the apply engine"""
+    artifacts['normalizer'] = str(tmp_path / 'normalizer.json')
+    with open(artifacts['normalizer'], 'w') as file:
+        json.dump({'engine': 'apply', 'version': NORMALIZER_VERSION}, file)
+
+    model = SentimentModel()
+    model.load_context(mlflow.pyfunc.PythonModelContext(artifacts=artifacts, model_config={}))
+    return model
+
+
+def test_sentiment_model_matches_the_pipeline_steps(tmp_path):
+    _, vectorizer, classifier, artifacts = fit_model(tmp_path)
+    model = load_sentiment_model(tmp_path, artifacts)
+
+    content = normalize_text(pd.DataFrame({'content': TEXTS}), drop_short=False).content.fillna('')
+    expected = classifier.predict(vectorizer.transform(content))
+    assert np.array_equal(model.predict(None, TEXTS), expected)
+    assert np.array_equal(model.predict(None, pd.DataFrame({'text': TEXTS})), expected)
+    assert np.allclose(model.predict_proba(TEXTS), classifier.predict_proba(vectorizer.transform(content))[:, 1])
+
+
+def test_sentiment_model_scores_short_texts(tmp_path):
+    _, _, _, artifacts = fit_model(tmp_path)
+    model = load_sentiment_model(tmp_path, artifacts)
+
+    positive, negative = model.predict_proba(["So happy!", "So sad..."])
+    assert positive > negative
+
+
+@pytest.mark.parametrize('layout', ['image', 'repo'])
+def test_saved_model_loads_its_own_serving_code(tmp_path, layout):
+    content, vectorizer, classifier, artifacts = fit_model(tmp_path)
+    model_path = str(tmp_path / 'pyfunc')
+    save_sentiment_model(model_path, artifacts['classifier'], artifacts['vectorizer'], 'apply')
+
+    code = os.path.join(model_path, 'code')
+    shipped = sorted(
+        os.path.relpath(os.path.join(root, name), code) for root, _, names in os.walk(code) for name in names
+    )
+    assert shipped == ['sentiment_serving/__init__.py', 'sentiment_serving/model.py',
+                       'sentiment_serving/text_normalizer.py']
+
+    # a fresh interpreter that imports a src of its own before loading, as the app does
+    workdir = tmp_path / 'server'
+    workdir.mkdir()
+    env = dict(os.environ)
+    if layout == 'image':
+        # the docker image: src holds only the tracking package, the repo is not on sys.path
+        (workdir / 'src' / 'tracking').mkdir(parents=True)
+        (workdir / 'src' / '__init__.py').touch()
+        (workdir / 'src' / 'tracking' / '__init__.py').touch()
+    else:
+        # a pipeline process, e.g. the promotion gate: the repo and its sentiment_serving are importable
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    own_src = 'src.tracking' if layout == 'image' else 'src.model'
+    script = (
+        f"import sys, json, mlflow, {own_src}\n"
+        f"model = mlflow.pyfunc.load_model({model_path!r})\n"
+        "import sentiment_serving\n"
+        "modules = sorted(name for name in sys.modules if name.startswith(('src.', 'sentiment_serving')))\n"
+        f"print(json.dumps([model.predict({TEXTS!r}).tolist(), modules, sentiment_serving.__file__]))\n"
+    )
+    process = subprocess.run(
+        [sys.executable, '-c', script], cwd=workdir, env=env, capture_output=True, text=True, check=True,
+    )
+    predictions, modules, package_file = json.loads(process.stdout.splitlines()[-1])
+
+    assert predictions == classifier.predict(vectorizer.transform(content)).tolist()
+    assert package_file.startswith(code)
+    assert modules == ['sentiment_serving', 'sentiment_serving.model', 'sentiment_serving.text_normalizer', own_src]
+    # mlflow itself may create mlruns, the bundled modules open no log files
+    assert not [name for name in os.listdir(workdir) if name.endswith('.log')]
@@ -0,0 +1,91 @@
+import os
+import sys
+
+import mlflow
+import pytest
+from mlflow.exceptions import MlflowException
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tracking.registry import RegistryClient
+
+
+class CountingClient:
+    """MlflowClient stand-in that counts registry calls and fails the first ones"""
+
+    def __init__(self, client, failures=0, error=ConnectionError("registry unavailable")):
+        self.client = client
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def get_latest_versions(self, *args, **kwargs):
+        self.calls += 1
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return self.client.get_latest_versions(*args, **kwargs)
+
+    def transition_model_version_stage(self, *args, **kwargs):
+        return self.client.transition_model_version_stage(*args, **kwargs)
+
+
+@pytest.fixture
+def local_registry(tmp_path):
+    """A file store registry with two unstaged versions of own_model"""
+    client = mlflow.MlflowClient(tracking_uri=tmp_path.as_uri(), registry_uri=tmp_path.as_uri())
+    client.create_registered_model('own_model')
+    for _ in range(2):
+        client.create_model_version('own_model', source=(tmp_path / 'model').as_uri())
+    return client
+
+
+def test_resolve_falls_back_from_production(local_registry):
+    registry = RegistryClient(local_registry)
+    assert registry.resolve_version('own_model') == ('2', 'None')
+    registry.transition('own_model', '1', 'Staging')
+    assert registry.resolve_version('own_model') == ('1', 'Staging')
+    registry.transition('own_model', '2', 'Production')
+    assert registry.resolve_version('own_model') == ('2', 'Production')
+    assert registry.resolve_version('own_model', ('Archived',)) == (None, None)
+
+
+def test_lookups_are_cached_until_invalidated(local_registry):
+    client = CountingClient(local_registry)
+    registry = RegistryClient(client, ttl=60)
+    for _ in range(5):
+        assert registry.latest_version('own_model', 'Staging') is None
+    assert client.calls == 1
+
+    # a transition made elsewhere is only seen after invalidate() or the ttl
+    local_registry.transition_model_version_stage('own_model', '2', 'Staging')
+    assert registry.latest_version('own_model', 'Staging') is None
+    registry.invalidate('own_model')
+    assert registry.latest_version('own_model', 'Staging') == '2'
+    assert client.calls == 2
+
+    # transitions through the client invalidate on their own
+    registry.transition('own_model', '1', 'Staging', archive_existing_versions=True)
+    assert registry.latest_version('own_model', 'Staging') == '1'
+    assert client.calls == 3
+
+    expiring = RegistryClient(client, ttl=0)
+    expiring.latest_version('own_model', 'Staging')
+    expiring.latest_version('own_model', 'Staging')
+    assert client.calls == 5
+
+
+def test_connection_errors_are_retried(local_registry):
+    client = CountingClient(local_registry, failures=2)
+    registry = RegistryClient(client, max_retries=3, backoff=0.01)
+    assert registry.resolve_version('own_model') == ('2', 'None')
+    assert client.calls == 3
+
+
+def test_registry_answers_are_not_retried(local_registry):
+    client = CountingClient(local_registry, failures=1, error=MlflowException.invalid_parameter_value("bad stage"))
+    registry = RegistryClient(client, max_retries=3, backoff=0.01)
+    with pytest.raises(MlflowException):
+        registry.latest_version('own_model', 'Staging')
+    assert client.calls == 1
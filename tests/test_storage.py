@@ -0,0 +1,65 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.data.storage import load_sparse_features, read_table, save_sparse_features, write_table
+
+TEXTS = ["I love this!", "", "null", "nan", "NA", "None", "sad day", "ünïcödé ؛ text"]
+
+
+def frame():
+    return pd.DataFrame({'sentiment': [1, 0, 1, 0, 1, 0, 1, 0], 'content': TEXTS})
+
+
+@pytest.mark.parametrize('storage_format', ['csv', 'parquet'])
+def test_tables_round_trip(tmp_path, storage_format):
+    storage = {'format': storage_format, 'compression': 'zstd'}
+    write_table(frame(), str(tmp_path), 'train', storage)
+    assert os.path.exists(tmp_path / f"train.{storage_format}")
+
+    df = read_table(str(tmp_path), 'train', storage)
+    assert list(df.columns) == ['sentiment', 'content']
+    assert df['sentiment'].tolist() == frame()['sentiment'].tolist()
+    # empty and NA-looking tweets stay text
+    assert df['content'].tolist() == TEXTS
+
+
+def test_missing_values_round_trip(tmp_path):
+    df = pd.DataFrame({'content': ["a tweet", np.nan, ""]})
+    parquet = {'format': 'parquet', 'compression': 'zstd'}
+    write_table(df, str(tmp_path), 'interim', parquet)
+    content = read_table(str(tmp_path), 'interim', parquet)['content']
+    assert content.isna().tolist() == [False, True, False] and content[2] == ""
+
+    # csv writes a missing value as an empty field, it reads back as ""
+    csv = {'format': 'csv', 'compression': None}
+    write_table(df, str(tmp_path), 'interim', csv)
+    assert read_table(str(tmp_path), 'interim', csv)['content'].tolist() == ["a tweet", "", ""]
+
+
+def test_parquet_is_the_same_for_object_and_arrow_strings(tmp_path):
+    storage = {'format': 'parquet', 'compression': 'zstd'}
+    write_table(frame(), str(tmp_path / 'object'), 'train', storage)
+    arrow = frame().astype({'content': 'string[pyarrow]'})
+    write_table(arrow, str(tmp_path / 'arrow'), 'train', storage)
+    assert (tmp_path / 'object' / 'train.parquet').read_bytes() == (tmp_path / 'arrow' / 'train.parquet').read_bytes()
+
+
+def test_sparse_features_round_trip(tmp_path):
+    rng = np.random.default_rng(3)
+    X = scipy.sparse.random(50, 200, density=0.05, format='csc', random_state=rng, dtype=np.int64)
+    y = rng.integers(0, 2, size=50)
+    save_sparse_features(X, y, str(tmp_path), 'train')
+
+    X_loaded, y_loaded = load_sparse_features(str(tmp_path), 'train')
+    assert scipy.sparse.isspmatrix_csr(X_loaded) and X_loaded.has_sorted_indices
+    assert X_loaded.dtype == X.dtype and X_loaded.shape == X.shape
+    assert (X_loaded != X).nnz == 0
+    np.testing.assert_array_equal(y_loaded, y)
@@ -0,0 +1,67 @@
+import os
+import sys
+
+import mlflow
+import pytest
+import yaml
+
+# Add project root to sys.path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.tracking.backend import configure_tracking
+
+
+class Echo(mlflow.pyfunc.PythonModel):
+    def predict(self, context, model_input, params=None):
+        return model_input
+
+
+def write_params(tmp_path, backend):
+    params_path = tmp_path / 'params.yaml'
+    tracking = {'backend': backend, 'file': {'path': str(tmp_path / 'mlruns')}}
+    params_path.write_text(yaml.safe_dump({'tracking': tracking}))
+    return str(params_path)
+
+
+def test_file_backend_keeps_registry_semantics(tmp_path, monkeypatch):
+    monkeypatch.delenv('TRACKING_BACKEND', raising=False)
+    uri = configure_tracking(params_path=write_params(tmp_path, 'file'))
+    assert uri == (tmp_path / 'mlruns').as_uri()
+    assert mlflow.get_registry_uri() == uri
+
+    mlflow.set_experiment("tracking_backend")
+    versions = []
+    for _ in range(2):
+        with mlflow.start_run() as run:
+            mlflow.pyfunc.log_model(name='model', python_model=Echo())
+        versions.append(mlflow.register_model(f"runs:/{run.info.run_id}/model", 'own_model').version)
+
+    client = mlflow.MlflowClient()
+    client.transition_model_version_stage('own_model', versions[0], 'Production')
+    client.transition_model_version_stage('own_model', versions[1], 'Staging')
+    assert client.get_latest_versions('own_model', stages=['Production'])[0].version == versions[0]
+    assert client.get_latest_versions('own_model', stages=['Staging'])[0].version == versions[1]
+
+    # promotion as scripts/promote_model.py does it
+    client.transition_model_version_stage('own_model', versions[0], 'Archived')
+    client.transition_model_version_stage('own_model', versions[1], 'Production')
+    assert client.get_latest_versions('own_model', stages=['Production'])[0].version == versions[1]
+    assert mlflow.pyfunc.load_model(f"models:/own_model/{versions[1]}").predict(['hi']) == ['hi']
+
+
+def test_environment_overrides_params(tmp_path, monkeypatch):
+    monkeypatch.setenv('TRACKING_BACKEND', 'file')
+    assert configure_tracking(params_path=write_params(tmp_path, 'dagshub')).startswith('file://')
+
+
+def test_dagshub_needs_a_token(tmp_path, monkeypatch):
+    monkeypatch.delenv('TRACKING_BACKEND', raising=False)
+    monkeypatch.delenv('DAGSHUB_PAT', raising=False)
+    with pytest.raises(EnvironmentError):
+        configure_tracking(params_path=write_params(tmp_path, 'dagshub'))
+
+
+def test_unknown_backend(tmp_path, monkeypatch):
+    monkeypatch.delenv('TRACKING_BACKEND', raising=False)
+    with pytest.raises(ValueError):
+        configure_tracking(params_path=write_params(tmp_path, 'postgres'))